@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Import-Time Startup Benchmark
+
+Every MCP tool call used to start a fresh Python process, and the CLI still
+does, so import time is user-visible latency. This measures the cumulative
+import time of the entry-point modules with ``python -X importtime`` and fails
+if a module exceeds its startup budget or pulls in a heavy dependency that
+should only be loaded on the paths that need it.
+
+Usage:
+    python3 benchmarks/import_time.py [--runs 7] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+# module -> cumulative import budget in milliseconds
+STARTUP_BUDGET_MS = {
+    'submit_feedback': 30,
+    'utils.session_manager': 20,
+    'utils.login_and_extract': 20,
+}
+
+# Heavy dependencies that must not be imported at startup
+LAZY_MODULES = [
+    'requests',
+    'urllib3',
+    'selenium',
+    'webdriver_manager',
+    'httpx',
+    'sqlite3',
+    'concurrent.futures',
+]
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+
+def measure(module):
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns:
+        (cumulative_ms, imported_module_names)
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    cumulative_ms = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name == module:
+            cumulative_ms = int(match.group(2)) / 1000
+
+    return cumulative_ms, imported
+
+
+def run(runs):
+    """Benchmark every module in STARTUP_BUDGET_MS and return the report dict"""
+    report = {'runs': runs, 'modules': {}, 'ok': True}
+
+    for module, budget_ms in STARTUP_BUDGET_MS.items():
+        samples = []
+        eager = set()
+        for _ in range(runs):
+            cumulative_ms, imported = measure(module)
+            samples.append(cumulative_ms)
+            eager |= {name for name in LAZY_MODULES if name in imported}
+
+        median_ms = statistics.median(samples)
+        ok = median_ms <= budget_ms and not eager
+        report['ok'] = report['ok'] and ok
+        report['modules'][module] = {
+            'median_ms': round(median_ms, 2),
+            'min_ms': round(min(samples), 2),
+            'budget_ms': budget_ms,
+            'eager_heavy_imports': sorted(eager),
+            'ok': ok,
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time startup budgets")
+    parser.add_argument('--runs', type=int, default=7, help="Fresh interpreters per module (default: 7)")
+    parser.add_argument('--json', action='store_true', help="Print the machine-readable report only")
+    args = parser.parse_args()
+
+    report = run(max(1, args.runs))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for module, stats in report['modules'].items():
+            status = '✓' if stats['ok'] else '✗'
+            print(f"{status} {module}: {stats['median_ms']:.1f} ms (budget {stats['budget_ms']} ms)")
+            if stats['eager_heavy_imports']:
+                print(f"    imported at startup: {', '.join(stats['eager_heavy_imports'])}")
+
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Local ServiceNow Stand-In for Benchmarks
+
+A small threaded HTTP server that speaks enough of the ServiceNow REST API for
+submit_feedback.py to run against it:
+
+    POST/GET         /api/now/table/<table>
+    GET/PATCH        /api/now/table/<table>/<sys_id>
+    POST             /api/now/v1/batch
+    POST             /api/now/attachment/file
+
+Table lists understand a subset of encoded queries (``^``-joined
+``field=``/``>=``/``>``/``<=``/``<``/``LIKE``/``IN`` terms, ``^OR``
+alternatives and ``ORDERBY``/``ORDERBYDESC``) plus sysparm_fields, sysparm_limit and
+sysparm_offset.
+
+Requests must carry the current X-UserToken. Latency, session expiry and
+throttling are configurable:
+
+- ``latency_ms`` / ``jitter_ms``: added to every response
+- ``expire_every``: after this many accepted requests the token is rotated -
+  the old one gets 401 and the new one is written to ``credentials_file``,
+  where ServiceNowSession picks it up on refresh (standing in for the browser
+  login)
+- ``rate_limit``: requests per second (token bucket); excess requests get 429
+  with a Retry-After header
+
+Usage:
+    python3 benchmarks/stub_server.py [--port 8080] [--latency-ms 50] [--rate-limit 20]
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+TABLE_PREFIX = '/api/now/table/'
+BATCH_PATH = '/api/now/v1/batch'
+ATTACHMENT_PATH = '/api/now/attachment/file'
+
+
+def _error(message):
+    return {'error': {'message': message, 'detail': None}, 'status': 'failure'}
+
+
+class StubState:
+    """Records, the current token, the throttle bucket and request counters"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, expire_every=0, rate_limit=0,
+                 credentials_file=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.expire_every = expire_every
+        self.rate_limit = rate_limit
+        self.credentials_file = credentials_file
+
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.next_number = 1
+        self.generation = 0
+        self.token = None
+        self.cookies = None
+        self.accepted_since_rotation = 0
+        self.bucket = float(rate_limit)
+        self.bucket_updated = time.monotonic()
+        self.stats = Counter()
+
+        self._rotate()
+
+    def _rotate(self):
+        """Issue a new token (caller holds the lock, or is __init__)"""
+        self.generation += 1
+        self.token = f'stub-token-{self.generation}'
+        self.cookies = {
+            'glide_user_route': f'glide-{self.generation}',
+            'JSESSIONID': uuid.uuid4().hex,
+        }
+        self.accepted_since_rotation = 0
+        self.stats['token_rotations'] += 1
+
+        if self.credentials_file:
+            self.write_credentials(self.credentials_file)
+
+    def write_credentials(self, path):
+        """Write the current token in the CREDENTIALS_FILE format"""
+        from datetime import datetime
+
+        data = {
+            'cookies': self.cookies,
+            'x_user_token': self.token,
+            'glide_user_route': self.cookies['glide_user_route'],
+            'jsessionid': self.cookies['JSESSIONID'],
+            'timestamp': datetime.now().isoformat(),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+    def admit(self, token):
+        """
+        Apply throttling and authentication to one request.
+
+        Returns:
+            None if the request may proceed, else (status, headers, body)
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+
+            if self.rate_limit:
+                now = time.monotonic()
+                self.bucket = min(float(self.rate_limit),
+                                  self.bucket + (now - self.bucket_updated) * self.rate_limit)
+                self.bucket_updated = now
+                if self.bucket < 1:
+                    retry_after = max(1, round((1 - self.bucket) / self.rate_limit))
+                    return 429, {'Retry-After': str(retry_after)}, _error('Rate limit exceeded')
+                self.bucket -= 1
+
+            if token != self.token:
+                return 401, {}, _error('User Not Authenticated')
+
+            self.accepted_since_rotation += 1
+            if self.expire_every and self.accepted_since_rotation >= self.expire_every:
+                # This request still succeeds; the next one with this token won't
+                self._rotate()
+        return None
+
+    def delay(self):
+        seconds = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def create(self, table, fields):
+        with self.lock:
+            number = f'DSRT{self.next_number:07d}'
+            self.next_number += 1
+            record = dict(fields)
+            now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+            record.update({
+                'number': number,
+                'sys_id': uuid.uuid4().hex,
+                'sys_created_on': now,
+                'sys_updated_on': now,
+            })
+            self.tables.setdefault(table, {})[record['sys_id']] = record
+            self.stats['records_created'] += 1
+        return record
+
+    def update(self, table, sys_id, fields):
+        with self.lock:
+            record = self.tables.get(table, {}).get(sys_id)
+            if record is None:
+                return None
+            record.update(fields)
+            record['sys_updated_on'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+            return dict(record)
+
+    def get(self, table, sys_id):
+        with self.lock:
+            record = self.tables.get(table, {}).get(sys_id)
+            return dict(record) if record else None
+
+    def list(self, table, limit, offset, query=None):
+        with self.lock:
+            records = list(self.tables.get(table, {}).values())
+        records = _apply_query(records, query)
+        return [dict(record) for record in records[offset:offset + limit]]
+
+
+QUERY_OPERATORS = (
+    ('>=', lambda value, operand: value >= operand),
+    ('<=', lambda value, operand: value <= operand),
+    ('>', lambda value, operand: value > operand),
+    ('<', lambda value, operand: value < operand),
+    ('=', lambda value, operand: value == operand),
+    ('LIKE', lambda value, operand: operand in value),
+    ('IN', lambda value, operand: value in operand.split(',')),
+)
+
+
+def _apply_query(records, query):
+    """Filter and order records by a (simple) encoded query"""
+    if not query:
+        return records
+
+    filters = []
+    order = []
+    for term in query.split('^'):
+        if term.startswith('ORDERBYDESC'):
+            order.append((term[len('ORDERBYDESC'):], True))
+            continue
+        if term.startswith('ORDERBY'):
+            order.append((term[len('ORDERBY'):], False))
+            continue
+        alternative = term.startswith('OR') and bool(filters)
+        if alternative:
+            term = term[len('OR'):]
+        # Earliest operator in the term wins (so 'a>=b' is not read as 'a>' '=b')
+        matches = [(term.find(op), -len(op), op, test) for op, test in QUERY_OPERATORS if op in term]
+        if matches:
+            position, _, op, test = min(matches)
+            condition = (term[:position], term[position + len(op):], test)
+            if alternative:
+                filters[-1].append(condition)
+            else:
+                filters.append([condition])
+
+    records = [
+        record for record in records
+        if all(any(test(str(record.get(field, '')), operand) for field, operand, test in group)
+               for group in filters)
+    ]
+    for field, descending in reversed(order):
+        records.sort(key=lambda record: str(record.get(field, '')), reverse=descending)
+    return records
+
+
+def _select(record, fields):
+    if not fields:
+        return record
+    return {name: record.get(name, '') for name in fields.split(',')}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real instance
+    # Send headers and body in one segment - otherwise Nagle plus delayed ACKs
+    # add ~40 ms to every response
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            data = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(data)
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.state.lock:
+            self.state.stats[f'status_{status}'] += 1
+
+    def _handle(self, method):
+        body = self._read_body() if method in ('POST', 'PATCH', 'PUT') else b''
+        self.state.delay()
+
+        rejected = self.state.admit(self.headers.get('X-UserToken'))
+        if rejected:
+            status, headers, payload = rejected
+            self._send(status, payload, headers)
+            return
+
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, payload = self.dispatch(method, url.path, query, body)
+        self._send(status, payload)
+
+    def dispatch(self, method, path, query, body):
+        """Route one (already admitted) request; returns (status, payload)"""
+        if path == BATCH_PATH and method == 'POST':
+            return self._batch(json.loads(body or b'{}'))
+
+        if path == ATTACHMENT_PATH and method == 'POST':
+            return 201, {'result': {'sys_id': uuid.uuid4().hex, 'size_bytes': str(len(body)),
+                                    'file_name': query.get('file_name')}}
+
+        if not path.startswith(TABLE_PREFIX):
+            return 400, _error(f'Unsupported path: {path}')
+
+        parts = path[len(TABLE_PREFIX):].strip('/').split('/')
+        table = parts[0]
+        sys_id = parts[1] if len(parts) > 1 else None
+        fields = query.get('sysparm_fields')
+
+        if method == 'POST' and sys_id is None:
+            record = self.state.create(table, json.loads(body or b'{}'))
+            return 201, {'result': _select(record, fields)}
+
+        if method == 'GET' and sys_id is None:
+            limit = int(query.get('sysparm_limit') or 10000)
+            offset = int(query.get('sysparm_offset') or 0)
+            records = self.state.list(table, limit, offset, query.get('sysparm_query'))
+            return 200, {'result': [_select(r, fields) for r in records]}
+
+        if method == 'GET':
+            record = self.state.get(table, sys_id)
+        elif method in ('PATCH', 'PUT'):
+            record = self.state.update(table, sys_id, json.loads(body or b'{}'))
+        else:
+            return 405, _error(f'Method not allowed: {method}')
+
+        if record is None:
+            return 404, _error('No Record found')
+        return 200, {'result': _select(record, fields)}
+
+    def _batch(self, batch):
+        serviced = []
+        for item in batch.get('rest_requests', []):
+            url = urlparse(item.get('url', ''))
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            item_body = base64.b64decode(item.get('body') or b'')
+            status, payload = self.dispatch(item.get('method', 'GET'), url.path, query, item_body)
+            serviced.append({
+                'id': item.get('id'),
+                'status_code': status,
+                'status_text': 'OK' if status < 400 else 'Error',
+                'headers': [{'name': 'Content-Type', 'value': 'application/json'}],
+                'body': base64.b64encode(json.dumps(payload).encode('utf-8')).decode('ascii'),
+                'execution_time': 0,
+            })
+        return 200, {
+            'batch_request_id': batch.get('batch_request_id'),
+            'serviced_requests': serviced,
+            'unserviced_requests': [],
+        }
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class StubServer:
+    """
+    Run the stand-in on a background thread.
+
+        with StubServer(latency_ms=50) as stub:
+            stub.url, stub.state.token
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = StubState(**options)
+        self._thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ServiceNow REST API stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Random extra latency (0..N ms)")
+    parser.add_argument('--expire-every', type=int, default=0,
+                        help="Rotate the token after N accepted requests (0 = never)")
+    parser.add_argument('--rate-limit', type=float, default=0, help="Requests per second before 429 (0 = off)")
+    parser.add_argument('--credentials-file', help="Where to write the current token (CREDENTIALS_FILE format)")
+    args = parser.parse_args()
+
+    server = StubServer(
+        args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, expire_every=args.expire_every,
+        rate_limit=args.rate_limit, credentials_file=args.credentials_file
+    )
+    print(f"Serving on {server.url} (X-UserToken: {server.state.token})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(dict(server.state.stats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+End-to-End Submission Benchmark
+
+Replays feedback records against the local ServiceNow stand-in
+(stub_server.py) and reports latency percentiles and throughput per
+submission path:
+
+    request  ServiceNowSession.request() POSTs of prebuilt payloads
+    create   create_feedback_sbo() in-process with one shared session
+    serve    the MCP server path - one warm ``submit_feedback.py --serve``
+             worker fed JSON lines
+    spawn    one ``submit_feedback.py`` process per submission (the old MCP
+             path; bounded by --spawn-count since it is slow)
+    batch    submit_batch() through /api/now/v1/batch (throughput only)
+
+Everything runs against a temporary HOME, so the real credentials, outbox and
+duplicate index are never touched. The report is JSON on stdout.
+
+Usage:
+    python3 benchmarks/submit_latency.py [--records feedback.jsonl] [--count 200]
+        [--concurrency 4] [--latency-ms 20] [--expire-every 100] [--rate-limit 0]
+        [--scenarios request,create,serve,spawn,batch] [--max-p95-ms N]
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from stub_server import StubServer
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+SUBMIT_SCRIPT = SRC_DIR / 'submit_feedback.py'
+
+SCENARIOS = ['request', 'create', 'serve', 'spawn', 'batch']
+FEEDBACK_TYPES = ['bug', 'enhancement', 'new_skill']
+SKILLS = ['create-sbo-request', 'dashboard-lookup', 'incident-triage', 'log-search']
+
+
+def synthetic_records(count, context_bytes):
+    """Distinct feedback records with ``context_bytes`` of conversation context"""
+    line = "user: the lookup returned an error, assistant: retrying with a narrower query\n"
+    context = (line * (context_bytes // len(line) + 1))[:context_bytes]
+    for i in range(count):
+        yield {
+            'id': i,
+            'feedback_type': FEEDBACK_TYPES[i % len(FEEDBACK_TYPES)],
+            'skill_name': SKILLS[i % len(SKILLS)],
+            'message': f"Benchmark report {i}: step {i * 7 % 13} of run {i // 13} returned "
+                       f"status {400 + i % 100} for query batch {i * 31 % 97}",
+            'conversation_context': context,
+        }
+
+
+def load_records(path, count):
+    """Records from a JSONL file (batch input format), cycled to ``count``"""
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"No records in {path}")
+
+    for i, record in zip(range(count), itertools.cycle(records)):
+        yield dict(record, id=i)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, outcomes, wall_s, stats):
+    """Scenario report: counts, latency percentiles (ms) and records/sec"""
+    ordered = sorted(latencies)
+    latency = None
+    if ordered:
+        latency = {
+            'p50': round(percentile(ordered, 0.50) * 1000, 2),
+            'p95': round(percentile(ordered, 0.95) * 1000, 2),
+            'p99': round(percentile(ordered, 0.99) * 1000, 2),
+            'mean': round(sum(ordered) / len(ordered) * 1000, 2),
+            'max': round(ordered[-1] * 1000, 2),
+        }
+    count = sum(outcomes.values())
+    return {
+        'count': count,
+        'ok': outcomes['ok'],
+        'queued': outcomes['queued'],
+        'errors': outcomes['error'],
+        'wall_s': round(wall_s, 3),
+        'records_per_sec': round(outcomes['ok'] / wall_s, 2) if wall_s else None,
+        'latency_ms': latency,
+        'server': dict(stats),
+    }
+
+
+def _timed_pool(records, concurrency, submit):
+    """Run ``submit(record) -> outcome`` concurrently, timing each call"""
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def run(record):
+        started = time.perf_counter()
+        try:
+            outcome = submit(record)
+        except Exception:
+            outcome = 'error'
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, records))
+    return latencies, outcomes, time.perf_counter() - started
+
+
+def run_request(records, args):
+    import submit_feedback as sf
+    from utils.session_manager import ServiceNowSession
+
+    url = f"{sf.INSTANCE}/api/now/table/{sf.TABLE}"
+    payloads = [
+        sf.build_payload(r['feedback_type'], r['message'], r.get('skill_name'),
+                         r.get('conversation_context'))[1]
+        for r in records
+    ]
+
+    def submit(payload):
+        response = session.post(url, json=payload)
+        return 'ok' if response.status_code == 201 else 'error'
+
+    with ServiceNowSession() as session:
+        return _timed_pool(payloads, args.concurrency, submit)
+
+
+def run_create(records, args):
+    import submit_feedback as sf
+    from utils.session_manager import ServiceNowSession
+
+    def submit(record):
+        result = sf.create_feedback_sbo(
+            record['feedback_type'], record['message'], record.get('skill_name'),
+            record.get('conversation_context'), session=session, dedup=args.dedup
+        )
+        if result.get('queued'):
+            return 'queued'
+        return 'ok' if result.get('number') else 'error'
+
+    with ServiceNowSession() as session:
+        return _timed_pool(records, args.concurrency, submit)
+
+
+def run_serve(records, args):
+    """Feed a warm worker like mcp-server/index.js does, ``concurrency`` in flight"""
+    worker = subprocess.Popen(
+        [sys.executable, str(SUBMIT_SCRIPT), '--serve', '--workers', str(args.concurrency)],
+        cwd=SRC_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True, bufsize=1
+    )
+    in_flight = threading.BoundedSemaphore(args.concurrency)
+    sent_at = {}
+    latencies = []
+    outcomes = Counter()
+
+    def read_results():
+        for line in worker.stdout:
+            result = json.loads(line)
+            latencies.append(time.perf_counter() - sent_at.pop(result['id']))
+            if result.get('queued'):
+                outcomes['queued'] += 1
+            else:
+                outcomes['ok' if result.get('ok') and result.get('number') else 'error'] += 1
+            in_flight.release()
+
+    reader = threading.Thread(target=read_results, daemon=True)
+    reader.start()
+
+    # Wall time includes worker startup, latencies do not
+    started = time.perf_counter()
+    for record in records:
+        request = dict(record, op='submit', allow_duplicate=not args.dedup)
+        in_flight.acquire()
+        sent_at[record['id']] = time.perf_counter()
+        worker.stdin.write(json.dumps(request) + '\n')
+        worker.stdin.flush()
+
+    for _ in range(args.concurrency):
+        in_flight.acquire()
+    wall_s = time.perf_counter() - started
+
+    worker.stdin.close()
+    worker.wait()
+    return latencies, outcomes, wall_s
+
+
+def run_spawn(records, args):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+
+    def submit(record):
+        command = [sys.executable, str(SUBMIT_SCRIPT),
+                   '--feedback_type', record['feedback_type'],
+                   '--message', record['message']]
+        if record.get('skill_name'):
+            command += ['--skill_name', record['skill_name']]
+        if record.get('conversation_context'):
+            command += ['--conversation_context', record['conversation_context']]
+        if not args.dedup:
+            command.append('--allow_duplicate')
+        result = subprocess.run(command, cwd=SRC_DIR, env=env, capture_output=True, text=True)
+        return 'ok' if result.returncode == 0 else 'error'
+
+    return _timed_pool(records[:args.spawn_count], args.concurrency, submit)
+
+
+def run_batch(records, args):
+    """submit_batch() over a JSONL file; only throughput is meaningful here"""
+    import submit_feedback as sf
+    from utils.session_manager import ServiceNowSession
+
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+    out = io.StringIO()
+    try:
+        with ServiceNowSession() as session:
+            started = time.perf_counter()
+            sf.submit_batch(f.name, batch_size=args.batch_size, workers=args.concurrency,
+                            session=session, out=out)
+            wall_s = time.perf_counter() - started
+    finally:
+        os.unlink(f.name)
+
+    outcomes = Counter()
+    for line in out.getvalue().splitlines():
+        outcomes['error' if json.loads(line)['error'] else 'ok'] += 1
+    return [], outcomes, wall_s
+
+
+RUNNERS = {
+    'request': run_request,
+    'create': run_create,
+    'serve': run_serve,
+    'spawn': run_spawn,
+    'batch': run_batch,
+}
+
+
+def run(args):
+    """Start the stub, point the tools at it and run every requested scenario"""
+    home = tempfile.mkdtemp(prefix='snow-bench-')
+    credentials_file = os.path.join(home, '.servicenow_surf_session.json')
+
+    stub = StubServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, expire_every=args.expire_every,
+        rate_limit=args.rate_limit, credentials_file=credentials_file
+    ).start()
+
+    # Must be set before the tools are imported (paths and instance are module constants)
+    os.environ['HOME'] = home
+    os.environ['SNOW_INSTANCE'] = stub.url
+    for name in ('SNOW_X_USER_TOKEN', 'SNOW_COOKIE_GLIDE', 'SNOW_COOKIE_SESSION'):
+        os.environ.pop(name, None)
+    sys.path.insert(0, str(SRC_DIR))
+
+    if args.records:
+        records = list(load_records(args.records, args.count))
+    else:
+        records = list(synthetic_records(args.count, args.context_bytes))
+
+    report = {
+        'config': {
+            'count': len(records),
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'expire_every': args.expire_every,
+            'rate_limit': args.rate_limit,
+            'dedup': args.dedup,
+            'records': args.records,
+        },
+        'scenarios': {},
+    }
+
+    try:
+        for name in args.scenarios:
+            before = Counter(stub.state.stats)
+            # The tools print progress to stdout, which is reserved for the report
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                latencies, outcomes, wall_s = RUNNERS[name](records, args)
+            stats = Counter(stub.state.stats)
+            stats.subtract(before)
+            report['scenarios'][name] = summarize(latencies, outcomes, wall_s, +stats)
+    finally:
+        stub.stop()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feedback submission against a local stub instance")
+    parser.add_argument('--records', help="JSONL feedback records to replay (default: synthetic)")
+    parser.add_argument('--count', type=int, default=200, help="Submissions per scenario (default: 200)")
+    parser.add_argument('--context-bytes', type=int, default=2048,
+                        help="Conversation context size for synthetic records (default: 2048)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Submissions in flight (default: 4)")
+    parser.add_argument('--scenarios', default='request,create,serve,spawn,batch',
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument('--spawn-count', type=int, default=20,
+                        help="Submissions for the process-per-call scenario (default: 20)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Records per Batch API call (default: 50)")
+    parser.add_argument('--dedup', action='store_true', help="Keep duplicate detection on")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Stub response latency (default: 20)")
+    parser.add_argument('--jitter-ms', type=float, default=5, help="Random extra stub latency (default: 5)")
+    parser.add_argument('--expire-every', type=int, default=0,
+                        help="Expire the session after N accepted requests (0 = never)")
+    parser.add_argument('--rate-limit', type=float, default=0, help="Stub requests/sec before 429 (0 = off)")
+    parser.add_argument('--max-p95-ms', type=float, help="Exit 1 if any scenario's p95 latency exceeds this")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    args.concurrency = max(1, args.concurrency)
+
+    report = run(args)
+
+    ok = True
+    if args.max_p95_ms is not None:
+        for stats in report['scenarios'].values():
+            if stats['latency_ms'] and stats['latency_ms']['p95'] > args.max_p95_ms:
+                ok = False
+    report['ok'] = ok
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
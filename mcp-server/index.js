@@ -12,6 +12,7 @@
  *   - Request new skills
  *   - Auto-detect skill name from conversation
  *   - Capture conversation context automatically
+ *   - Check the status of submitted feedback
  */
 
 import { Server } from "@modelcontextprotocol/sdk/server/index.js";
@@ -22,6 +23,7 @@ import {
 } from "@modelcontextprotocol/sdk/types.js";
 import { z } from "zod";
 import { spawn } from "child_process";
+import readline from "readline";
 import path from "path";
 import { fileURLToPath } from "url";
 
@@ -36,68 +38,140 @@ const SubmitFeedbackSchema = z.object({
   conversation_context: z.string().optional().describe("Relevant conversation excerpt"),
 });
 
+const FeedbackStatusSchema = z.object({
+  numbers: z.array(z.string()).min(1).describe("SBO numbers to look up"),
+});
+
+// Long-lived Python worker (submit_feedback.py --serve), started lazily
+const scriptPath = path.resolve(__dirname, '../src/submit_feedback.py');
+let worker = null;
+let nextRequestId = 1;
+const pending = new Map();
+
 /**
- * Submit feedback by calling the Python script
+ * Return the running Python worker, spawning it on first use.
+ *
+ * The worker keeps one authenticated ServiceNow session warm and answers
+ * JSON-lines requests on stdin with JSON-lines results on stdout, so each
+ * submission costs a single HTTP round-trip instead of a process start.
  */
-async function submitFeedback(params) {
-  // Build Python script path
-  const scriptPath = path.resolve(__dirname, '../src/submit_feedback.py');
-
-  // Build command arguments
-  const args = [
-    scriptPath,
-    '--feedback_type', params.feedback_type,
-    '--message', params.message,
-  ];
-
-  if (params.skill_name) {
-    args.push('--skill_name', params.skill_name);
+function getWorker() {
+  if (worker) {
+    return worker;
   }
 
-  if (params.conversation_context) {
-    args.push('--conversation_context', params.conversation_context);
-  }
+  const python = spawn('python3', [scriptPath, '--serve']);
+  let stderr = '';
+
+  const lines = readline.createInterface({ input: python.stdout });
+  lines.on('line', (line) => {
+    let result;
+    try {
+      result = JSON.parse(line);
+    } catch (error) {
+      return;
+    }
+
+    const request = pending.get(result.id);
+    if (!request) {
+      return;
+    }
+    pending.delete(result.id);
+
+    if (result.ok) {
+      request.resolve(result);
+    } else {
+      request.reject(new Error(result.error));
+    }
+  });
+
+  python.stderr.on('data', (data) => {
+    // Keep only the tail - progress output is for diagnostics only
+    stderr = (stderr + data.toString()).slice(-4096);
+  });
+
+  const fail = (reason) => {
+    if (worker === python) {
+      worker = null;
+    }
+    for (const [id, request] of pending) {
+      request.reject(new Error(`Feedback worker ${reason}: ${stderr}`));
+      pending.delete(id);
+    }
+  };
+
+  python.stdin.on('error', () => {
+    // Surfaced through the 'close' handler below
+  });
+  python.on('error', (error) => fail(`failed to start (${error.message})`));
+  python.on('close', (code) => fail(`exited with code ${code}`));
+
+  worker = python;
+  return worker;
+}
+
+/**
+ * Send one request line to the Python worker and wait for its result
+ */
+function callWorker(params) {
+  const python = getWorker();
+  const id = nextRequestId++;
 
-  // Execute Python script
   return new Promise((resolve, reject) => {
-    const python = spawn('python3', args);
-
-    let stdout = '';
-    let stderr = '';
-
-    python.stdout.on('data', (data) => {
-      stdout += data.toString();
-    });
-
-    python.stderr.on('data', (data) => {
-      stderr += data.toString();
-    });
-
-    python.on('close', (code) => {
-      if (code !== 0) {
-        const errorOutput = stderr || stdout;
-        reject(new Error(`Failed to submit feedback: ${errorOutput}`));
-        return;
-      }
-
-      // Parse output for SBO number
-      const numberMatch = stdout.match(/successfully: (DSRT\d+)/);
-      const linkMatch = stdout.match(/Link: (https:\/\/[^\s]+)/);
-
-      const number = numberMatch ? numberMatch[1] : 'Unknown';
-      const link = linkMatch ? linkMatch[1] : '';
-
-      resolve({
-        success: true,
-        number: number,
-        link: link,
-        message: `Feedback submitted successfully: ${number}\n\n${link}`,
-        raw_output: stdout,
-      });
-    });
+    pending.set(id, { resolve, reject });
+    python.stdin.write(JSON.stringify({ id, ...params }) + '\n');
   });
 }
 
+/**
+ * Submit feedback through the Python worker
+ */
+async function submitFeedback(params) {
+  const result = await callWorker(params);
+
+  if (result.queued) {
+    // ServiceNow was unreachable - the worker saved it to the local outbox
+    return {
+      success: true,
+      number: null,
+      link: '',
+      message: `Feedback saved locally (ref: ${result.queued}) and will be submitted to ServiceNow automatically.`,
+    };
+  }
+
+  if (result.duplicate_of) {
+    const action = result.appended ? 'Your report was added to it.' : 'No new SBO was created.';
+    return {
+      success: true,
+      number: result.number,
+      link: result.link,
+      message: `Similar feedback already exists: ${result.number}. ${action}\n\n${result.link}`,
+    };
+  }
+
+  return {
+    success: true,
+    number: result.number,
+    link: result.link,
+    message: `Feedback submitted successfully: ${result.number}\n\n${result.link}`,
+  };
+}
+
+/**
+ * Look up the current state of feedback SBOs through the Python worker
+ */
+async function feedbackStatus(params) {
+  const result = await callWorker({ op: 'status', numbers: params.numbers });
+
+  return result.records.map((record) => {
+    if (record.error) {
+      return `${record.number}: ${record.error}`;
+    }
+    const assigned = record.assigned_to ? `\n  Assigned to: ${record.assigned_to}` : '';
+    return `${record.number}: ${record.state || 'unknown'} (updated ${record.sys_updated_on} UTC)\n  ${record.short_description || ''}${assigned}\n  ${record.link}`;
+  }).join('\n\n');
+}
+
 // Create MCP server instance
 const server = new Server(
   {
@@ -158,6 +232,25 @@ Types of feedback:
           required: ["feedback_type", "message"],
         },
       },
+      {
+        name: "check_feedback_status",
+        description: `Check the current state of previously submitted skill feedback.
+
+Use this tool when the user asks what happened to feedback they reported
+(e.g. "is DSRT0012345 fixed yet?"). Returns state, assignee and last update
+for each SBO number.`,
+        inputSchema: {
+          type: "object",
+          properties: {
+            numbers: {
+              type: "array",
+              items: { type: "string" },
+              description: "SBO numbers returned when the feedback was submitted",
+            },
+          },
+          required: ["numbers"],
+        },
+      },
     ],
   };
 });
@@ -187,6 +280,25 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
         isError: true,
       };
     }
+  } else if (request.params.name === "check_feedback_status") {
+    try {
+      const params = FeedbackStatusSchema.parse(request.params.arguments);
+      const text = await feedbackStatus(params);
+
+      return {
+        content: [{ type: "text", text }],
+      };
+    } catch (error) {
+      return {
+        content: [
+          {
+            type: "text",
+            text: `✗ Error checking feedback status: ${error.message}`,
+          },
+        ],
+        isError: true,
+      };
+    }
   } else {
     throw new Error(`Unknown tool: ${request.params.name}`);
   }
@@ -199,6 +311,12 @@ async function main() {
   console.error("SAAI Skill Feedback MCP Server running on stdio");
 }
 
+process.on('exit', () => {
+  if (worker) {
+    worker.kill();
+  }
+});
+
 main().catch((error) => {
   console.error("Server error:", error);
   process.exit(1);
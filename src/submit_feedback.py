@@ -7,26 +7,83 @@ Works with ANY MCP skill - auto-detects which skill from conversation.
 
 Usage:
     python3 submit_feedback.py --feedback_type bug --message "Dashboard lookup failed" --skill_name create-sbo-request
+
+Other instances (configured in ~/.servicenow_surf_instances.json, see utils.instances):
+    python3 submit_feedback.py ... --instance dev
+    python3 submit_feedback.py ... --mirror [NAME ...]   # also file it on the mirror instances
+
+Worker mode (used by the MCP server - one warm process, JSON lines on stdin/stdout):
+    python3 submit_feedback.py --serve [--workers 4]
 """
 
 import argparse
 import json
 import os
 import sys
+import threading
+import time
+import uuid
 from pathlib import Path
 
+_IMPORT_STARTED = time.perf_counter()  # For the 'startup' timing span
+
 # Try to import session manager (if available)
 try:
     from utils.session_manager import ServiceNowSession, AuthenticationError
+    from utils.circuit_breaker import CircuitOpenError
+    from utils.instances import get_instance, get_session, mirror_instances, close_sessions
     HAS_SESSION_MANAGER = True
 except ImportError:
     HAS_SESSION_MANAGER = False
     print("Warning: session_manager not found - authentication may fail", file=sys.stderr)
 
-# ServiceNow instance configuration
-INSTANCE = "https://surf.service-now.com"
+from utils.context_reader import read_context, truncate_context, DEFAULT_CONTEXT_MAX_BYTES
+from utils import timing
+
+# ServiceNow instance configuration (basic-auth fallback and default links;
+# sessions carry their own instance - see utils.instances)
+INSTANCE = os.environ.get('SNOW_INSTANCE', "https://surf.service-now.com").rstrip('/')
 TABLE = "x_snc_security_d_0_dsrtable"
 
+# (connect, read) timeout for the basic-auth fallback; sessions use their own
+FALLBACK_TIMEOUT = (5, 30)
+
+# Worker mode defaults
+DEFAULT_WORKERS = 4
+
+# Batch mode defaults
+BATCH_API_PATH = "/api/now/v1/batch"
+DEFAULT_BATCH_SIZE = 50
+
+# Outbox flush interval for the in-process flusher (worker mode)
+OUTBOX_POLL_SECONDS = 60
+
+# Page size when seeding the duplicate index from ServiceNow
+DEDUP_SEED_PAGE_SIZE = 500
+SIGNATURE = "Submitted via saai-skill-feedback"
+
+# Status lookups: fields fetched, how long a cached status is served without
+# asking ServiceNow, and how many numbers go into one query
+STATUS_FIELDS = ['number', 'sys_id', 'state', 'short_description', 'assigned_to', 'sys_updated_on']
+STATUS_CACHE_TTL_SECONDS = 60
+STATUS_QUERY_CHUNK = 100
+
+# Payload fields sent as sys_ids / stored choice values instead of display
+# values (resolved once and cached - see utils/reference_resolver.py)
+REFERENCE_FIELDS = ('assigned_to', 'data_science_request', 'work_activity')
+KNOWN_REFERENCES = {'assigned_to': ('sys_user', 'name')}
+
+# Bulk sync into the local feedback store (utils/feedback_store.py)
+FEEDBACK_SYNC_PAGE_SIZE = 1000
+FEEDBACK_SYNC_FIELDS = ['number', 'sys_id', 'state', 'short_description', 'description',
+                        'assigned_to.name', 'sys_created_on', 'sys_updated_on', 'closed_at']
+
+# Context larger than this is attached to the record (gzip) instead of being
+# inlined in the description, which keeps only a short summary
+ATTACHMENT_THRESHOLD_BYTES = 32 * 1024
+CONTEXT_SUMMARY_BYTES = 4 * 1024
+CONTEXT_ATTACHMENT_NAME = "conversation_context.txt.gz"
+
 # Feedback type emoji mapping
 EMOJI_MAP = {
     'bug': '🐛',
@@ -35,8 +92,19 @@ EMOJI_MAP = {
 }
 
 
-def build_description(feedback_type, message, skill_name, conversation_context):
-    """Build comprehensive feedback description."""
+class FeedbackSubmissionError(Exception):
+    """Raised when a feedback SBO could not be created"""
+    pass
+
+
+def build_description(feedback_type, message, skill_name, conversation_context, reference=None):
+    """
+    Build comprehensive feedback description.
+
+    ``reference`` is the outbox idempotency key; it is stamped into the
+    signature so a retried submission can find a record that was already
+    created.
+    """
     parts = []
 
     # Feedback header
@@ -58,28 +126,69 @@ def build_description(feedback_type, message, skill_name, conversation_context):
 
     # Signature
     parts.append("\n---")
-    parts.append("*Submitted via saai-skill-feedback*")
+    if reference:
+        parts.append(f"*{SIGNATURE} (ref: {reference})*")
+    else:
+        parts.append(f"*{SIGNATURE}*")
 
     return '\n'.join(parts)
 
 
-def create_feedback_sbo(feedback_type, message, skill_name=None, conversation_context=None):
-    """Create a feedback SBO in ServiceNow."""
+def parse_description(description):
+    """
+    Recover (message, skill_name) from a description built by build_description.
+
+    Returns:
+        (message, skill_name) - skill_name is None if the record has none
+    """
+    description = description or ''
+    message = description
+    skill_name = None
+
+    marker = "**User Message:**\n"
+    start = description.find(marker)
+    if start != -1:
+        start += len(marker)
+        end = description.find("\n**", start)
+        message = description[start:end if end != -1 else None].strip()
 
-    # Build description
-    description = build_description(feedback_type, message, skill_name, conversation_context)
+    skill_marker = "**Affected Skill:** "
+    start = description.find(skill_marker)
+    if start != -1:
+        start += len(skill_marker)
+        end = description.find("\n", start)
+        skill_name = description[start:end if end != -1 else None].strip() or None
 
-    # Build title
+    return message, skill_name
+
+
+def parse_feedback_type(description):
+    """Recover the feedback type from the header build_description writes (None if absent)."""
+    description = description or ''
+    for feedback_type, emoji in EMOJI_MAP.items():
+        type_label = feedback_type.replace('_', ' ').title()
+        if description.startswith(f"**{emoji} {type_label}**"):
+            return feedback_type
+    return None
+
+
+def build_title(feedback_type, skill_name):
+    """Build the SBO short description."""
     emoji = EMOJI_MAP.get(feedback_type, '📋')
     type_label = feedback_type.replace('_', ' ').title()
 
     if feedback_type == 'new_skill':
-        title = f"{emoji} New Skill Request"
-    else:
-        skill_display = skill_name if skill_name else 'MCP Skill'
-        title = f"{emoji} {type_label}: {skill_display}"
+        return f"{emoji} New Skill Request"
+
+    skill_display = skill_name if skill_name else 'MCP Skill'
+    return f"{emoji} {type_label}: {skill_display}"
+
+
+def build_payload(feedback_type, message, skill_name=None, conversation_context=None, reference=None):
+    """Build the (title, payload) pair for a feedback SBO insert."""
+    title = build_title(feedback_type, skill_name)
+    description = build_description(feedback_type, message, skill_name, conversation_context, reference)
 
-    # Prepare payload
     payload = {
         "short_description": title,
         "description": description,
@@ -89,26 +198,691 @@ def create_feedback_sbo(feedback_type, message, skill_name=None, conversation_co
         "state": "opened",
         "assigned_to": "David Rider",  # Skill maintainer
     }
+    return title, payload
 
-    # Create the SBO
-    url = f"{INSTANCE}/api/now/table/{TABLE}"
 
-    print(f"\nSubmitting feedback: {title}")
+def build_link(sys_id, instance=None):
+    """Build the classic UI link (datascience view) for a feedback SBO on ``instance`` (default: the default instance)."""
+    if instance is None and HAS_SESSION_MANAGER:
+        instance = get_instance()
+    base, table = (instance.url, instance.table) if instance is not None else (INSTANCE, TABLE)
+    return f"{base}/now/nav/ui/classic/params/target/{table}.do%3Fsys_id%3D{sys_id}%26sysparm_view%3Ddatascience%26sysparm_record_target%3D{table}%26sysparm_record_row%3D1%26sysparm_record_rows%3D1881%26sysparm_record_list%3Drequest_type%253DSecurity%2BData%2BAnalytics%255EORDERBYDESCnumber%26sysparm_view%3Ddatascience"
+
+
+def queue_feedback(feedback_type, message, skill_name=None, conversation_context=None, instance=None,
+                   key=None):
+    """
+    Durably write a feedback record to the local outbox and return its key.
+
+    ``key`` is the reference already stamped into a submission attempt, so
+    the flusher finds the record if that attempt did reach ServiceNow.
+    """
+    from utils.outbox import Outbox
+
+    record = {
+        'feedback_type': feedback_type,
+        'message': message,
+        'skill_name': skill_name,
+        'conversation_context': conversation_context,
+    }
+    if instance is not None and not instance.is_default:
+        record['instance'] = instance.name
+    return Outbox().enqueue(record, key=key)
+
+
+def _queued_result(key):
+    """Result returned for feedback that was written to the outbox."""
+    print(f"📥 Feedback saved to local outbox (ref: {key}) - it will be submitted in the background")
+    start_background_flush()
+    return {
+        'number': None,
+        'sys_id': None,
+        'link': None,
+        'queued': key
+    }
+
+
+# Opened lazily and kept for the life of the process (worker mode reuses it)
+_dedup_index = None
+_dedup_index_lock = threading.Lock()
+
+
+def get_dedup_index():
+    """Return the process-wide DuplicateIndex, opening it on first use."""
+    global _dedup_index
+
+    with _dedup_index_lock:
+        if _dedup_index is None:
+            from utils.dedup_index import DuplicateIndex
+            _dedup_index = DuplicateIndex()
+        return _dedup_index
+
+
+def find_duplicate(skill_name, message):
+    """
+    Look up a likely duplicate of this feedback in the local index.
+
+    Never raises - a broken index must not block a submission.
+
+    Returns:
+        {'number', 'sys_id', 'distance'} dict or None
+    """
+    try:
+        return get_dedup_index().find(skill_name, message)
+    except Exception as e:
+        print(f"⚠️  Duplicate check skipped: {e}")
+        return None
+
+
+def _index_feedback(number, sys_id, skill_name, message, state='opened'):
+    """Add a newly created record to the local duplicate index."""
+    try:
+        get_dedup_index().add(number, sys_id, skill_name, message, state)
+    except Exception as e:
+        print(f"⚠️  Could not index feedback for duplicate detection: {e}")
+
+
+def _update_dedup_states(states):
+    """Refresh the duplicate index's state for (number, state) pairs; never raises."""
+    try:
+        get_dedup_index().set_states(states)
+    except Exception as e:
+        print(f"⚠️  Could not update duplicate index states: {e}")
+
+
+# Skill registry matcher, compiled on first use and kept for the process
+_skill_detector = None
+_skill_detector_lock = threading.Lock()
+
+
+def get_skill_detector():
+    """Return the process-wide SkillDetector, loading the skill registry on first use."""
+    global _skill_detector
+
+    with _skill_detector_lock:
+        if _skill_detector is None:
+            from utils.skill_detector import SkillDetector, load_registry
+            _skill_detector = SkillDetector(load_registry())
+        return _skill_detector
+
+
+def resolve_skill_name(feedback_type, message, skill_name=None, conversation_context=None):
+    """
+    The skill the feedback is about: ``skill_name`` if given, otherwise the
+    installed skill most mentioned in the message and context.
+
+    Never raises - without a match the SBO is filed under the generic title.
+
+    Returns:
+        Skill name or None (always None for new_skill requests)
+    """
+    if skill_name or feedback_type == 'new_skill':
+        return skill_name
+    try:
+        detected = get_skill_detector().detect(message, conversation_context)
+    except Exception as e:
+        print(f"⚠️  Skill detection skipped: {e}")
+        return None
+    if detected:
+        print(f"🔎 Detected skill: {detected}")
+    return detected
+
+
+# Reference resolvers, one per instance, created on first use and kept for the process
+_reference_resolvers = {}
+_reference_resolver_lock = threading.Lock()
+
+
+def get_reference_resolver(instance=None):
+    """Return the process-wide ReferenceResolver for an instance's feedback table."""
+    instance = instance or get_instance()
+    with _reference_resolver_lock:
+        resolver = _reference_resolvers.get(instance.name)
+        if resolver is None:
+            from utils.reference_resolver import ReferenceResolver
+            resolver = _reference_resolvers[instance.name] = ReferenceResolver(
+                instance.url, instance.table, REFERENCE_FIELDS, KNOWN_REFERENCES
+            )
+        return resolver
+
+
+def resolve_references(payload, session=None, instance=None):
+    """
+    Swap the payload's display values for sys_ids / choice values.
+
+    With a session, missing or expired mappings are refreshed first (for the
+    session's instance); without one (the async path) only the cached
+    mappings for ``instance`` are applied. Lookup
+    failures fall back to the display values, which ServiceNow resolves
+    itself - authentication and circuit errors propagate like the insert's.
+
+    Returns:
+        A resolved copy of ``payload``
+    """
+    if not HAS_SESSION_MANAGER:
+        return payload
+    try:
+        resolver = get_reference_resolver(session.instance if session is not None else instance)
+        if session is None:
+            return resolver.cached(payload)
+        resolved, unresolved = resolver.resolve(payload, session)
+    except (AuthenticationError, CircuitOpenError):
+        raise
+    except Exception as e:
+        print(f"⚠️  Reference lookup skipped: {e}")
+        return payload
+
+    for field in unresolved:
+        print(f"⚠️  No unique match for {field}={payload[field]!r} - sending the display value")
+    return resolved
+
+
+def _append_to_duplicate(session, duplicate, feedback_type, message, conversation_context):
+    """
+    Add this report to an existing SBO as an additional comment.
+
+    Returns:
+        True if the comment was added
+    """
+    comment = [f"Additional {feedback_type.replace('_', ' ')} report:", message]
+    if conversation_context:
+        comment.extend(["", "Conversation Context:", conversation_context])
+
+    response = session.table_update(session.instance.table, duplicate['sys_id'], {'comments': '\n'.join(comment)})
+    return response.status_code == 200
+
+
+def seed_dedup_index(session=None, index=None, page_size=DEDUP_SEED_PAGE_SIZE):
+    """
+    Incrementally load existing feedback records into the duplicate index.
+
+    Only records updated since the last seed (stored as a sys_updated_on
+    watermark in the index) are fetched, page by page, with the same
+    (sys_updated_on, sys_id) cursor as sync_feedback_store, so records
+    updated while the seed runs cannot shift unread ones into pages already
+    fetched. Each page is streamed and parsed record by record.
+
+    Returns:
+        Number of records indexed
+    """
+    from utils.json_stream import iter_results
+
+    index = index or get_dedup_index()
+    session = session or ServiceNowSession()
+
+    watermark = index.get_meta('sys_updated_on')
+    skip = 0  # Records at exactly ``watermark`` already read in this run
+    indexed = 0
+    while True:
+        query = f"descriptionLIKE{SIGNATURE}"
+        if watermark:
+            query += f"^sys_updated_on>={watermark}"
+        query += "^ORDERBYsys_updated_on^ORDERBYsys_id"
+
+        response = session.table_list(
+            session.instance.table, query=query, limit=page_size, offset=skip,
+            fields=('number', 'sys_id', 'state', 'description', 'sys_updated_on'), stream=True
+        )
+        if response.status_code != 200:
+            response.close()
+            raise FeedbackSubmissionError(f"Failed to read feedback records (status {response.status_code})")
+
+        rows = []
+        updated = []
+        for record in iter_results(response):
+            message, skill_name = parse_description(record.get('description'))
+            rows.append((record.get('number'), record.get('sys_id'), skill_name, message, record.get('state')))
+            updated.append(record.get('sys_updated_on'))
+        if not rows:
+            break
+        indexed += index.add_many(rows)
+
+        last = updated[-1]
+        if last == watermark:
+            skip += len(rows)
+        else:
+            watermark = last
+            skip = updated.count(last)
+        index.set_meta('sys_updated_on', watermark)
+        if len(rows) < page_size:
+            break
+
+    return indexed
+
+
+def _store_row(record):
+    """Feedback store row for one synced record"""
+    from utils.dedup_index import normalize_skill, simhash
+
+    description = record.get('description')
+    message, skill_name = parse_description(description)
+    return {
+        'sys_id': record.get('sys_id'),
+        'number': record.get('number'),
+        'feedback_type': parse_feedback_type(description),
+        'skill': normalize_skill(skill_name),
+        'state': record.get('state'),
+        'short_description': record.get('short_description'),
+        'message': message,
+        'assigned_to': record.get('assigned_to.name'),
+        'sys_created_on': record.get('sys_created_on'),
+        'sys_updated_on': record.get('sys_updated_on'),
+        'closed_at': record.get('closed_at'),
+        'fingerprint': simhash(message),
+    }
+
+
+def sync_feedback_store(session=None, store=None, page_size=FEEDBACK_SYNC_PAGE_SIZE, full=False):
+    """
+    Incrementally copy feedback records into the local feedback store.
+
+    Pages are ordered by (sys_updated_on, sys_id) and each one is requested
+    from the last sys_updated_on seen, with sysparm_offset only skipping
+    the records already read that share that exact time. Records updated
+    while the sync runs therefore move ahead of the cursor (and are picked
+    up later in the same run) instead of shifting unread records into
+    pages that were already fetched. Each page is parsed as it streams in
+    and committed together with the new watermark.
+
+    Args:
+        full: Drop the local copy and fetch every record again
+
+    Returns:
+        Number of records written (re-fetched records count again)
+    """
+    from utils.feedback_store import FeedbackStore
+    from utils.json_stream import iter_results
+
+    if store is None:  # An empty store is falsy
+        store = FeedbackStore()
+    if full:
+        store.reset()
+    session = session or ServiceNowSession()
+
+    watermark = store.get_meta('sys_updated_on')
+    skip = 0  # Records at exactly ``watermark`` already read in this run
+    synced = 0
+    while True:
+        query = f"descriptionLIKE{SIGNATURE}"
+        if watermark:
+            query += f"^sys_updated_on>={watermark}"
+        query += "^ORDERBYsys_updated_on^ORDERBYsys_id"
+
+        response = session.table_list(session.instance.table, query=query, limit=page_size, offset=skip,
+                                      fields=FEEDBACK_SYNC_FIELDS, stream=True)
+        if response.status_code != 200:
+            response.close()
+            raise FeedbackSubmissionError(f"Failed to read feedback records (status {response.status_code})")
+
+        rows = [_store_row(record) for record in iter_results(response)]
+        if not rows:
+            break
+
+        last = rows[-1]['sys_updated_on']
+        if last == watermark:
+            skip += len(rows)
+        else:
+            watermark = last
+            skip = sum(1 for row in rows if row['sys_updated_on'] == last)
+
+        synced += store.upsert_many(rows, meta={'sys_updated_on': watermark})
+        _update_dedup_states((row['number'], row['state']) for row in rows)
+        print(f"  ... {synced} records (updated through {watermark} UTC)", file=sys.stderr)
+        if len(rows) < page_size:
+            break
+
+    return synced
+
+
+def normalize_numbers(numbers):
+    """Upper-case, de-duplicated SBO numbers (rejects anything that isn't one)"""
+    import re
+
+    normalized = []
+    for number in numbers:
+        number = str(number).strip().upper()
+        if not re.fullmatch(r'[A-Z]+[0-9]+', number):
+            raise ValueError(f"Invalid SBO number: {number!r}")
+        if number not in normalized:
+            normalized.append(number)
+    return normalized
+
+
+def _flatten_status(record):
+    """Flatten a sysparm_display_value=all record: display values, raw sys_id/sys_updated_on."""
+    flat = {}
+    for field, value in record.items():
+        if isinstance(value, dict):
+            raw = field in ('sys_id', 'sys_updated_on')
+            value = value.get('value' if raw else 'display_value')
+        flat[field] = value
+    return flat
+
+
+def _poll_status(session, cache, numbers, since=None):
+    """
+    Fetch status records for ``numbers`` into ``cache``.
+
+    With ``since`` (a ServiceNow UTC date-time) only records updated at or
+    after it are transferred; the rest are confirmed unchanged.
+
+    Returns:
+        Set of numbers whose records were (re)fetched
+    """
+    from utils.status_cache import server_time
+
+    fetched = set()
+    states = []
+    for start in range(0, len(numbers), STATUS_QUERY_CHUNK):
+        chunk = numbers[start:start + STATUS_QUERY_CHUNK]
+        query = "numberIN" + ",".join(chunk)
+        if since:
+            query += f"^sys_updated_on>={since}"
+
+        response = session.table_list(session.instance.table, query=query, limit=len(chunk),
+                                      fields=STATUS_FIELDS, display_value='all')
+        if response.status_code != 200:
+            raise FeedbackSubmissionError(f"Failed to read feedback status (status {response.status_code})")
+
+        checked_at = server_time(response)
+        for record in response.json().get('result', []):
+            record = _flatten_status(record)
+            cache.put(record, checked_at)
+            fetched.add(record['number'])
+            states.append((record['number'], record.get('state')))
+
+        for number in chunk:
+            if number not in fetched:
+                cache.confirm(number, checked_at)
+
+    if states:
+        _update_dedup_states(states)
+    return fetched
+
+
+def feedback_status(numbers=None, session=None, max_age=STATUS_CACHE_TTL_SECONDS, cache=None):
+    """
+    Look up the current state of feedback SBOs.
+
+    Records checked within ``max_age`` seconds are answered from the local
+    cache. Numbers seen before are polled incrementally (only records
+    updated since they were last checked are transferred); new numbers are
+    fetched in full. Only STATUS_FIELDS are requested.
+
+    Args:
+        numbers: SBO numbers (default: every number in the cache)
+        max_age: Serve cached records younger than this without a request (0 to always poll)
+
+    Returns:
+        One dict per number, in order: the STATUS_FIELDS plus 'link' and
+        'updated' (fetched by this call), or {'number', 'error'} if unknown
+
+    Raises:
+        ValueError: If a number is malformed
+        FeedbackSubmissionError: If ServiceNow could not be queried
+    """
+    from utils.status_cache import StatusCache
+
+    cache = cache or StatusCache()
+    numbers = normalize_numbers(numbers) if numbers else cache.numbers()
+
+    now = time.time()
+    stale = [n for n in numbers
+             if cache.get(n) is None or now - cache.get(n).get('fetched_at', 0) >= max_age]
+
+    fetched = set()
+    if stale:
+        session = session or ServiceNowSession()
+        new = [n for n in stale if cache.get(n) is None]
+        known = [n for n in stale if cache.get(n) is not None]
+        if new:
+            fetched |= _poll_status(session, cache, new)
+        if known:
+            fetched |= _poll_status(session, cache, known, since=cache.oldest_check(known))
+        cache.save()
+
+    results = []
+    for number in numbers:
+        record = cache.get(number)
+        if record is None:
+            results.append({'number': number, 'error': 'not found'})
+            continue
+        result = {field: record.get(field) for field in STATUS_FIELDS}
+        result['link'] = build_link(record.get('sys_id'))
+        result['updated'] = number in fetched
+        results.append(result)
+    return results
+
+
+def _summarize_for_attachment(conversation_context):
+    """Short description excerpt for context that will be attached in full."""
+    summary = truncate_context(conversation_context, CONTEXT_SUMMARY_BYTES)
+    return f"{summary}\n\n_(Full conversation context attached as {CONTEXT_ATTACHMENT_NAME})_"
+
+
+def _upload_context(session, sys_id, number, source, conversation_context):
+    """
+    Attach the full conversation context to a new record (runs in the background).
+
+    If the upload fails, the (budget-truncated) context is written into the
+    description instead so it is not lost.
+    """
+    from utils.attachment_upload import upload_attachment
+
+    try:
+        upload_attachment(session, session.instance_url, session.instance.table, sys_id,
+                          CONTEXT_ATTACHMENT_NAME, source)
+        print(f"📎 Conversation context attached to {number}")
+        return
+    except Exception as e:
+        print(f"⚠️  Could not attach conversation context to {number}: {e}")
+
+    try:
+        table = session.instance.table
+        record = session.table_get(table, sys_id, fields=('description',)).json().get('result', {})
+        description = record.get('description', '').replace(
+            _summarize_for_attachment(conversation_context), conversation_context
+        )
+        session.table_update(table, sys_id, {'description': description})
+        print(f"✓ Conversation context added to the description of {number} instead")
+    except Exception as e:
+        print(f"⚠️  Could not add conversation context to {number}: {e}")
+
+
+def create_feedback_sbo(feedback_type, message, skill_name=None, conversation_context=None,
+                        session=None, queue=False, dedup=True, append_duplicate=False,
+                        context_file=None, instance=None):
+    """
+    Create a feedback SBO in ServiceNow.
+
+    Args:
+        skill_name: Affected skill; detected from the message and context
+                    (see resolve_skill_name) when omitted
+        session: Optional ServiceNowSession to use; when omitted, the pooled
+                 session for ``instance`` is used (see utils.instances.get_session)
+        instance: Configured instance name (default: the default instance);
+                  ignored when a session is given - the session's instance is used
+        queue: Write the feedback to the local outbox and return immediately;
+               a background flusher submits it
+        dedup: Check the local duplicate index first; a likely duplicate returns
+               the existing SBO (with 'duplicate_of' set) instead of creating one
+               (the index only covers the default instance)
+        append_duplicate: When a duplicate is found, add this report to it as a
+                          comment
+        context_file: Optional Path or seekable binary file holding the complete
+                      context (conversation_context may be a truncated copy)
+
+    Context over ATTACHMENT_THRESHOLD_BYTES is uploaded as a gzip attachment
+    in the background once the record exists; the result is returned without
+    waiting for it ('attachment': 'pending').
+
+    If the submission fails because of authentication, the network or a
+    server-side error, the feedback is saved to the outbox instead of being
+    lost and a queued result (number None, 'queued' key) is returned.
+
+    Raises:
+        FeedbackSubmissionError: If the SBO could not be created or queued, or
+                                 ``instance`` is not configured
+    """
+    with timing.span('create_feedback_sbo', feedback_type=feedback_type, queue=queue) as span:
+        target = _target_instance(instance, session)
+        skill_name = resolve_skill_name(feedback_type, message, skill_name, conversation_context)
+        result = _create_feedback_sbo(
+            feedback_type, message, skill_name, conversation_context, session, queue,
+            dedup, append_duplicate, context_file, target
+        )
+        if result.get('queued'):
+            span.set(outcome='queued')
+        elif result.get('duplicate_of'):
+            span.set(outcome='duplicate')
+        else:
+            span.set(outcome='created', attachment=result.get('attachment'))
+    return result
+
+
+def submit_to_instances(feedback_type, message, skill_name=None, conversation_context=None,
+                        instances=None, queue=False, dedup=True, append_duplicate=False,
+                        context_file=None):
+    """
+    File the same feedback on several instances concurrently (e.g. production
+    plus a staging mirror), each through its own pooled session.
+
+    Args:
+        instances: Instance names, primary first (default: the default
+                   instance followed by the configured mirrors)
+        dedup / append_duplicate: Apply to the primary only - mirrors always
+                                  get a new record
+
+    Only a Path ``context_file`` is attached on every instance; a file object
+    can only be read by one upload, so it goes to the primary.
+
+    Returns:
+        {instance name: result dict}; an instance that failed maps to
+        {'error': message} instead of failing the others
+
+    Raises:
+        FeedbackSubmissionError: If an instance is not configured
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    names = list(instances) if instances else [get_instance().name] + mirror_instances()
+    targets = [_target_instance(name) for name in dict.fromkeys(names)]
+    skill_name = resolve_skill_name(feedback_type, message, skill_name, conversation_context)
+
+    def submit(target, primary):
+        try:
+            return create_feedback_sbo(
+                feedback_type, message, skill_name, conversation_context, queue=queue,
+                dedup=dedup and primary, append_duplicate=append_duplicate and primary,
+                context_file=context_file if primary or isinstance(context_file, os.PathLike) else None,
+                instance=target.name
+            )
+        except Exception as e:
+            print(f"❌ {target.name}: {e}")
+            return {'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = {target.name: pool.submit(submit, target, index == 0)
+                   for index, target in enumerate(targets)}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def _network_errors():
+    """
+    Exceptions that mean a request failed in transit (worth queueing for a
+    retry); requests is only imported once one is being handled.
+    """
+    from requests import RequestException
+    return RequestException, TimeoutError
+
+
+def _target_instance(name, session=None):
+    """
+    The Instance a submission goes to: the session's, else the named one
+    (None without the session manager - the basic-auth fallback uses INSTANCE).
+
+    Raises:
+        FeedbackSubmissionError: If no instance of that name is configured
+    """
+    if session is not None:
+        return session.instance
+    if not HAS_SESSION_MANAGER:
+        if name:
+            raise FeedbackSubmissionError("Routing to an instance requires the session manager")
+        return None
+    try:
+        return get_instance(name)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        raise FeedbackSubmissionError(str(e)) from e
+
+
+def _create_feedback_sbo(feedback_type, message, skill_name, conversation_context, session,
+                         queue, dedup, append_duplicate, context_file, instance):
+    """Create (or queue) the SBO on ``instance`` - see create_feedback_sbo"""
+    if queue:
+        key = queue_feedback(feedback_type, message, skill_name, conversation_context, instance)
+        return _queued_result(key)
+
+    # Offload oversized context to an attachment
+    attachment_source = None
+    description_context = conversation_context
+    if HAS_SESSION_MANAGER and (conversation_context or context_file):
+        from utils.attachment_upload import source_size
+
+        source = context_file if context_file is not None else conversation_context
+        if source_size(source) > ATTACHMENT_THRESHOLD_BYTES:
+            attachment_source = source
+            description_context = _summarize_for_attachment(conversation_context or '')
+
+    # Stamped into the record before the first attempt: if the insert reaches
+    # ServiceNow but the reply is lost, the queued retry finds it by this key
+    reference = uuid.uuid4().hex
+    title, payload = build_payload(feedback_type, message, skill_name, description_context, reference)
+
+    # The duplicate index holds default-instance records only
+    dedup = dedup and HAS_SESSION_MANAGER and instance.is_default
+    duplicate = find_duplicate(skill_name, message) if dedup else None
+    if duplicate:
+        print(f"\n🔁 Likely duplicate of existing feedback: {duplicate['number']}")
+    else:
+        print(f"\nSubmitting feedback: {title}")
+        if instance is not None and not instance.is_default:
+            print(f"  on {instance.name} ({instance.url})")
 
     # Use session manager if available
     if HAS_SESSION_MANAGER:
         try:
-            session = ServiceNowSession()
-            response = session.post(url, json=payload)
+            if session is None:
+                session = get_session(instance.name)
+            if duplicate:
+                return _duplicate_result(
+                    duplicate, session, feedback_type, message, conversation_context, append_duplicate
+                )
+            payload = resolve_references(payload, session)
+            response = session.table_create(instance.table, payload)
+        except CircuitOpenError as e:
+            print(f"\n🔌 {e} - saving feedback to the outbox")
+            key = queue_feedback(feedback_type, message, skill_name, conversation_context, instance, reference)
+            return _queued_result(key)
         except AuthenticationError as e:
             print(f"\n❌ Authentication error: {e}")
-            sys.exit(1)
-        except Exception as e:
-            print(f"\n❌ Unexpected error: {e}")
-            sys.exit(1)
+            key = queue_feedback(feedback_type, message, skill_name, conversation_context, instance, reference)
+            return _queued_result(key)
+        except _network_errors() as e:
+            print(f"\n❌ Network error: {e}")
+            try:
+                key = queue_feedback(feedback_type, message, skill_name, conversation_context, instance,
+                                     reference)
+            except Exception:
+                raise FeedbackSubmissionError(f"Network error: {e}") from e
+            return _queued_result(key)
     else:
         # Fallback to basic auth (not recommended)
         import requests
+        url = f"{INSTANCE}/api/now/table/{TABLE}"
+        from utils.table_api import CREATE_RESPONSE_FIELDS, table_params
+        params = table_params(fields=CREATE_RESPONSE_FIELDS)
         token = os.environ.get('SNOW_TOKEN')
         user = os.environ.get('SNOW_USER')
         password = os.environ.get('SNOW_PASS')
@@ -118,49 +892,866 @@ def create_feedback_sbo(feedback_type, message, skill_name=None, conversation_co
                 'Authorization': f'Bearer {token}',
                 'Content-Type': 'application/json'
             }
-            response = requests.post(url, headers=headers, json=payload)
+            response = requests.post(url, headers=headers, params=params, json=payload,
+                                     timeout=FALLBACK_TIMEOUT)
         elif user and password:
-            response = requests.post(url, auth=(user, password), json=payload)
+            response = requests.post(url, auth=(user, password), params=params, json=payload,
+                                     timeout=FALLBACK_TIMEOUT)
         else:
             print(f"\n❌ No authentication credentials found")
             print(f"  Set SNOW_TOKEN or SNOW_USER/SNOW_PASS environment variables")
-            sys.exit(1)
+            raise FeedbackSubmissionError("No authentication credentials found")
+
+    result = _handle_create_response(
+        response, feedback_type, message, skill_name, conversation_context, instance, reference
+    )
+
+    if attachment_source is not None and result.get('sys_id'):
+        from utils.attachment_upload import start_upload
+
+        start_upload(
+            _upload_context, session, result['sys_id'], result['number'],
+            attachment_source, conversation_context or ''
+        )
+        result['attachment'] = 'pending'
+
+    return result
+
 
-    # Handle response
+def _duplicate_result(duplicate, session, feedback_type, message, conversation_context, append):
+    """Result for feedback matched to an existing SBO (optionally appending to it)."""
+    appended = False
+    if append:
+        appended = _append_to_duplicate(session, duplicate, feedback_type, message, conversation_context)
+        if appended:
+            print(f"✓ Added to existing feedback: {duplicate['number']}")
+        else:
+            print(f"⚠️  Could not add comment to {duplicate['number']}")
+
+    link = build_link(duplicate['sys_id'])
+    print(f"\nLink: {link}")
+
+    return {
+        'number': duplicate['number'],
+        'sys_id': duplicate['sys_id'],
+        'link': link,
+        'duplicate_of': duplicate['number'],
+        'appended': appended
+    }
+
+
+def _handle_create_response(response, feedback_type, message, skill_name, conversation_context,
+                            instance=None, reference=None):
+    """Turn a Table API insert response into a result dict (or queue/raise)."""
     if response.status_code == 201:
         result = response.json().get("result", {})
         number = result.get("number", "Unknown")
         sys_id = result.get("sys_id", "")
 
         # Build link with datascience view
-        link = f"{INSTANCE}/now/nav/ui/classic/params/target/{TABLE}.do%3Fsys_id%3D{sys_id}%26sysparm_view%3Ddatascience%26sysparm_record_target%3D{TABLE}%26sysparm_record_row%3D1%26sysparm_record_rows%3D1881%26sysparm_record_list%3Drequest_type%253DSecurity%2BData%2BAnalytics%255EORDERBYDESCnumber%26sysparm_view%3Ddatascience"
+        link = build_link(sys_id, instance)
 
         print(f"✓ Feedback submitted successfully: {number}")
         print(f"\nLink: {link}")
 
+        if instance is None or instance.is_default:
+            _index_feedback(number, sys_id, skill_name, message)
+
         return {
             'number': number,
             'sys_id': sys_id,
             'link': link
         }
+    elif HAS_SESSION_MANAGER and (response.status_code == 429 or response.status_code >= 500):
+        # Instance is throttling or unavailable - keep the feedback for later
+        print(f"\n⚠️  ServiceNow returned {response.status_code}")
+        key = queue_feedback(feedback_type, message, skill_name, conversation_context, instance, reference)
+        return _queued_result(key)
     else:
         print(f"\n✗ Failed to submit feedback")
         print(f"  Status: {response.status_code}")
         print(f"  Response: {response.text}")
-        sys.exit(1)
+        raise FeedbackSubmissionError(
+            f"Failed to submit feedback (status {response.status_code}): {response.text}"
+        )
+
+
+async def create_feedback_sbo_async(feedback_type, message, skill_name=None,
+                                    conversation_context=None, session=None, queue=False,
+                                    dedup=True, instance=None, context_file=None):
+    """
+    asyncio counterpart of create_feedback_sbo.
+
+    Args:
+        session: AsyncServiceNowSession to use; pass a shared one so many
+                 submissions can be in flight on one event loop (a new one is
+                 created and closed when omitted)
+        queue: Write the feedback to the local outbox and return immediately
+        dedup: Return the existing SBO if the local duplicate index has a match
+        instance: Configured instance name for a new session (default: the default instance)
+        context_file: See create_feedback_sbo
+
+    Only the insert itself is awaited on the loop; the local work around it
+    (skill registry, outbox, duplicate index, reference cache, loading
+    credentials) runs in the default executor so it never stalls other
+    submissions.
+
+    Raises:
+        FeedbackSubmissionError: If the SBO could not be created or queued, or
+                                 ``instance`` is not configured
+    """
+    import asyncio
+    import functools
+    import httpx
+    from utils.async_session_manager import AsyncServiceNowSession
+
+    loop = asyncio.get_running_loop()
+
+    def blocking(func, *args, **kwargs):
+        return loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def queued(reference=None):
+        key = await blocking(queue_feedback, feedback_type, message, skill_name, conversation_context,
+                             target, reference)
+        return await blocking(_queued_result, key)
+
+    target = await blocking(_target_instance, instance, session)
+    skill_name = await blocking(resolve_skill_name, feedback_type, message, skill_name, conversation_context)
+    if queue:
+        return await queued()
+
+    duplicate = None
+    if dedup and target.is_default:
+        duplicate = await blocking(find_duplicate, skill_name, message)
+    if duplicate:
+        print(f"\n🔁 Likely duplicate of existing feedback: {duplicate['number']}")
+        return _duplicate_result(duplicate, session, feedback_type, message, conversation_context, False)
+
+    # Offload oversized context to an attachment (see _create_feedback_sbo)
+    attachment_source = None
+    description_context = conversation_context
+    if conversation_context or context_file:
+        from utils.attachment_upload import source_size
+
+        source = context_file if context_file is not None else conversation_context
+        if await blocking(source_size, source) > ATTACHMENT_THRESHOLD_BYTES:
+            attachment_source = source
+            description_context = _summarize_for_attachment(conversation_context or '')
+
+    reference = uuid.uuid4().hex  # See _create_feedback_sbo
+    title, payload = build_payload(feedback_type, message, skill_name, description_context, reference)
+    payload = await blocking(resolve_references, payload, instance=target)
+
+    print(f"\nSubmitting feedback: {title}")
+
+    owns_session = session is None
+    try:
+        if owns_session:
+            # Its constructor loads credentials (file or broker socket)
+            session = await blocking(AsyncServiceNowSession, instance=target)
+        response = await session.table_create(target.table, payload)
+    except CircuitOpenError as e:
+        print(f"\n🔌 {e} - saving feedback to the outbox")
+        return await queued(reference)
+    except AuthenticationError as e:
+        print(f"\n❌ Authentication error: {e}")
+        return await queued(reference)
+    except (httpx.TransportError, OSError, asyncio.TimeoutError) as e:
+        print(f"\n❌ Network error: {e}")
+        try:
+            return await queued(reference)
+        except Exception:
+            raise FeedbackSubmissionError(f"Network error: {e}") from e
+    finally:
+        if owns_session and session is not None:
+            await session.close()
+
+    result = await blocking(
+        _handle_create_response,
+        response, feedback_type, message, skill_name, conversation_context, target, reference
+    )
+
+    if attachment_source is not None and result.get('sys_id'):
+        from utils.attachment_upload import start_upload
+
+        # The upload runs on its own thread, through the instance's pooled
+        # (blocking) session
+        upload_session = await blocking(get_session, target.name)
+        start_upload(
+            _upload_context, upload_session, result['sys_id'], result['number'],
+            attachment_source, conversation_context or ''
+        )
+        result['attachment'] = 'pending'
+
+    return result
+
+
+def _find_by_reference(session, reference):
+    """
+    Look up a record already created for an outbox idempotency key.
+
+    Raises:
+        FeedbackSubmissionError: If the lookup failed in a way worth retrying
+                                 (creating blind could file the feedback twice)
+    """
+    response = session.table_list(session.instance.table, query=f"descriptionLIKE{reference}", limit=1,
+                                  fields=('number', 'sys_id'))
+    if response.status_code == 429 or response.status_code >= 500:
+        raise FeedbackSubmissionError(f"Reference lookup failed (HTTP {response.status_code})")
+    if response.status_code != 200:
+        return None
+    results = response.json().get('result', [])
+    return results[0] if results else None
+
+
+def _send_outbox_record(session, key, record):
+    """
+    Submit one outbox record.
+
+    Returns:
+        (number, sys_id) tuple
+
+    Raises:
+        FeedbackSubmissionError: If the attempt failed and should be retried
+    """
+    # A previous attempt - a direct submission, or a flush that crashed
+    # before mark_sent - may have created the record (e.g. a timeout after
+    # the insert) - don't create it twice
+    existing = _find_by_reference(session, key)
+    if existing:
+        return existing.get('number'), existing.get('sys_id')
+
+    _, payload = build_payload(
+        record['feedback_type'], record['message'],
+        record.get('skill_name'), record.get('conversation_context'),
+        reference=key
+    )
+    payload = resolve_references(payload, session)
+    response = session.table_create(session.instance.table, payload)
+    if response.status_code != 201:
+        raise FeedbackSubmissionError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    result = response.json().get('result', {})
+    return result.get('number'), result.get('sys_id')
+
+
+def flush_outbox(session=None, outbox=None):
+    """
+    Drain due records from the local outbox.
+
+    Failed records are rescheduled with jittered exponential backoff. An
+    authentication failure stops the flush early, since every other record
+    would fail the same way. Records queued for another instance go through
+    that instance's pooled session; ``session`` is used for the default
+    instance's records.
+
+    Returns:
+        (sent, failed) counts
+    """
+    from utils.outbox import Outbox
+
+    outbox = outbox or Outbox()
+    sent = failed = 0
+
+    while True:
+        claimed = outbox.claim_due()
+        if not claimed:
+            break
+
+        if session is None:
+            session = get_session()
+
+        for index, (key, record, _) in enumerate(claimed):
+            try:
+                record_session = get_session(record['instance']) if record.get('instance') else session
+                number, sys_id = _send_outbox_record(record_session, key, record)
+            except CircuitOpenError as e:
+                # Not this record's fault - keep its attempt count
+                for other_key, _, _ in claimed[index:]:
+                    outbox.release(other_key)
+                print(f"🔌 Outbox flush postponed: {e}")
+                return sent, failed
+            except AuthenticationError as e:
+                outbox.mark_failed(key, e)
+                for other_key, _, _ in claimed[index + 1:]:
+                    outbox.release(other_key)
+                print(f"❌ Outbox flush stopped - authentication error: {e}")
+                return sent, failed + 1
+            except Exception as e:
+                outbox.mark_failed(key, e)
+                failed += 1
+                print(f"⚠️  Outbox record {key} failed: {e}")
+                continue
+
+            outbox.mark_sent(key, number, sys_id)
+            sent += 1
+            print(f"✓ Outbox record {key} submitted: {number}")
+
+    return sent, failed
+
+
+class OutboxFlusher(threading.Thread):
+    """Background thread that drains the outbox using a warm session (worker mode)"""
+
+    def __init__(self, session, interval=OUTBOX_POLL_SECONDS):
+        super().__init__(name='outbox-flusher', daemon=True)
+        self.session = session
+        self.interval = interval
+        self.wake = threading.Event()
+
+    def run(self):
+        from utils.outbox import Outbox
+
+        outbox = Outbox()
+        while True:
+            try:
+                flush_outbox(self.session, outbox)
+                due_in = outbox.next_due_in()
+            except Exception as e:
+                print(f"⚠️  Outbox flush failed: {e}")
+                due_in = None
+
+            timeout = self.interval if due_in is None else min(due_in, self.interval)
+            self.wake.wait(timeout)
+            self.wake.clear()
+
+
+# Set when an in-process flusher is running (worker mode)
+_outbox_flusher = None
+
+
+def _outbox_flush_lock():
+    """
+    Cross-process lock held for a whole ``--flush_outbox`` run.
+
+    Raises:
+        TimeoutError: On entry, at once, if another flush holds it
+    """
+    from utils.credential_store import file_lock
+    from utils.outbox import OUTBOX_FILE
+    return file_lock(f'{OUTBOX_FILE}.flush', timeout=0)
+
+
+def start_background_flush():
+    """
+    Make sure queued feedback gets submitted without blocking the caller.
+
+    Wakes the in-process flusher when one is running, otherwise starts a
+    detached ``--flush_outbox`` process - unless one is already running. The
+    detached process has no terminal to report to, so it never opens a
+    visible login browser (see INTERACTIVE_LOGIN_ENV); feedback that needs
+    a new login waits in the outbox for the next interactive run.
+    """
+    if _outbox_flusher is not None:
+        _outbox_flusher.wake.set()
+        return
+
+    if not HAS_SESSION_MANAGER:
+        return
+
+    import subprocess
+    from utils.session_manager import INTERACTIVE_LOGIN_ENV
+
+    try:
+        with _outbox_flush_lock():
+            pass
+    except TimeoutError:
+        return  # The running flush drains this record too
+
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--flush_outbox'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=dict(os.environ, **{INTERACTIVE_LOGIN_ENV: '0'}),
+            start_new_session=True
+        )
+    except OSError as e:
+        print(f"⚠️  Could not start background flush: {e} - run with --flush_outbox later")
+
+
+def validate_record(record):
+    """Check a JSON feedback record (worker or batch input) before submitting it."""
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    feedback_type = record.get('feedback_type')
+    if feedback_type not in EMOJI_MAP:
+        raise ValueError(f"Invalid feedback_type: {feedback_type}")
+    if not record.get('message'):
+        raise ValueError("message is required")
+
+
+def handle_worker_request(request, session):
+    """
+    Handle one worker-mode request and return the JSON-serialisable result.
+
+    Request lines look like:
+        {"id": 1, "feedback_type": "bug", "message": "...", "skill_name": "...",
+         "conversation_context": "..."}
+        {"id": 2, "op": "status", "numbers": ["DSRT0012345"]}
+
+    A submit request may add "instance": "<name>" to go to another
+    configured instance, or "mirror": true (or a list of instance names) to
+    file it on the default instance and its mirrors; the reply then carries
+    "results": {name: result}.
+    """
+    request_id = request.get('id')
+    op = request.get('op', 'submit')
+
+    try:
+        if op == 'status':
+            if request.get('instance'):
+                raise ValueError("status works on the default instance only")
+            numbers = request.get('numbers')
+            if not isinstance(numbers, list):
+                raise ValueError("numbers must be a list of SBO numbers")
+            max_age = request.get('max_age', STATUS_CACHE_TTL_SECONDS)
+            if isinstance(max_age, bool) or not isinstance(max_age, (int, float)):
+                raise ValueError("max_age must be a number of seconds")
+            records = feedback_status(numbers, session=session, max_age=max_age)
+            return {'id': request_id, 'ok': True, 'records': records}
+
+        if op != 'submit':
+            raise ValueError(f"Unknown op: {op}")
+
+        validate_record(request)
+
+        mirror = request.get('mirror')
+        if mirror:
+            results = submit_to_instances(
+                feedback_type=request['feedback_type'],
+                message=request['message'],
+                skill_name=request.get('skill_name'),
+                conversation_context=truncate_context(request.get('conversation_context')),
+                instances=mirror if isinstance(mirror, list) else None,
+                queue=bool(request.get('queue')),
+                dedup=not request.get('allow_duplicate'),
+                append_duplicate=bool(request.get('append_duplicate'))
+            )
+            return {'id': request_id, 'ok': not any('error' in r for r in results.values()),
+                    'results': results}
+
+        instance = request.get('instance')
+        result = create_feedback_sbo(
+            feedback_type=request['feedback_type'],
+            message=request['message'],
+            skill_name=request.get('skill_name'),
+            conversation_context=truncate_context(request.get('conversation_context')),
+            session=None if instance else session,
+            queue=bool(request.get('queue')),
+            dedup=not request.get('allow_duplicate'),
+            append_duplicate=bool(request.get('append_duplicate')),
+            instance=instance
+        )
+        return {'id': request_id, 'ok': True, **result}
+    except SystemExit:
+        # A dependency (e.g. the browser login helper) gave up - keep serving
+        return {'id': request_id, 'ok': False, 'error': "Authentication helper exited"}
+    except Exception as e:
+        return {'id': request_id, 'ok': False, 'error': str(e)}
+
+
+def serve(workers=DEFAULT_WORKERS):
+    """
+    Run as a long-lived worker: read JSON-lines requests on stdin and write
+    one JSON-lines result per request on stdout.
+
+    One ServiceNowSession per instance (and its pooled connection, see
+    utils.instances.get_session) is kept warm for the lifetime of the process
+    and requests are handled concurrently by a bounded
+    thread pool. Results are written as they complete, so callers must match
+    them up by ``id``. Headless credential refreshes reuse one browser that
+    stays open between them (see login_and_extract.keep_browser_alive), and
+    with a credential broker running, refreshes it makes for other processes
+    are picked up as they happen.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    # stdout is reserved for the protocol - route progress output to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def emit(result):
+        with write_lock:
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+
+    def run(request):
+        try:
+            result = handle_worker_request(request, session)
+        except Exception as e:
+            # Every request gets a reply, even if the handler itself broke
+            print(f"❌ Worker request failed: {e!r}")
+            result = {'id': request.get('id'), 'ok': False, 'error': f"Internal error: {e}"}
+        try:
+            emit(result)
+        finally:
+            in_flight.release()
+
+    global _outbox_flusher
+
+    session = get_session() if HAS_SESSION_MANAGER else None
+    if session is not None:
+        from utils.login_and_extract import keep_browser_alive
+        keep_browser_alive()
+        session.follow_broker()
+        _outbox_flusher = OutboxFlusher(session)
+        _outbox_flusher.start()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                emit({'id': None, 'ok': False, 'error': f"Invalid JSON: {e}"})
+                continue
+            if not isinstance(request, dict):
+                emit({'id': None, 'ok': False, 'error': "Request must be a JSON object"})
+                continue
+
+            in_flight.acquire()
+            pool.submit(run, request)
+
+    if session is not None:
+        close_sessions()
+
+
+def iter_batch_records(path):
+    """
+    Stream (line_no, record, error) tuples from a JSONL file.
+
+    The file is read line by line so arbitrarily large backlogs never have to
+    fit in memory. Invalid lines are yielded with an error instead of a record.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = None
+            try:
+                record = json.loads(line)
+                validate_record(record)
+            except ValueError as e:
+                yield line_no, record if isinstance(record, dict) else None, str(e)
+                continue
+            if record.get('conversation_context'):
+                record['conversation_context'] = truncate_context(record['conversation_context'])
+            record['skill_name'] = resolve_skill_name(
+                record['feedback_type'], record['message'],
+                record.get('skill_name'), record.get('conversation_context')
+            )
+            yield line_no, record, None
+
+
+def _record_result(line_no, record, number=None, sys_id=None, error=None):
+    """Build the per-record JSONL result for batch mode."""
+    return {
+        'line': line_no,
+        'id': record.get('id') if record else None,
+        'number': number,
+        'sys_id': sys_id,
+        'error': error,
+    }
+
+
+def _reconcile_record(session, line_no, record, reference, error):
+    """
+    Result for a record whose create may or may not have reached ServiceNow:
+    the record found by its reference, else ``error`` (never re-created blind).
+    """
+    try:
+        existing = _find_by_reference(session, reference)
+    except Exception as e:
+        return _record_result(line_no, record, error=f"{error} (reference lookup failed: {e})")
+    if existing:
+        return _record_result(line_no, record, existing.get('number'), existing.get('sys_id'))
+    return _record_result(line_no, record, error=str(error))
+
+
+def _post_record(session, line_no, record, reference=None):
+    """Create one record through the Table API (batch fallback path)."""
+    _, payload = build_payload(
+        record['feedback_type'], record['message'],
+        record.get('skill_name'), record.get('conversation_context'), reference
+    )
+    try:
+        payload = resolve_references(payload, session)
+        response = session.table_create(session.instance.table, payload)
+    except _network_errors() as e:
+        if reference:
+            return _reconcile_record(session, line_no, record, reference, f"Network error: {e}")
+        return _record_result(line_no, record, error=str(e))
+    except Exception as e:
+        return _record_result(line_no, record, error=str(e))
+
+    if response.status_code != 201:
+        return _record_result(line_no, record, error=f"HTTP {response.status_code}: {response.text[:200]}")
+
+    result = response.json().get('result', {})
+    return _record_result(line_no, record, result.get('number'), result.get('sys_id'))
+
+
+class BatchAPIUnavailable(Exception):
+    """Raised when the instance does not serve the Batch API"""
+    pass
+
+
+class BatchOutcomeUnknown(Exception):
+    """Raised when a batch call failed in a way that may have created its records"""
+    pass
+
+
+def _post_batch_chunk(session, chunk, references):
+    """
+    Create a chunk of records with a single /api/now/v1/batch call.
+
+    Each record carries its ``references`` entry in the description, so
+    records the batch endpoint did not service are looked up before they are
+    retried individually.
+
+    Raises:
+        BatchAPIUnavailable: If the Batch API is disabled or not accessible
+                             (nothing was created)
+        BatchOutcomeUnknown: On any other failure (a gateway timeout, a lost
+                             reply) - the instance may have run the batch
+    """
+    import base64
+    from utils.table_api import CREATE_RESPONSE_FIELDS, table_path, table_url
+
+    # Sub-responses come back base64-encoded inside the batch response, so
+    # trimming them to the fields read below shrinks it the most
+    url = table_url(table_path(session.instance.table), fields=CREATE_RESPONSE_FIELDS)
+    rest_requests = []
+    for index, (line_no, record) in enumerate(chunk):
+        _, payload = build_payload(
+            record['feedback_type'], record['message'],
+            record.get('skill_name'), record.get('conversation_context'), references[index]
+        )
+        payload = resolve_references(payload, session)
+        body = base64.b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        rest_requests.append({
+            'id': str(index),
+            'method': 'POST',
+            'url': url,
+            'headers': [
+                {'name': 'Content-Type', 'value': 'application/json'},
+                {'name': 'Accept', 'value': 'application/json'},
+            ],
+            'body': body,
+        })
+
+    try:
+        response = session.post(
+            f"{session.instance_url}{BATCH_API_PATH}",
+            json={'batch_request_id': '1', 'rest_requests': rest_requests}
+        )
+    except _network_errors() as e:
+        raise BatchOutcomeUnknown(f"Network error: {e}") from e
+    if response.status_code in (400, 403, 404, 405):
+        raise BatchAPIUnavailable(f"HTTP {response.status_code}")
+    if response.status_code != 200:
+        raise BatchOutcomeUnknown(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    data = response.json()
+    results = []
+    serviced = set()
+
+    for item in data.get('serviced_requests', []):
+        index = int(item['id'])
+        serviced.add(index)
+        line_no, record = chunk[index]
+
+        try:
+            body = json.loads(base64.b64decode(item.get('body') or b'') or b'{}')
+        except (ValueError, TypeError):
+            body = {}
+
+        if item.get('status_code') == 201:
+            result = body.get('result', {})
+            results.append(_record_result(line_no, record, result.get('number'), result.get('sys_id')))
+        else:
+            error = body.get('error', {}).get('message') or item.get('status_text')
+            results.append(_record_result(line_no, record, error=f"HTTP {item.get('status_code')}: {error}"))
+
+    # Anything the batch endpoint did not get to goes through the Table API
+    # (unless it was created after all)
+    for index, (line_no, record) in enumerate(chunk):
+        if index not in serviced:
+            try:
+                existing = _find_by_reference(session, references[index])
+            except Exception as e:
+                results.append(_record_result(line_no, record, error=f"Reference lookup failed: {e}"))
+                continue
+            if existing:
+                results.append(_record_result(line_no, record, existing.get('number'), existing.get('sys_id')))
+            else:
+                results.append(_post_record(session, line_no, record, references[index]))
+
+    return results
+
+
+def submit_batch(path, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, session=None, out=None):
+    """
+    Bulk-create feedback SBOs from a JSONL file.
+
+    Records are streamed from ``path`` and grouped into Batch API calls of
+    ``batch_size`` records, with up to ``workers`` calls in flight. If the
+    instance does not serve the Batch API (400/403/404/405), remaining records
+    fall back to concurrent Table API POSTs. Any other batch failure is not
+    retried: each record is looked up by the reference stamped into it, and
+    those not found are reported as failed. One JSONL result per record
+    (line, id, number, sys_id, error) is written to ``out`` as it completes.
+
+    Returns:
+        (succeeded, failed) counts
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    out = out or sys.stdout
+    session = session or get_session()
+    write_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    counts = {'ok': 0, 'failed': 0}
+    use_batch_api = [True]
+
+    def emit(result):
+        with write_lock:
+            counts['failed' if result['error'] else 'ok'] += 1
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+
+    def run(chunk):
+        try:
+            # See _create_feedback_sbo: lets an uncertain attempt be reconciled
+            references = [uuid.uuid4().hex for _ in chunk]
+            results = None
+            if use_batch_api[0]:
+                try:
+                    results = _post_batch_chunk(session, chunk, references)
+                except BatchAPIUnavailable as e:
+                    if use_batch_api[0]:
+                        use_batch_api[0] = False
+                        print(f"⚠️  Batch API unavailable ({e}) - falling back to Table API", file=sys.stderr)
+                except BatchOutcomeUnknown as e:
+                    print(f"⚠️  Batch call failed ({e}) - checking which records were created", file=sys.stderr)
+                    results = [_reconcile_record(session, line_no, record, reference, e)
+                               for (line_no, record), reference in zip(chunk, references)]
+
+            if results is None:
+                with ThreadPoolExecutor(max_workers=min(workers, len(chunk))) as table_pool:
+                    results = list(table_pool.map(
+                        lambda item: _post_record(session, *item[0], reference=item[1]),
+                        zip(chunk, references)
+                    ))
+
+            for result in results:
+                emit(result)
+        except Exception as e:
+            for line_no, record in chunk:
+                emit(_record_result(line_no, record, error=str(e)))
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunk = []
+        for line_no, record, error in iter_batch_records(path):
+            if error:
+                emit(_record_result(line_no, record, error=error))
+                continue
+
+            chunk.append((line_no, record))
+            if len(chunk) >= batch_size:
+                in_flight.acquire()
+                pool.submit(run, chunk)
+                chunk = []
+
+        if chunk:
+            in_flight.acquire()
+            pool.submit(run, chunk)
+
+    return counts['ok'], counts['failed']
 
 
 def main():
     parser = argparse.ArgumentParser(description="Submit feedback about MCP skills")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a long-lived worker reading JSON-lines requests from stdin"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent requests in --serve/--batch mode (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Save feedback to the local outbox and submit it in the background"
+    )
+    parser.add_argument(
+        "--flush_outbox",
+        action="store_true",
+        help="Submit feedback waiting in the local outbox, then exit"
+    )
+    parser.add_argument(
+        "--allow_duplicate",
+        action="store_true",
+        help="Create a new SBO even if similar feedback already exists"
+    )
+    parser.add_argument(
+        "--append_duplicate",
+        action="store_true",
+        help="If similar feedback already exists, add this report to it as a comment"
+    )
+    parser.add_argument(
+        "--seed_dedup_index",
+        action="store_true",
+        help="Load existing feedback from ServiceNow into the local duplicate index, then exit"
+    )
+    parser.add_argument(
+        "--sync_feedback_store",
+        action="store_true",
+        help="Copy new and changed feedback records into the local analytics store, then exit"
+    )
+    parser.add_argument(
+        "--full_sync",
+        action="store_true",
+        help="With --sync_feedback_store: discard the local copy and fetch every record"
+    )
+    parser.add_argument(
+        "--status",
+        nargs="*",
+        metavar="NUMBER",
+        help="Show the current state of feedback SBOs (default: all previously looked-up ones), then exit"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE.jsonl",
+        help="Bulk-create feedback from a JSONL file and write per-record results as JSONL"
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Records per Batch API call in --batch mode (default: {DEFAULT_BATCH_SIZE})"
+    )
     parser.add_argument(
         "--feedback_type",
-        required=True,
         choices=['bug', 'enhancement', 'new_skill'],
         help="Type of feedback"
     )
     parser.add_argument(
         "--message",
-        required=True,
         help="Feedback message"
     )
     parser.add_argument(
@@ -169,18 +1760,234 @@ def main():
     )
     parser.add_argument(
         "--conversation_context",
-        help="Relevant conversation excerpt showing the issue"
+        help="Relevant conversation excerpt showing the issue ('-' to read it from stdin)"
+    )
+    parser.add_argument(
+        "--conversation_context_file",
+        metavar="PATH",
+        help="Read the conversation excerpt from a file ('-' for stdin) - use for large transcripts"
+    )
+    parser.add_argument(
+        "--context_max_bytes",
+        type=int,
+        default=DEFAULT_CONTEXT_MAX_BYTES,
+        help="Byte budget for the conversation excerpt; the middle of longer "
+             f"transcripts is truncated (default: {DEFAULT_CONTEXT_MAX_BYTES})"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--instance",
+        metavar="NAME",
+        help="Configured instance to submit to (default: the default instance; see utils/instances.py)"
+    )
+    parser.add_argument(
+        "--mirror",
+        nargs="*",
+        metavar="NAME",
+        help="Also submit to these instances concurrently (default: the configured mirrors)"
+    )
 
-    create_feedback_sbo(
-        feedback_type=args.feedback_type,
-        message=args.message,
-        skill_name=args.skill_name,
-        conversation_context=args.conversation_context
+    parser.add_argument(
+        "--rate_limit",
+        type=float,
+        metavar="PER_SECOND",
+        help="Max ServiceNow requests per second (0 = unlimited); same as SNOW_RATE_LIMIT"
+    )
+    parser.add_argument(
+        "--timing",
+        metavar="PATH",
+        help="Append timing spans as JSONL to PATH ('stderr' for stderr); same as SNOW_TIMING"
     )
 
+    args = parser.parse_args()
+
+    if args.rate_limit is not None:
+        # Read when each session is created, including in background flushes
+        os.environ['SNOW_RATE_LIMIT'] = str(max(0.0, args.rate_limit))
+    if args.timing:
+        # Exported so background flush processes record into the same file
+        os.environ[timing.TIMING_ENV] = args.timing
+    if timing.enabled():
+        uptime = timing.process_uptime()
+        timing.record(
+            'startup', uptime if uptime is not None else time.perf_counter() - _IMPORT_STARTED,
+            imports_ms=round((time.perf_counter() - _IMPORT_STARTED) * 1000, 3)
+        )
+
+    # The local stores (duplicate index, feedback store, status cache) and
+    # batch mode cover the default instance only
+    if args.instance:
+        default_only = [flag for flag, used in (
+            ('--status', args.status is not None),
+            ('--seed_dedup_index', args.seed_dedup_index),
+            ('--sync_feedback_store', args.sync_feedback_store),
+            ('--batch', args.batch),
+        ) if used]
+        if default_only:
+            parser.error(f"{default_only[0]} works on the default instance only - drop --instance")
+
+    if args.serve:
+        serve(workers=max(1, args.workers))
+        return
+
+    if args.flush_outbox:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --flush_outbox requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        from contextlib import ExitStack
+
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(_outbox_flush_lock())
+            except TimeoutError:
+                print("Another outbox flush is already running")
+                return
+            sent, failed = flush_outbox()
+        print(f"\n✓ Outbox flush complete: {sent} submitted, {failed} failed")
+        sys.exit(1 if failed else 0)
+
+    if args.seed_dedup_index:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --seed_dedup_index requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            indexed = seed_dedup_index()
+        except (FeedbackSubmissionError, AuthenticationError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✓ Indexed {indexed} feedback records for duplicate detection")
+        return
+
+    if args.sync_feedback_store:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --sync_feedback_store requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            synced = sync_feedback_store(full=args.full_sync)
+        except (FeedbackSubmissionError, AuthenticationError, CircuitOpenError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✓ Synced {synced} feedback records - report with: python3 src/utils/feedback_store.py report")
+        return
+
+    if args.status is not None:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --status requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            records = feedback_status(args.status)
+        except ValueError as e:
+            parser.error(str(e))
+        except (FeedbackSubmissionError, AuthenticationError, CircuitOpenError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        if not records:
+            print("No feedback looked up yet - pass one or more SBO numbers")
+        for record in records:
+            if record.get('error'):
+                print(f"{record['number']}: {record['error']}")
+                continue
+            print(f"{record['number']}  {record.get('state') or '-'}  "
+                  f"(updated {record.get('sys_updated_on')} UTC)  {record.get('short_description') or ''}")
+            if record.get('assigned_to'):
+                print(f"    Assigned to: {record['assigned_to']}")
+            print(f"    {record['link']}")
+        sys.exit(1 if any(record.get('error') for record in records) else 0)
+
+    if args.batch:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --batch requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        # stdout carries the JSONL results - route progress output to stderr
+        out = sys.stdout
+        sys.stdout = sys.stderr
+        succeeded, failed = submit_batch(
+            args.batch,
+            batch_size=max(1, args.batch_size),
+            workers=max(1, args.workers),
+            out=out
+        )
+        print(f"\n✓ Batch complete: {succeeded} created, {failed} failed")
+        sys.exit(1 if failed else 0)
+
+    if not args.feedback_type or not args.message:
+        parser.error("--feedback_type and --message are required")
+
+    if args.conversation_context and args.conversation_context_file:
+        parser.error("use either --conversation_context or --conversation_context_file")
+
+    # For file/stdin input the full context is kept on disk (stdin is spooled)
+    # so it can be attached in full while the description gets the budget
+    context_max_bytes = max(1024, args.context_max_bytes)
+    context_file = None
+    if args.conversation_context == '-' or args.conversation_context_file == '-':
+        import tempfile
+        context_file = tempfile.TemporaryFile()
+        conversation_context = read_context('-', context_max_bytes, spool=context_file)
+        context_file.flush()
+    elif args.conversation_context_file:
+        context_file = Path(args.conversation_context_file)
+        try:
+            conversation_context = read_context(context_file, context_max_bytes)
+        except OSError as e:
+            parser.error(f"cannot read --conversation_context_file: {e}")
+    else:
+        conversation_context = truncate_context(args.conversation_context, context_max_bytes)
+
+    if args.mirror is not None:
+        if not HAS_SESSION_MANAGER:
+            print("❌ --mirror requires the session manager", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            primary = get_instance(args.instance).name
+            mirrors = args.mirror or mirror_instances()
+        except ValueError as e:
+            parser.error(str(e))
+        if not [name for name in mirrors if name != primary]:
+            parser.error("no mirror instances configured - pass --mirror NAME ...")
+
+        try:
+            results = submit_to_instances(
+                feedback_type=args.feedback_type,
+                message=args.message,
+                skill_name=args.skill_name,
+                conversation_context=conversation_context,
+                instances=[primary] + mirrors,
+                queue=args.queue,
+                dedup=not args.allow_duplicate,
+                append_duplicate=args.append_duplicate,
+                context_file=context_file
+            )
+        except FeedbackSubmissionError as e:
+            parser.error(str(e))
+
+        print()
+        for name, result in results.items():
+            print(f"{name}: {result.get('error') or result.get('number') or 'queued'}")
+        sys.exit(1 if any('error' in result for result in results.values()) else 0)
+
+    try:
+        create_feedback_sbo(
+            feedback_type=args.feedback_type,
+            message=args.message,
+            skill_name=args.skill_name,
+            conversation_context=conversation_context,
+            queue=args.queue,
+            dedup=not args.allow_duplicate,
+            append_duplicate=args.append_duplicate,
+            context_file=context_file,
+            instance=args.instance
+        )
+    except FeedbackSubmissionError:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+asyncio-native ServiceNow Session
+
+Same get/post/put/patch/delete surface and 401-refresh semantics as
+ServiceNowSession, built on a pooled httpx.AsyncClient so many submissions and
+status checks can be in flight on one event loop.
+
+Requires httpx:
+    pip3 install httpx
+"""
+
+import asyncio
+import functools
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .session_manager import (
+    ServiceNowSession,
+    AuthenticationError,
+    POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    REFRESH_AHEAD_SECONDS,
+    VALIDATION_TTL_SECONDS,
+    VALIDATION_WRITE_INTERVAL_SECONDS,
+    RATE_LIMIT_BURST,
+)
+from .circuit_breaker import CircuitOpenError, CLOSED, PROBE
+from . import timing
+
+
+class AsyncServiceNowSession(ServiceNowSession):
+    """
+    Async ServiceNow session with automatic refresh on session expiration.
+
+    Credentials are loaded and saved exactly like ServiceNowSession. The browser
+    login used for refresh is blocking, so it runs in the default executor; it
+    is coalesced so concurrent 401s on one session trigger a single refresh.
+    The executor thread only acquires the credentials: the shared
+    httpx.AsyncClient's cookies and X-UserToken are swapped on the loop
+    thread (_update_client), never under other tasks' in-flight requests.
+    The other shared-state calls - circuit breaker updates (file lock),
+    validation cache reads and writes (file or broker socket) - run in the
+    executor too, so a contended lock never stalls the event loop.
+
+    Usage:
+        async with AsyncServiceNowSession() as session:
+            response = await session.get(url, params={'sysparm_limit': 1})
+    """
+
+    def __init__(self, pool_maxsize=POOL_MAXSIZE, timeout=DEFAULT_TIMEOUT, retry_policy=None,
+                 rate_limit=None, rate_burst=RATE_LIMIT_BURST, circuit_breaker=None, use_broker=True,
+                 instance=None):
+        if httpx is None:
+            raise ImportError("httpx is not installed - install with: pip3 install httpx")
+
+        self._init_instance(instance, use_broker)
+        self.cookies = None
+        self.x_user_token = None
+        self.mfa_refresh_attempted = False  # Track MFA attempts this session
+        self.timeout = timeout
+        self.http = self._build_async_transport(pool_maxsize, timeout)
+        self._init_request_policies(retry_policy, rate_limit, rate_burst, circuit_breaker)
+        self._refresh_lock = threading.Lock()
+        self._async_refresh_lock = asyncio.Lock()
+        self.validated_at = None
+        self._validation_written_at = 0
+        self._client_stale = False
+        self.load_credentials()
+        self._update_client()  # No task can be using the client yet
+
+    @staticmethod
+    def _build_async_transport(pool_maxsize, timeout):
+        """Create the pooled keep-alive httpx.AsyncClient used for all calls"""
+        connect_timeout, read_timeout = timeout
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_maxsize,
+                max_keepalive_connections=pool_maxsize,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            headers={
+                'Accept': 'application/json',
+                'Content-Type': 'application/json',
+            },
+        )
+
+    def _apply_credentials(self):
+        """
+        Note that the client is out of date. This runs wherever the new
+        credentials were acquired (often an executor thread), so the client
+        itself is only updated by _update_client on the loop thread.
+        """
+        self._client_stale = True
+
+    def _update_client(self):
+        """Swap current cookies and X-UserToken onto the async client (loop thread)"""
+        if not self._client_stale:
+            return
+        self._client_stale = False
+        self.http.cookies.clear()
+        if self.cookies:
+            self.http.cookies.update(self.cookies)
+
+        if self.x_user_token:
+            self.http.headers['X-UserToken'] = self.x_user_token
+        else:
+            self.http.headers.pop('X-UserToken', None)
+
+    async def close(self):
+        """Close all pooled connections"""
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call (file lock, file I/O, broker round trip) in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def _mark_valid_async(self, persist=False):
+        """_mark_valid with its shared-cache write (when one is due) off the event loop"""
+        now = time.time()
+        if persist or now - self._validation_written_at >= VALIDATION_WRITE_INTERVAL_SECONDS:
+            await self._run_blocking(self._mark_valid, persist)
+        else:
+            self.validated_at = now
+
+    async def refresh_credentials_async(self, stale_token=None, headless=False,
+                                        interactive_fallback=True):
+        """
+        Run the (blocking, single-flight) credential refresh in an executor.
+
+        If another task already replaced ``stale_token`` (None when there were
+        no credentials at all) while this one was waiting for the lock, the
+        fresh credentials are reused instead of opening another browser.
+        """
+        async with self._async_refresh_lock:
+            if self.x_user_token and self.x_user_token != stale_token:
+                self._update_client()
+                return True
+
+            # Broker, file lock and browser in the executor; the client is
+            # updated back here on the loop thread
+            refreshed = await self._run_blocking(
+                self.refresh_credentials, headless, interactive_fallback, stale_token=stale_token
+            )
+            self._update_client()
+            return refreshed
+
+    async def test_credentials(self, use_cache=True):
+        """
+        Quick API call to validate if current session is valid.
+
+        Shares the validation cache with ServiceNowSession.test_credentials.
+
+        Returns:
+            True if credentials are valid, False otherwise
+        """
+        if not self.cookies or not self.x_user_token:
+            return False
+
+        if use_cache:
+            validated_at = await self._run_blocking(self._cached_validation)
+            if validated_at and time.time() - validated_at < VALIDATION_TTL_SECONDS:
+                return True
+
+        response = await self._ping()
+        if response is not None and response.status_code == 200:
+            await self._mark_valid_async(persist=True)
+            return True
+        return False
+
+    async def _ping(self):
+        """Async counterpart of ServiceNowSession._ping"""
+        self._update_client()
+        try:
+            url = f'{self.instance_url}/api/now/table/sys_user'
+            response = await self.http.get(
+                url, params={'sysparm_limit': 1, 'sysparm_fields': 'sys_id'}, timeout=10
+            )
+        except Exception:
+            await self._run_blocking(self.circuit.record_failure)
+            return None
+
+        if response.status_code >= 500:
+            await self._run_blocking(self.circuit.record_failure)
+        else:
+            await self._run_blocking(self.circuit.record_success)
+        return response
+
+    async def _check_circuit(self):
+        """Async counterpart of ServiceNowSession._check_circuit"""
+        decision = await self._run_blocking(self.circuit.before_request)
+        if decision == CLOSED:
+            return
+
+        if decision == PROBE:
+            print("🔌 Checking whether ServiceNow is reachable again...")
+            if self.cookies and self.x_user_token:
+                await self.test_credentials(use_cache=False)
+            else:
+                await self._ping()
+            if not await self._run_blocking(self.circuit.is_open):
+                print("✅ ServiceNow is reachable again")
+                return
+
+        timing.count('circuit_rejected')
+        remaining = await self._run_blocking(self.circuit.remaining_cooldown)
+        raise CircuitOpenError(f"ServiceNow is unreachable - not retrying for {remaining:.0f}s")
+
+    async def ensure_fresh(self):
+        """Async counterpart of ServiceNowSession.ensure_fresh"""
+        remaining = self.seconds_until_expiry()
+        if remaining is None or remaining > REFRESH_AHEAD_SECONDS:
+            return
+
+        # Only a 401 means the credentials are stale (see ServiceNowSession.ensure_fresh)
+        response = await self._ping()
+        if response is None or response.status_code != 401:
+            if response is not None and response.status_code == 200:
+                await self._mark_valid_async(persist=True)
+            return
+
+        print("⚠️  Session expired - refreshing before sending the request")
+        await self.refresh_credentials_async(stale_token=self.x_user_token, **self._refresh_options())
+
+    async def request(self, method, url, **kwargs):
+        """
+        Async wrapper around the pooled client with automatic retry on 401.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE, etc.)
+            url: Full URL to request
+            **kwargs: Additional arguments to pass to httpx
+
+        Returns:
+            httpx.Response object
+
+        Raises:
+            AuthenticationError: If credential refresh fails or credentials are invalid
+            CircuitOpenError: If the instance is known to be down (see CircuitBreaker)
+        """
+        await self._check_circuit()
+
+        # Ensure we have credentials
+        if not self.cookies or not self.x_user_token:
+            print("⚠️  No credentials found - triggering authentication...")
+            if not await self.refresh_credentials_async(**self._refresh_options()):
+                raise AuthenticationError("No credentials available and refresh failed")
+        else:
+            await self.ensure_fresh()
+
+        # Caller-supplied headers (e.g. an upload's Content-Type) take precedence
+        self._update_client()
+        kwargs['headers'] = {**self._get_headers(), **(kwargs.get('headers') or {})}
+
+        token_used = self.x_user_token
+        response, attempt = await self._send_with_retry(method, url, kwargs)
+
+        # Handle 401 Unauthorized (expired session)
+        if response.status_code == 401:
+            print("⚠️  Session expired (401 Unauthorized)")
+            timing.count('http_401')
+
+            if await self.refresh_credentials_async(stale_token=token_used, **self._refresh_options()):
+                print("🔄 Retrying original request...")
+                kwargs['headers']['X-UserToken'] = self.x_user_token
+                timing.count('retry', reason='401')
+                response, _ = await self._send_with_retry(method, url, kwargs, attempt + 1)
+
+                if response.status_code == 401:
+                    print("❌ Still getting 401 after refresh - credentials may be invalid")
+                    raise AuthenticationError("Credential refresh failed to resolve 401 error")
+            else:
+                print("\n❌ Automatic refresh failed")
+                raise AuthenticationError("Unable to refresh credentials automatically")
+
+        # Any non-401 answer means the session was accepted
+        await self._mark_valid_async()
+        return response
+
+    async def _send_with_retry(self, method, url, kwargs, attempt=1):
+        """Async counterpart of ServiceNowSession._send_with_retry"""
+        tries = 0
+        while True:
+            tries += 1
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    timing.record('rate_limit_wait', wait)
+                    await asyncio.sleep(wait)
+
+            try:
+                response = await self._send(method, url, attempt, kwargs)
+            except httpx.TransportError:
+                await self._run_blocking(self.circuit.record_failure)
+                raise
+
+            if response.status_code >= 500:
+                if await self._run_blocking(self.circuit.record_failure):
+                    return response, attempt
+            else:
+                await self._run_blocking(self.circuit.record_success)
+
+            delay = self.retry_policy.retry_delay(method, response.status_code, response.headers, tries)
+            if delay is None:
+                return response, attempt
+
+            if response.status_code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            print(f"⚠️  HTTP {response.status_code} from ServiceNow - retrying in {delay:.1f}s")
+            timing.count('retry', reason=str(response.status_code))
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, method, url, attempt, kwargs):
+        """Send one attempt over the pooled client (timed when SNOW_TIMING is set)"""
+        if not timing.enabled():
+            return await self.http.request(method, url, **kwargs)
+
+        with timing.span('request', method=method, path=httpx.URL(url).path, attempt=attempt) as span:
+            response = await self.http.request(method, url, **kwargs)
+            span.set(
+                status=response.status_code,
+                bytes_out=int(response.request.headers.get('Content-Length', 0)) or None,
+                bytes_in=len(response.content),
+                elapsed_ms=round(response.elapsed.total_seconds() * 1000, 3),
+            )
+        return response
+
+    async def get(self, url, **kwargs):
+        """Convenience method for GET requests"""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """Convenience method for POST requests"""
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        """Convenience method for PUT requests"""
+        return await self.request('PUT', url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        """Convenience method for DELETE requests"""
+        return await self.request('DELETE', url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        """Convenience method for PATCH requests"""
+        return await self.request('PATCH', url, **kwargs)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for ServiceNow Outages
+
+After CIRCUIT_FAILURE_THRESHOLD consecutive connection failures or 5xx
+responses the circuit opens: requests fail fast with CircuitOpenError instead
+of each waiting out a timeout against an instance that is down. After
+CIRCUIT_COOLDOWN_SECONDS one caller is allowed a probe (half-open); a
+successful probe closes the circuit, a failed one restarts the cooldown.
+
+The state lives in a small JSON file next to the cached credentials, keyed by
+instance URL, so every process - including short-lived CLI runs - sees an
+outage as soon as one of them has detected it. In the normal (closed, no
+failures) case nothing is written and the file is only re-read when its
+mtime changes.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    from .credential_store import atomic_write_json, read_json, file_lock
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, read_json, file_lock
+
+
+CIRCUIT_STATE_FILE = Path.home() / '.servicenow_surf_circuit.json'
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN_SECONDS = 60
+PROBE_LEASE_SECONDS = 15          # Other callers fail fast while a probe runs
+STATE_LOCK_TIMEOUT_SECONDS = 5
+
+CLOSED = 'closed'
+OPEN = 'open'
+PROBE = 'probe'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared across processes.
+
+    Usage:
+        decision = breaker.before_request()   # CLOSED, PROBE or OPEN
+        ... send ...
+        breaker.record_success() / breaker.record_failure()
+    """
+
+    def __init__(self, key, path=CIRCUIT_STATE_FILE, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown=CIRCUIT_COOLDOWN_SECONDS):
+        self.key = key
+        self.path = Path(path)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._cached = {}
+        self._cached_stat = None
+
+    def _state(self):
+        """This instance's state from the file (re-read only when it changed)"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            self._cached, self._cached_stat = {}, None
+            return {}
+
+        if signature != self._cached_stat:
+            self._cached = (read_json(self.path) or {}).get(self.key) or {}
+            self._cached_stat = signature
+        return self._cached
+
+    def _update(self, change):
+        """Read-modify-write this instance's state under the file lock"""
+        with self._lock:
+            try:
+                with file_lock(self.path, timeout=STATE_LOCK_TIMEOUT_SECONDS):
+                    data = read_json(self.path) or {}
+                    state = change(dict(data.get(self.key) or {}))
+                    if state:
+                        data[self.key] = state
+                    else:
+                        data.pop(self.key, None)
+                    atomic_write_json(self.path, data)
+            except (OSError, TimeoutError):
+                pass  # The breaker is an optimisation - never fail a request over it
+            self._cached_stat = None
+
+    def remaining_cooldown(self):
+        """Seconds until a probe is allowed (0 when closed or already due)"""
+        opened_at = self._state().get('opened_at')
+        if not opened_at:
+            return 0
+        return max(0.0, opened_at + self.cooldown - time.time())
+
+    def is_open(self):
+        return bool(self._state().get('opened_at'))
+
+    def before_request(self):
+        """
+        Decide whether a request may go out.
+
+        Returns:
+            CLOSED to send normally, PROBE if this caller should test the
+            instance first, OPEN to fail fast
+        """
+        state = self._state()
+        if not state.get('opened_at'):
+            return CLOSED
+
+        now = time.time()
+        if now < state['opened_at'] + self.cooldown or now < (state.get('probe_until') or 0):
+            return OPEN
+
+        # Cooldown over - let exactly one caller probe
+        claimed = []
+
+        def claim(state):
+            opened_at = state.get('opened_at')
+            if opened_at and now >= opened_at + self.cooldown and now >= (state.get('probe_until') or 0):
+                state['probe_until'] = now + PROBE_LEASE_SECONDS
+                claimed.append(True)
+            return state
+
+        self._update(claim)
+        return PROBE if claimed else OPEN
+
+    def record_success(self):
+        """The instance answered - close the circuit and reset the failure count"""
+        if self._state():
+            self._update(lambda state: {})
+
+    def record_failure(self):
+        """
+        Count a connection failure or 5xx response.
+
+        Returns:
+            True if the circuit is (now) open
+        """
+        opened = []
+
+        def fail(state):
+            now = time.time()
+            state['failures'] = state.get('failures', 0) + 1
+            if state.get('probe_until') or state['failures'] >= self.failure_threshold:
+                # Tripped, or a half-open probe failed - start a new cooldown
+                state['opened_at'] = now
+                state.pop('probe_until', None)
+            if state.get('opened_at'):
+                opened.append(True)
+            return state
+
+        self._update(fail)
+        return bool(opened)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Conversation Context Input
+
+Reads conversation context from a file or stdin in a streaming way and applies
+a byte budget by cutting the middle of long transcripts - the start (what the
+user was doing) and the end (the error) are the useful parts. Memory stays
+proportional to the budget, not to the input size.
+"""
+
+import sys
+from collections import deque
+
+
+DEFAULT_CONTEXT_MAX_BYTES = 256 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+LINE_ALIGN_BYTES = 512  # Snap cuts to a line break if one is this close
+
+
+def _truncation_marker(skipped_bytes):
+    return f"\n\n[... {skipped_bytes:,} bytes of conversation truncated ...]\n\n"
+
+
+def _join(head, tail, skipped_bytes):
+    """Decode head/tail bytes, snap the cut to line breaks and insert the marker"""
+    if skipped_bytes <= 0:
+        return (head + tail).decode('utf-8', errors='replace')
+
+    newline = head.rfind(b'\n')
+    if newline != -1 and len(head) - newline <= LINE_ALIGN_BYTES:
+        skipped_bytes += len(head) - newline - 1
+        head = head[:newline + 1]
+
+    newline = tail.find(b'\n')
+    if newline != -1 and newline < LINE_ALIGN_BYTES:
+        skipped_bytes += newline + 1
+        tail = tail[newline + 1:]
+
+    # errors='ignore' drops any multi-byte character split by the cut
+    return (
+        head.decode('utf-8', errors='ignore').rstrip('\n')
+        + _truncation_marker(skipped_bytes)
+        + tail.decode('utf-8', errors='ignore').lstrip('\n')
+    )
+
+
+def read_context_stream(stream, max_bytes=DEFAULT_CONTEXT_MAX_BYTES, spool=None):
+    """
+    Read a binary stream, keeping at most ``max_bytes`` (first and last halves).
+
+    Only the head and a rolling window of the tail are held in memory, so a
+    multi-megabyte transcript costs about ``max_bytes`` of memory. If ``spool``
+    (a binary file) is given, the complete input is also copied to it, e.g. so
+    stdin can be attached to the record in full.
+    """
+    head_budget = max_bytes // 2
+    tail_budget = max_bytes - head_budget
+
+    head = bytearray()
+    tail = deque()
+    tail_size = 0
+    skipped = 0
+
+    while True:
+        chunk = stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        if spool is not None:
+            spool.write(chunk)
+
+        if len(head) < head_budget:
+            take = head_budget - len(head)
+            head += chunk[:take]
+            chunk = chunk[take:]
+            if not chunk:
+                continue
+
+        tail.append(chunk)
+        tail_size += len(chunk)
+
+        # Drop whole chunks (then a partial one) that fell out of the window
+        while tail_size - len(tail[0]) >= tail_budget:
+            dropped = tail.popleft()
+            tail_size -= len(dropped)
+            skipped += len(dropped)
+        if tail_size > tail_budget:
+            excess = tail_size - tail_budget
+            tail[0] = tail[0][excess:]
+            tail_size -= excess
+            skipped += excess
+
+    return _join(bytes(head), b''.join(tail), skipped)
+
+
+def read_context(source, max_bytes=DEFAULT_CONTEXT_MAX_BYTES, spool=None):
+    """
+    Read conversation context from a path, or from stdin when ``source`` is '-'.
+
+    ``spool`` receives a full copy of stdin (see read_context_stream).
+    """
+    if source == '-':
+        return read_context_stream(sys.stdin.buffer, max_bytes, spool)
+
+    with open(source, 'rb') as f:
+        return read_context_stream(f, max_bytes)
+
+
+def truncate_context(text, max_bytes=DEFAULT_CONTEXT_MAX_BYTES):
+    """Apply the byte budget to context that is already in memory"""
+    if text is None or len(text) <= max_bytes // 4:
+        # Even at 4 bytes per character this fits - skip the encode
+        return text
+
+    data = text.encode('utf-8')
+    if len(data) <= max_bytes:
+        return text
+
+    head_budget = max_bytes // 2
+    tail_budget = max_bytes - head_budget
+    skipped = len(data) - head_budget - tail_budget
+    return _join(data[:head_budget], data[-tail_budget:], skipped)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Credential Broker
+
+Without the broker, every ServiceNowSession re-reads the cached session file,
+and each process decides on its own whether to ping the instance or open a
+login browser. The broker is one long-running local process that holds the
+current cookies and X-UserToken in memory. It validates and refreshes them on
+behalf of every tool process on the machine.
+
+Clients talk to it over a Unix socket in an owner-only directory
+(~/.servicenow_surf_broker/broker.sock, or SNOW_BROKER_SOCKET). On Linux,
+connections from other users are also rejected by peer credentials. The
+protocol is JSON lines: one request, one reply per connection.
+
+    {"op": "get"}                        current credentials
+    {"op": "valid", "token_key": ...}    a client's request was just accepted
+    {"op": "refresh", "stale_token_key": ..., "headless": false, ...}
+                                         refresh centrally (single flight)
+    {"op": "subscribe"}                  stay connected; every credential
+                                         change is pushed as a line
+    {"op": "status"} / {"op": "shutdown"}
+
+ServiceNowSession uses the broker automatically when its socket exists
+(SNOW_BROKER=0 turns that off), and falls back to the session file if the
+broker goes away.
+
+One broker serves one instance (see utils.instances); other instances get
+their own socket, broker.<name>.sock.
+
+Run it:
+    python3 src/utils/credential_broker.py run [--instance NAME]
+    python3 src/utils/credential_broker.py status [--instance NAME]
+    python3 src/utils/credential_broker.py stop [--instance NAME]
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+BROKER_DIR = Path.home() / '.servicenow_surf_broker'
+BROKER_SOCKET = BROKER_DIR / 'broker.sock'
+BROKER_SOCKET_ENV = 'SNOW_BROKER_SOCKET'
+BROKER_ENV = 'SNOW_BROKER'
+
+BROKER_TIMEOUT_SECONDS = 5
+# A refresh may be a full interactive Okta login + MFA
+BROKER_REFRESH_TIMEOUT_SECONDS = 330
+ACCEPT_POLL_SECONDS = 0.5
+# A subscriber that cannot take a pushed line this fast is dropped
+SUBSCRIBER_SEND_TIMEOUT_SECONDS = 2
+
+
+class BrokerUnavailable(Exception):
+    """Raised when the broker cannot be reached or answers nonsense"""
+    pass
+
+
+def broker_socket_path(instance=None):
+    """Socket of the broker for ``instance`` (SNOW_BROKER_SOCKET only moves the default instance's)"""
+    if instance is not None and not instance.is_default:
+        return BROKER_DIR / f'broker{instance.file_suffix}.sock'
+    return Path(os.path.expanduser(os.environ.get(BROKER_SOCKET_ENV) or BROKER_SOCKET))
+
+
+def token_key(token):
+    """Short hash identifying a token (tokens themselves only travel in credential replies)"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16] if token else None
+
+
+class BrokerClient:
+    """Client side of the broker protocol"""
+
+    def __init__(self, path=None, timeout=BROKER_TIMEOUT_SECONDS):
+        self.path = Path(path) if path else broker_socket_path()
+        self.timeout = timeout
+
+    @classmethod
+    def discover(cls, instance=None):
+        """A client for the instance's running broker, or None if there is no broker socket"""
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        if os.environ.get(BROKER_ENV, '').strip().lower() in ('0', 'false', 'no', 'off'):
+            return None
+        path = broker_socket_path(instance)
+        return cls(path) if path.exists() else None
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, op, timeout=None, **fields):
+        """
+        Send one request and return the reply dict.
+
+        Raises:
+            BrokerUnavailable: If the broker is not running or the reply is unreadable
+        """
+        try:
+            sock = self._connect(timeout or self.timeout)
+            with sock, sock.makefile('rwb') as stream:
+                stream.write(json.dumps(dict(fields, op=op)).encode('utf-8') + b'\n')
+                stream.flush()
+                line = stream.readline()
+            reply = json.loads(line)
+        except (OSError, ValueError) as e:
+            raise BrokerUnavailable(f"Credential broker at {self.path} is not answering: {e}") from e
+        if not isinstance(reply, dict):
+            raise BrokerUnavailable(f"Unexpected reply from the credential broker: {reply!r}")
+        return reply
+
+    def subscribe(self, callback):
+        """
+        Call ``callback(credentials)`` on a daemon thread for every credential
+        change the broker pushes. The thread ends quietly when the broker goes away.
+        """
+        def listen():
+            try:
+                sock = self._connect(self.timeout)
+                sock.settimeout(None)
+                with sock, sock.makefile('rwb') as stream:
+                    stream.write(b'{"op": "subscribe"}\n')
+                    stream.flush()
+                    for line in stream:
+                        callback(json.loads(line))
+            except (OSError, ValueError):
+                pass
+
+        thread = threading.Thread(target=listen, name='broker-subscription', daemon=True)
+        thread.start()
+        return thread
+
+
+def _peer_uid(sock):
+    """Uid of the process on the other end (Linux), or None where unsupported"""
+    import struct
+
+    option = getattr(socket, 'SO_PEERCRED', None)
+    if option is None:
+        return None
+    try:
+        _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, option, struct.calcsize('3i')))
+    except OSError:
+        return None
+    return uid
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CredentialBroker:
+    """
+    In-memory credential holder behind the socket.
+
+    Args:
+        session: ServiceNowSession to hold (default: a new one that reads the
+                 session file and never talks to a broker itself)
+        instance: Instance for the default session (default: the default instance)
+    """
+
+    def __init__(self, session=None, instance=None):
+        try:
+            from .session_manager import ServiceNowSession
+        except ImportError:  # Run as a script
+            sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+            from utils.session_manager import ServiceNowSession
+
+        self.session = session or ServiceNowSession(use_broker=False, instance=instance)
+        self.credentials_file = self.session.credentials_file
+        self.started_at = time.time()
+        self.stats = Counter()
+        self._refresh_lock = threading.Lock()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._file_signature = _signature(self.credentials_file)
+        self._stopping = threading.Event()
+
+    def credentials(self):
+        session = self.session
+        return {
+            'ok': True,
+            'cookies': session.cookies or {},
+            'x_user_token': session.x_user_token,
+            'validated_at': session.validated_at,
+        }
+
+    def _check_file(self):
+        """
+        Adopt credentials another (broker-less) process saved to the session file.
+
+        Returns:
+            bool: True if new credentials were adopted (the caller publishes them)
+        """
+        signature = _signature(self.credentials_file)
+        if signature == self._file_signature:
+            return False
+        self._file_signature = signature
+        if self.session._reload_if_refreshed(self.session.x_user_token):
+            self.stats['file_reloads'] += 1
+            return True
+        return False
+
+    def _line(self):
+        return (json.dumps(self.credentials()) + '\n').encode('utf-8')
+
+    def publish(self):
+        """Push the current credentials to every subscriber, dropping slow ones"""
+        line = self._line()
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for sock in subscribers:
+            self._send(sock, line)
+
+    def _send(self, sock, line):
+        """Send one line to a subscriber; drop it if the send fails or times out"""
+        try:
+            with self._send_lock:
+                sock.sendall(line)
+            return True
+        except OSError:  # Includes socket.timeout
+            if self._unsubscribe(sock):
+                self.stats['subscribers_dropped'] += 1
+            try:
+                # A partial line may have gone out: hang up so the client
+                # notices instead of reading garbage
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return False
+
+    def _unsubscribe(self, sock):
+        with self._subscribers_lock:
+            if sock in self._subscribers:
+                self._subscribers.remove(sock)
+                return True
+        return False
+
+    def refresh(self, stale_token_key, headless=False, interactive_fallback=True):
+        """Refresh once for all clients that saw the same stale token"""
+        session = self.session
+        failed = False
+        with self._refresh_lock:
+            changed = self._check_file()
+            if session.x_user_token and token_key(session.x_user_token) != stale_token_key:
+                self.stats['refresh_reused'] += 1
+            else:
+                self.stats['refreshes'] += 1
+                # Each client request may prompt for MFA again (the session's own
+                # guard is meant for one process's lifetime)
+                session.mfa_refresh_attempted = False
+                if session.refresh_credentials(headless=headless, interactive_fallback=interactive_fallback,
+                                               stale_token=session.x_user_token):
+                    self._file_signature = _signature(self.credentials_file)
+                    changed = True
+                else:
+                    failed = True
+
+        # Outside the lock: a slow subscriber must not hold up other refreshes
+        if changed:
+            self.publish()
+        if failed:
+            return {'ok': False, 'error': 'Credential refresh failed'}
+        return self.credentials()
+
+    def handle(self, request):
+        """Reply to one (non-subscribe) request"""
+        op = request.get('op')
+        self.stats[f'op_{op}'] += 1
+
+        if op == 'get':
+            if self._check_file():
+                self.publish()
+            return self.credentials()
+
+        if op == 'valid':
+            if request.get('token_key') and request.get('token_key') == token_key(self.session.x_user_token):
+                self.session._mark_valid()
+            return {'ok': True, 'validated_at': self.session.validated_at}
+
+        if op == 'refresh':
+            return self.refresh(request.get('stale_token_key'), bool(request.get('headless')),
+                                request.get('interactive_fallback', True))
+
+        if op == 'status':
+            remaining = self.session.seconds_until_expiry()
+            with self._subscribers_lock:
+                subscribers = len(self._subscribers)
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'instance': self.session.instance.name,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'has_credentials': bool(self.session.x_user_token),
+                'validated_at': self.session.validated_at,
+                'seconds_until_expiry': round(remaining, 1) if remaining is not None else None,
+                'subscribers': subscribers,
+                'stats': dict(self.stats),
+            }
+
+        if op == 'shutdown':
+            print("🔑 Credential broker shutting down")
+            self._stopping.set()
+            return {'ok': True}
+
+        return {'ok': False, 'error': f'Unknown op: {op!r}'}
+
+    def serve_connection(self, sock):
+        """Handle one client connection (runs on its own thread)"""
+        with sock, sock.makefile('rwb') as stream:
+            uid = _peer_uid(sock)
+            if uid is not None and uid != os.getuid():
+                self.stats['rejected'] += 1
+                return
+            try:
+                request = json.loads(stream.readline() or b'{}')
+            except ValueError:
+                request = {}
+
+            if request.get('op') == 'subscribe':
+                self.stats['op_subscribe'] += 1
+                # Pushes go straight to the socket with a send timeout, so
+                # one stalled client cannot block publish()
+                sock.settimeout(SUBSCRIBER_SEND_TIMEOUT_SECONDS)
+                with self._subscribers_lock:
+                    self._subscribers.append(sock)
+                try:
+                    if self._send(sock, self._line()):
+                        while True:  # Until the client hangs up (or is dropped)
+                            try:
+                                if not sock.recv(4096):
+                                    break
+                            except socket.timeout:
+                                continue
+                except OSError:
+                    pass
+                finally:
+                    self._unsubscribe(sock)
+                return
+
+            try:
+                reply = self.handle(request)
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            try:
+                stream.write((json.dumps(reply) + '\n').encode('utf-8'))
+                stream.flush()
+            except OSError:
+                pass
+
+    def serve_forever(self, path=None):
+        """
+        Listen on the broker socket until a shutdown request (or Ctrl-C).
+
+        Raises:
+            RuntimeError: If another broker is already listening on ``path``
+        """
+        path = Path(path) if path else broker_socket_path(self.session.instance)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(path.parent, 0o700)
+
+        if path.exists():
+            try:
+                BrokerClient(path, timeout=1).request('status')
+            except BrokerUnavailable:
+                path.unlink()  # Left behind by a broker that died
+            else:
+                raise RuntimeError(f"A credential broker is already running on {path}")
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(str(path))
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        listener.settimeout(ACCEPT_POLL_SECONDS)  # To notice a shutdown request
+
+        print(f"🔑 Credential broker for {self.session.instance_url} listening on {path} (pid {os.getpid()})")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    sock, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                sock.settimeout(None)
+                threading.Thread(target=self.serve_connection, args=(sock,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self.session.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared ServiceNow credential broker")
+    parser.add_argument('command', choices=['run', 'status', 'stop'])
+    parser.add_argument('--socket', help=f"Socket path (default: {BROKER_SOCKET})")
+    parser.add_argument('--instance', metavar='NAME',
+                        help="Configured instance to serve (default: the default instance)")
+    args = parser.parse_args()
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("❌ The credential broker needs Unix domain sockets", file=sys.stderr)
+        return 1
+
+    try:
+        from .instances import get_instance
+    except ImportError:  # Run as a script
+        from instances import get_instance
+    try:
+        instance = get_instance(args.instance)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.command == 'run':
+        try:
+            CredentialBroker(instance=instance).serve_forever(args.socket)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    client = BrokerClient(args.socket or broker_socket_path(instance))
+    try:
+        reply = client.request('status' if args.command == 'status' else 'shutdown')
+    except BrokerUnavailable as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
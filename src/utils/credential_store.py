@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Credential File Helpers
+
+Atomic writes and a cross-process lock for the cached ServiceNow session file,
+shared by session_manager.py and login_and_extract.py.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows - no cross-process locking
+    fcntl = None
+
+
+# Long enough for a full interactive Okta login + MFA
+LOCK_TIMEOUT_SECONDS = 330
+LOCK_POLL_SECONDS = 0.2
+
+
+def atomic_write_json(path, data):
+    """
+    Write JSON to ``path`` atomically.
+
+    The data is written to a temporary file in the same directory, fsync'd and
+    then renamed over the target, so readers never see a partially written file.
+    The file is created with owner-only permissions.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_json(path):
+    """Read a JSON file, returning None if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT_SECONDS):
+    """
+    Hold an exclusive cross-process lock on ``<path>.lock``.
+
+    Raises:
+        TimeoutError: If the lock could not be acquired within ``timeout`` seconds
+    """
+    if fcntl is None:
+        yield
+        return
+
+    lock_path = f'{path}.lock'
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock on {lock_path}")
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Local Near-Duplicate Index for Feedback
+
+Keeps a 64-bit SimHash fingerprint of every known feedback record (message plus
+skill name) in a local SQLite file so create_feedback_sbo can spot a likely
+duplicate before creating another SBO.
+
+Text is reduced to stemmed, stop-word-free tokens before hashing, so rewordings
+that keep the same key terms land within a few bits of each other.
+
+Fingerprints are split into eight 8-bit bands, each indexed together with the
+skill name. Any two fingerprints within Hamming distance 7 share at least one
+band exactly (pigeonhole), so a lookup is eight indexed equality probes plus a
+popcount on the candidates - well under a millisecond at tens of thousands of
+rows.
+
+Each entry also keeps the record's state (refreshed by seeds, feedback-store
+syncs and status lookups), so a new report of a regression is never matched
+to a closed or resolved SBO.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+DEDUP_INDEX_FILE = Path.home() / '.servicenow_surf_dedup.db'
+
+MAX_DISTANCE = 6      # Max Hamming distance (of 64 bits) to call a duplicate
+MIN_TOKENS = 4        # Shorter messages are too generic to fingerprint reliably
+BANDS = 8             # Must exceed MAX_DISTANCE for exact band matching to find all matches
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+BAND_COLUMNS = [f'b{i}' for i in range(BANDS)]
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9_]+')
+STOP_WORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has have i if in "
+    "is it just my no not of on or our should that the they this to was we were what when "
+    "which will with would you".split()
+)
+SUFFIXES = ('ing', 'ed', 's')
+
+# States counted as no longer open (compared case-insensitively, with display
+# values such as 'Closed Complete' folded to 'closed_complete')
+CLOSED_STATES = ('closed', 'closed_complete', 'closed_incomplete', 'closed_skipped',
+                 'cancelled', 'canceled', 'resolved', 'complete')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    number TEXT PRIMARY KEY,
+    sys_id TEXT,
+    skill TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    %s,
+    added_at REAL NOT NULL,
+    state TEXT
+);
+%s
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+""" % (
+    ',\n    '.join(f'{column} INTEGER NOT NULL' for column in BAND_COLUMNS),
+    # Covering indexes: candidate probes never touch the table itself
+    '\n'.join(f'CREATE INDEX IF NOT EXISTS fp_{column} ON fingerprints (skill, {column}, fingerprint);'
+              for column in BAND_COLUMNS),
+)
+
+INSERT_SQL = 'INSERT OR REPLACE INTO fingerprints (number, sys_id, skill, fingerprint, %s, added_at, state) VALUES (%s)' % (
+    ', '.join(BAND_COLUMNS), ', '.join('?' * (BANDS + 6))
+)
+
+FIND_SQL = ' UNION ALL '.join(
+    f'SELECT fingerprint, rowid FROM fingerprints WHERE skill = ? AND {column} = ?'
+    for column in BAND_COLUMNS
+)
+
+
+def normalize_skill(skill_name):
+    """Skill names are compared case-insensitively; no skill is ''"""
+    return (skill_name or '').strip().lower()
+
+
+def is_closed(state):
+    """True if ``state`` (a stored or display value) means the record is no longer open"""
+    return (state or '').strip().lower().replace(' ', '_') in CLOSED_STATES
+
+
+def _stem(word):
+    """Crude suffix stripping so 'failed'/'fails'/'failing' hash the same"""
+    for suffix in SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, stemmed word tokens without stop words"""
+    return [
+        _stem(word) for word in TOKEN_PATTERN.findall((text or '').lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def simhash(text):
+    """
+    64-bit SimHash of ``text``.
+
+    Returns:
+        Fingerprint as a signed 64-bit int (fits SQLite INTEGER), or None if the
+        text has fewer than MIN_TOKENS meaningful words
+    """
+    tokens = tokenize(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+
+    # Column-wise bit majority over the token hashes; counting characters in
+    # the transposed binary strings keeps the per-bit work in C
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for token in tokens
+    ]
+    half = len(hashes) / 2
+    bits = ''.join('1' if column.count('1') > half else '0' for column in zip(*hashes))
+    fingerprint = int(bits, 2)
+
+    # Store as signed so SQLite can hold it
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def _bands(fingerprint):
+    unsigned = fingerprint & ((1 << 64) - 1)
+    return [(unsigned >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+
+def hamming(a, b):
+    """Number of differing bits between two fingerprints"""
+    return bin((a ^ b) & ((1 << 64) - 1)).count('1')
+
+
+class DuplicateIndex:
+    """
+    SQLite-backed SimHash index of existing feedback records.
+
+    One connection is kept open for the lifetime of the index (opening a new
+    one re-reads the schema, which costs more than the lookup itself) and is
+    shared between threads under a lock.
+    """
+
+    def __init__(self, path=DEDUP_INDEX_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add the state column to an index created before it existed"""
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(fingerprints)')]
+        if 'state' not in columns:
+            self._conn.execute('ALTER TABLE fingerprints ADD COLUMN state TEXT')
+            # The next seed fetches every record again, with its state
+            self._conn.execute("DELETE FROM meta WHERE key = 'sys_updated_on'")
+
+    @contextmanager
+    def _connection(self):
+        with self._lock:
+            yield self._conn
+
+    def close(self):
+        self._conn.close()
+
+    def add(self, number, sys_id, skill_name, message, state=None):
+        """
+        Index one feedback record.
+
+        Returns:
+            True if the record was indexed (False if the message is too short)
+        """
+        fingerprint = simhash(message)
+        if fingerprint is None:
+            return False
+
+        with self._connection() as conn:
+            conn.execute(
+                INSERT_SQL,
+                (number, sys_id, normalize_skill(skill_name), fingerprint,
+                 *_bands(fingerprint), time.time(), state)
+            )
+        return True
+
+    def add_many(self, records):
+        """
+        Index (number, sys_id, skill_name, message, state) tuples in one transaction.
+
+        Returns:
+            Number of records indexed
+        """
+        rows = []
+        now = time.time()
+        for number, sys_id, skill_name, message, state in records:
+            fingerprint = simhash(message)
+            if fingerprint is not None:
+                rows.append((number, sys_id, normalize_skill(skill_name), fingerprint,
+                             *_bands(fingerprint), now, state))
+
+        with self._connection() as conn:
+            conn.execute('BEGIN')
+            conn.executemany(INSERT_SQL, rows)
+            conn.execute('COMMIT')
+        return len(rows)
+
+    def set_states(self, states):
+        """
+        Record the current state of already indexed records.
+
+        Args:
+            states: Iterable of (number, state) pairs; unknown numbers are ignored
+        """
+        with self._connection() as conn:
+            conn.execute('BEGIN')
+            conn.executemany('UPDATE fingerprints SET state = ? WHERE number = ?',
+                             [(state, number) for number, state in states])
+            conn.execute('COMMIT')
+
+    def find(self, skill_name, message, max_distance=MAX_DISTANCE):
+        """
+        Find the closest indexed record for the same skill that is still open.
+
+        Returns:
+            {'number', 'sys_id', 'distance'} dict, or None if no open record is
+            within ``max_distance``
+        """
+        fingerprint = simhash(message)
+        if fingerprint is None:
+            return None
+
+        skill = normalize_skill(skill_name)
+        params = []
+        for band in _bands(fingerprint):
+            params.extend((skill, band))
+
+        with self._connection() as conn:
+            candidates = conn.execute(FIND_SQL, params).fetchall()
+
+            matches = {}
+            for other, rowid in candidates:
+                distance = hamming(fingerprint, other)
+                if distance <= max_distance:
+                    matches[rowid] = distance
+
+            # Closest first; closed records are skipped
+            for rowid, distance in sorted(matches.items(), key=lambda item: item[1]):
+                number, sys_id, state = conn.execute(
+                    'SELECT number, sys_id, state FROM fingerprints WHERE rowid = ?', (rowid,)
+                ).fetchone()
+                if not is_closed(state):
+                    return {'number': number, 'sys_id': sys_id, 'distance': distance}
+
+        return None
+
+    def get_meta(self, key):
+        with self._connection() as conn:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def __len__(self):
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
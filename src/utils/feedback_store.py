@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Local Analytics Store of Feedback Records
+
+A SQLite copy of the feedback table, kept current by incremental syncs
+(submit_feedback.py --sync_feedback_store). Triage questions - feedback per
+skill, how long bugs have been open, which reports are duplicates of each
+other - become local queries instead of full-table API scans.
+
+Each sync pages forward from a sys_updated_on watermark that is committed
+together with the rows it covers, so an interrupted sync picks up where it
+stopped and a repeated one only transfers records changed since.
+
+Report on the local copy:
+    python3 src/utils/feedback_store.py report [--skill NAME] [--json]
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    from .dedup_index import MAX_DISTANCE, BANDS, BAND_BITS, BAND_MASK, CLOSED_STATES, normalize_skill
+except ImportError:  # Run as a script
+    from dedup_index import MAX_DISTANCE, BANDS, BAND_BITS, BAND_MASK, CLOSED_STATES, normalize_skill
+
+
+FEEDBACK_STORE_FILE = Path.home() / '.servicenow_surf_feedback.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    sys_id TEXT PRIMARY KEY,
+    number TEXT,
+    feedback_type TEXT,
+    skill TEXT NOT NULL,
+    state TEXT,
+    short_description TEXT,
+    message TEXT,
+    assigned_to TEXT,
+    sys_created_on TEXT,
+    sys_updated_on TEXT,
+    closed_at TEXT,
+    fingerprint INTEGER,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_skill ON feedback (skill, feedback_type);
+CREATE INDEX IF NOT EXISTS feedback_open ON feedback (feedback_type, state, sys_created_on);
+CREATE INDEX IF NOT EXISTS feedback_updated ON feedback (sys_updated_on);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = ('sys_id', 'number', 'feedback_type', 'skill', 'state', 'short_description', 'message',
+           'assigned_to', 'sys_created_on', 'sys_updated_on', 'closed_at', 'fingerprint', 'synced_at')
+
+UPSERT_SQL = 'INSERT OR REPLACE INTO feedback (%s) VALUES (%s)' % (
+    ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))
+)
+
+_CLOSED_SQL = "LOWER(COALESCE(state, '')) IN (%s)" % ', '.join("'%s'" % state for state in CLOSED_STATES)
+
+
+class FeedbackStore:
+    """
+    SQLite store of synced feedback records, keyed by sys_id.
+
+    Like DuplicateIndex, one connection is kept open and shared between
+    threads under a lock.
+    """
+
+    def __init__(self, path=FEEDBACK_STORE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connection(self):
+        with self._lock:
+            yield self._conn
+
+    def close(self):
+        self._conn.close()
+
+    def upsert_many(self, rows, meta=None):
+        """
+        Store feedback rows (dicts with COLUMNS keys, synced_at optional) and
+        update ``meta`` in the same transaction, so a watermark never gets
+        ahead of the rows it covers.
+
+        Returns:
+            Number of rows written
+        """
+        now = time.time()
+        values = [tuple(row.get(column) for column in COLUMNS[:-1]) + (now,) for row in rows]
+
+        with self._connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(UPSERT_SQL, values)
+                for key, value in (meta or {}).items():
+                    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return len(values)
+
+    def get_meta(self, key):
+        with self._connection() as conn:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def reset(self):
+        """Forget all rows and the sync watermark (the next sync is a full one)"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM feedback')
+            conn.execute('DELETE FROM meta')
+
+    def __len__(self):
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM feedback').fetchone()[0]
+
+    def skill_counts(self, since=None):
+        """
+        Feedback per skill and type.
+
+        Args:
+            since: Only count records created at or after this ServiceNow date-time
+
+        Returns:
+            List of {'skill', 'feedback_type', 'total', 'open'}, busiest skill first
+        """
+        sql = (
+            f"SELECT skill, COALESCE(feedback_type, ''), COUNT(*), SUM(NOT ({_CLOSED_SQL})) "
+            "FROM feedback"
+        )
+        params = []
+        if since:
+            sql += ' WHERE sys_created_on >= ?'
+            params.append(since)
+        sql += ' GROUP BY skill, feedback_type ORDER BY SUM(COUNT(*)) OVER (PARTITION BY skill) DESC, skill, 3 DESC'
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {'skill': skill, 'feedback_type': feedback_type, 'total': total, 'open': open_count}
+            for skill, feedback_type, total, open_count in rows
+        ]
+
+    def open_bugs(self, skill_name=None, now=None):
+        """
+        Open bug reports, oldest first.
+
+        Returns:
+            List of {'number', 'skill', 'state', 'sys_created_on', 'age_days'}
+        """
+        now = now or time.time()
+        sql = (
+            "SELECT number, skill, state, sys_created_on, "
+            "(? - CAST(strftime('%s', sys_created_on) AS REAL)) / 86400.0 "
+            f"FROM feedback WHERE feedback_type = 'bug' AND NOT ({_CLOSED_SQL}) "
+            "AND COALESCE(closed_at, '') = ''"
+        )
+        params = [now]
+        if skill_name is not None:
+            sql += ' AND skill = ?'
+            params.append(normalize_skill(skill_name))
+        sql += ' ORDER BY sys_created_on'
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {'number': number, 'skill': skill, 'state': state, 'sys_created_on': created,
+             'age_days': round(age, 1) if age is not None else None}
+            for number, skill, state, created, age in rows
+        ]
+
+    def duplicate_clusters(self, skill_name=None, max_distance=MAX_DISTANCE, min_size=2):
+        """
+        Group near-duplicate reports of the same skill.
+
+        Records are linked when their SimHash fingerprints are within
+        ``max_distance`` bits (the same test DuplicateIndex uses at submit
+        time). Two fingerprints that close agree exactly on at least
+        BANDS - max_distance of the 8-bit bands, so with the default
+        distance candidates are bucketed by *pairs* of bands (16-bit keys):
+        buckets stay small even for a skill with tens of thousands of
+        reports, and the table is clustered in one pass.
+
+        Returns:
+            List of clusters (lists of SBO numbers, oldest first), largest first
+        """
+        sql = 'SELECT number, skill, fingerprint FROM feedback WHERE fingerprint IS NOT NULL'
+        params = []
+        if skill_name is not None:
+            sql += ' AND skill = ?'
+            params.append(normalize_skill(skill_name))
+        sql += ' ORDER BY sys_created_on, number'
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        parent = list(range(len(rows)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        if BANDS - max_distance >= 2:
+            keys = [(a, b) for a in range(BANDS) for b in range(a + 1, BANDS)]
+        else:
+            keys = [(a, a) for a in range(BANDS)]
+
+        # One pass per band key. Keys are packed ints (skill id above the 16
+        # band bits) counted in C; only rows sharing a key are compared
+        skill_ids = {}
+        prefixes = [skill_ids.setdefault(skill, len(skill_ids)) << (2 * BAND_BITS) for _, skill, _ in rows]
+        fingerprints = [fingerprint & 0xFFFFFFFFFFFFFFFF for _, _, fingerprint in rows]
+        for a, b in keys:
+            shift_a, shift_b = a * BAND_BITS, b * BAND_BITS
+            band_keys = [
+                prefix | ((unsigned >> shift_a) & BAND_MASK) << BAND_BITS | ((unsigned >> shift_b) & BAND_MASK)
+                for prefix, unsigned in zip(prefixes, fingerprints)
+            ]
+            shared = {key for key, count in Counter(band_keys).items() if count > 1}
+            if not shared:
+                continue
+
+            buckets = {}
+            for i, key in enumerate(band_keys):
+                if key in shared:
+                    buckets.setdefault(key, []).append(i)
+
+            for members in buckets.values():
+                for position, i in enumerate(members):
+                    fingerprint = fingerprints[i]
+                    for j in members[position + 1:]:
+                        if bin(fingerprint ^ fingerprints[j]).count('1') <= max_distance:
+                            root_i, root_j = find(i), find(j)
+                            if root_i != root_j:
+                                parent[root_j] = root_i
+
+        clusters = {}
+        for i, (number, _, _) in enumerate(rows):
+            clusters.setdefault(find(i), []).append(number)
+
+        result = [members for members in clusters.values() if len(members) >= min_size]
+        result.sort(key=len, reverse=True)
+        return result
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Query the local feedback store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report = subparsers.add_parser('report', help="Per-skill counts, open bug ages and duplicate clusters")
+    report.add_argument('--skill', help="Limit open bugs and duplicates to one skill")
+    report.add_argument('--db', default=str(FEEDBACK_STORE_FILE), help="Store file")
+    report.add_argument('--json', action='store_true', help="Print the machine-readable report")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"No feedback store at {args.db} - run submit_feedback.py --sync_feedback_store first",
+              file=sys.stderr)
+        return 1
+
+    store = FeedbackStore(args.db)
+    summary = {
+        'records': len(store),
+        'synced_through': store.get_meta('sys_updated_on'),
+        'skills': store.skill_counts(),
+        'open_bugs': store.open_bugs(args.skill),
+        'duplicate_clusters': store.duplicate_clusters(args.skill),
+    }
+    store.close()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"{summary['records']} records (updated through {summary['synced_through'] or '-'} UTC)\n")
+    print(f"{'skill':<32} {'type':<12} {'total':>7} {'open':>7}")
+    for row in summary['skills']:
+        print(f"{row['skill'] or '(none)':<32} {row['feedback_type'] or '-':<12} {row['total']:>7} {row['open']:>7}")
+
+    print(f"\nOpen bugs: {len(summary['open_bugs'])}")
+    for bug in summary['open_bugs'][:20]:
+        age = f"{bug['age_days']:.0f}d" if bug['age_days'] is not None else '?'
+        print(f"  {bug['number']:<14} {age:>6}  {bug['skill'] or '(none)'}  [{bug['state']}]")
+
+    print(f"\nDuplicate clusters: {len(summary['duplicate_clusters'])}")
+    for cluster in summary['duplicate_clusters'][:20]:
+        print(f"  {len(cluster):>3}  {', '.join(cluster)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
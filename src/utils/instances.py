@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+ServiceNow Instances and Per-Instance Session Pools
+
+Feedback intake can target more than one instance, e.g. production and a
+dev clone, or a staging copy that every submission is mirrored to.
+Instances are configured in ~/.servicenow_surf_instances.json:
+
+    {
+      "default": "prod",
+      "instances": {
+        "prod": {"url": "https://surf.service-now.com"},
+        "dev": {"url": "https://surfdev.service-now.com", "table": "x_snc_security_d_0_dsrtable"}
+      },
+      "mirror": ["dev"]
+    }
+
+Without the file there is a single instance, 'default', at SNOW_INSTANCE (or
+the production URL). SNOW_INSTANCE_NAME selects the default by name, and
+SNOW_INSTANCE still overrides the default instance's URL.
+
+Every instance has its own credentials file, validation cache and broker
+socket, so logging in to one never overwrites another's session. The default
+instance keeps the original file names. get_session() hands out one pooled
+ServiceNowSession per instance for the life of the process.
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+try:
+    from .credential_store import read_json
+except ImportError:  # Run as a script
+    from credential_store import read_json
+
+
+INSTANCES_FILE = Path.home() / '.servicenow_surf_instances.json'
+DEFAULT_INSTANCE_NAME = 'default'
+DEFAULT_INSTANCE_URL = 'https://surf.service-now.com'
+DEFAULT_TABLE = 'x_snc_security_d_0_dsrtable'
+INSTANCE_URL_ENV = 'SNOW_INSTANCE'
+INSTANCE_NAME_ENV = 'SNOW_INSTANCE_NAME'
+
+_UNSAFE_FILE_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class Instance:
+    """
+    One configured instance.
+
+    Attributes:
+        name: Configuration name ('prod', 'dev', ...)
+        url: Base URL without a trailing slash
+        table: Feedback table
+        is_default: True for the default instance (which keeps the legacy file names)
+        file_suffix: '' for the default instance, '.<name>' otherwise - appended
+                     to the per-instance cache file names
+    """
+
+    def __init__(self, name, url, table=DEFAULT_TABLE, is_default=False):
+        self.name = name
+        self.url = url.rstrip('/')
+        self.table = table or DEFAULT_TABLE
+        self.is_default = is_default
+        self.file_suffix = '' if is_default else '.' + _UNSAFE_FILE_CHARS.sub('_', name)
+        self.credentials_file = Path.home() / f'.servicenow_surf_session{self.file_suffix}.json'
+        self.validation_cache_file = Path.home() / f'.servicenow_surf_validation{self.file_suffix}.json'
+
+    def __repr__(self):
+        return f"Instance({self.name!r}, {self.url!r}, table={self.table!r})"
+
+
+def load_instances(path=INSTANCES_FILE):
+    """
+    Read the instance configuration.
+
+    Returns:
+        ({name: Instance}, default name, [mirror names])
+
+    Raises:
+        ValueError: If the file names a default or mirror that is not
+                    configured, or an instance has no url
+    """
+    config = read_json(path) or {}
+    entries = config.get('instances') if isinstance(config.get('instances'), dict) else {}
+
+    default = os.environ.get(INSTANCE_NAME_ENV) or config.get('default') or \
+        (next(iter(entries)) if entries else DEFAULT_INSTANCE_NAME)
+    if entries and default not in entries:
+        raise ValueError(f"Unknown default ServiceNow instance {default!r} (configured: {', '.join(entries)})")
+
+    instances = {}
+    if not entries:
+        # No instances file: a single instance under the selected default name
+        url = os.environ.get(INSTANCE_URL_ENV) or DEFAULT_INSTANCE_URL
+        instances[default] = Instance(default, url, is_default=True)
+
+    for name, entry in entries.items():
+        entry = entry if isinstance(entry, dict) else {'url': entry}
+        url = entry.get('url')
+        if name == default:
+            url = os.environ.get(INSTANCE_URL_ENV) or url
+        # No fallback URL: a typo must not send a mirror's records to production
+        if not url or not isinstance(url, str):
+            raise ValueError(f"ServiceNow instance {name!r} has no 'url' in {path}")
+        instances[name] = Instance(name, url, entry.get('table'), is_default=(name == default))
+
+    mirror = config.get('mirror') or []
+    if isinstance(mirror, str):
+        mirror = [mirror]
+    unknown = [name for name in mirror if name not in instances]
+    if unknown:
+        raise ValueError(f"Unknown mirror instance(s): {', '.join(unknown)}")
+
+    return instances, default, [name for name in mirror if name != default]
+
+
+# Configuration read on first use and kept for the process
+_config = None
+_config_lock = threading.Lock()
+
+
+def _configuration():
+    global _config
+
+    with _config_lock:
+        if _config is None:
+            _config = load_instances()
+        return _config
+
+
+def get_instance(name=None):
+    """
+    The named instance (default: the configured default).
+
+    Raises:
+        ValueError: If no instance of that name is configured
+    """
+    instances, default, _ = _configuration()
+    instance = instances.get(name or default)
+    if instance is None:
+        raise ValueError(f"Unknown ServiceNow instance {name!r} (configured: {', '.join(instances)})")
+    return instance
+
+
+def instance_names():
+    """Configured instance names, default first"""
+    instances, default, _ = _configuration()
+    return [default] + [name for name in instances if name != default]
+
+
+def mirror_instances():
+    """Names of the instances every submission is mirrored to (the 'mirror' setting)"""
+    return list(_configuration()[2])
+
+
+# One pooled session per instance, created on first use
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name=None):
+    """Return the process-wide ServiceNowSession for an instance, creating it on first use."""
+    try:
+        from .session_manager import ServiceNowSession
+    except ImportError:  # Run as a script
+        from session_manager import ServiceNowSession
+
+    instance = get_instance(name)
+    with _sessions_lock:
+        session = _sessions.get(instance.name)
+        if session is None:
+            session = _sessions[instance.name] = ServiceNowSession(instance=instance)
+        return session
+
+
+def close_sessions():
+    """Close every pooled session"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
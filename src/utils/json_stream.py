@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Incremental Parsing of Table API Responses
+
+A Table API page is one JSON document, ``{"result": [{...}, {...}, ...]}``.
+Loading a page of thousands of records with response.json() holds the raw
+body, the decoded text and every record in memory at once. iter_results()
+instead decodes the ``result`` array one record at a time from the streamed
+body, so each record can be stored and dropped while the rest of the page is
+still arriving.
+"""
+
+import codecs
+import json
+import re
+
+
+READ_CHUNK_BYTES = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+# Where a number / true / false / null item ends
+_SCALAR_END = re.compile(r'[ \t\n\r,\]]')
+
+
+class StreamParseError(ValueError):
+    """Raised when a streamed body is not a Table API result document"""
+    pass
+
+
+def iter_json_array(chunks, key='result'):
+    """
+    Yield the items of the top-level ``key`` array of a JSON object.
+
+    Args:
+        chunks: Iterable of bytes (or str) pieces of the document
+        key: Name of the array member (must be the document's first member)
+
+    Raises:
+        StreamParseError: If the document does not start with that array or ends early
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    finished = False
+
+    def more():
+        nonlocal buffer, position, finished
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            finished = True
+            buffer = buffer[position:] + utf8.decode(b'', final=True)
+        else:
+            text = utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            # Drop what has been consumed so the buffer stays about one record long
+            buffer = buffer[position:] + text
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer) or finished:
+                return
+            more()
+
+    # Opening '{"<key>": [' - the key is decoded like any other string
+    for expected in ('{', 'key', ':', '['):
+        skip_whitespace()
+        if expected == 'key':
+            while True:
+                try:
+                    name, position = decoder.raw_decode(buffer, position)
+                    break
+                except ValueError:
+                    if finished:
+                        raise StreamParseError(f"Expected a {key!r} member") from None
+                    more()
+            if name != key:
+                raise StreamParseError(f"Expected a {key!r} member, got {name!r}")
+            continue
+        if position >= len(buffer) or buffer[position] != expected:
+            raise StreamParseError(f"Expected {expected!r} at {buffer[position:position + 40]!r}")
+        position += 1
+
+    first = True
+    while True:
+        skip_whitespace()
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        if not first:
+            if position >= len(buffer) or buffer[position] != ',':
+                raise StreamParseError("Truncated or malformed result array")
+            position += 1
+            skip_whitespace()
+
+        while True:
+            # A number may be split anywhere ('1.' + '5', '1e' + '5'): keep
+            # it pending until its delimiter has arrived, as for strings
+            if (not finished and position < len(buffer) and buffer[position] not in '{["'
+                    and not _SCALAR_END.search(buffer, position)):
+                more()
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # Usually an item split across chunks - wait for the rest
+                if finished:
+                    raise StreamParseError("Truncated or malformed result array") from None
+                more()
+                skip_whitespace()
+                continue
+            break
+
+        position = end
+        first = False
+        yield item
+
+
+def iter_results(response, chunk_size=READ_CHUNK_BYTES):
+    """
+    Yield the records of a Table API response requested with ``stream=True``.
+
+    The connection goes back to the pool once the body has been read (or the
+    generator is closed early).
+    """
+    try:
+        yield from iter_json_array(response.iter_content(chunk_size=chunk_size))
+    finally:
+        response.close()
@@ -9,32 +9,106 @@ import os
 import sys
 import time
 import json
+import atexit
+import importlib.util
+import threading
+from contextlib import ExitStack
+from types import SimpleNamespace
 
-# Check for selenium
-try:
-    from selenium import webdriver
-    from selenium.webdriver.safari.options import Options as SafariOptions
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from selenium.webdriver.chrome.service import Service as ChromeService
-    from selenium.webdriver.support.ui import WebDriverWait
+# selenium and webdriver_manager are imported lazily (see _import_selenium)
+# so importing this module - e.g. from session_manager - stays cheap
+HAS_WEBDRIVER_MANAGER = importlib.util.find_spec('webdriver_manager') is not None
+
+
+def _import_selenium():
+    """
+    Import the selenium pieces used for browser login.
+
+    Returns:
+        SimpleNamespace of the selenium classes used below
+
+    Raises:
+        ImportError: If selenium is not installed
+    """
     try:
-        from webdriver_manager.chrome import ChromeDriverManager
-        HAS_WEBDRIVER_MANAGER = True
+        from selenium import webdriver
+        from selenium.webdriver.safari.options import Options as SafariOptions
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import JavascriptException, TimeoutException
     except ImportError:
-        HAS_WEBDRIVER_MANAGER = False
-except ImportError:
-    print("❌ selenium is not installed.")
-    print("\nInstall with:")
-    print("  pip3 install selenium")
-    print("\nOptionally for Chrome auto-driver:")
-    print("  pip3 install webdriver-manager")
-    sys.exit(1)
-
-INSTANCE_URL = 'https://surf.service-now.com'
+        print("❌ selenium is not installed.")
+        print("\nInstall with:")
+        print("  pip3 install selenium")
+        print("\nOptionally for Chrome auto-driver:")
+        print("  pip3 install webdriver-manager")
+        raise
+
+    return SimpleNamespace(
+        webdriver=webdriver,
+        SafariOptions=SafariOptions,
+        ChromeOptions=ChromeOptions,
+        ChromeService=ChromeService,
+        WebDriverWait=WebDriverWait,
+        TimeoutException=TimeoutException,
+        JavascriptException=JavascriptException,
+    )
+
+try:
+    from .credential_store import atomic_write_json, file_lock, read_json
+    from .instances import get_instance
+    from . import timing
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, file_lock, read_json
+    from instances import get_instance
+    import timing
+
+INSTANCE_URL = os.getenv('SNOW_INSTANCE', 'https://surf.service-now.com').rstrip('/')
 CREDENTIALS_FILE = os.path.expanduser('~/.servicenow_surf_session.json')
 
-def save_credentials(cookies, x_user_token):
-    """Save credentials to disk for the skill to use"""
+# Resolved chromedriver path, reused instead of asking webdriver_manager (which
+# may go to the network) on every login. SNOW_CHROMEDRIVER pins a driver.
+DRIVER_CACHE_FILE = os.path.expanduser('~/.servicenow_surf_chromedriver.json')
+DRIVER_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Opt-in persistent Chrome profile (SNOW_BROWSER_PROFILE=1, or a directory):
+# the Okta session survives in it, so headless refreshes usually need no
+# human step. Only one browser can use it at a time.
+DEFAULT_BROWSER_PROFILE_DIR = os.path.expanduser('~/.servicenow_surf_browser_profile')
+PROFILE_LOCK_TIMEOUT_SECONDS = 2
+
+# Warm headless browser kept between refreshes (see keep_browser_alive)
+KEEP_BROWSER_ALIVE = False
+_warm_browser = None
+_warm_lock = threading.Lock()
+
+# Explicit waits: how long to wait for the login itself, and for each
+# condition after it (page ready, cookies set, g_ck defined)
+LOGIN_TIMEOUT_SECONDS = 300
+HEADLESS_LOGIN_TIMEOUT_SECONDS = 30
+SETTLE_TIMEOUT_SECONDS = 5
+WAIT_POLL_SECONDS = 0.1
+
+SESSION_COOKIES = ('JSESSIONID', 'glide_user_route')
+# Instance pages that are still part of the login flow
+LOGIN_PATHS = ('login.do', 'login_with_sso', 'login_redirect', 'saml', 'logout')
+MFA_URL_MARKERS = ('okta-verify', 'mfa', 'multifactor', 'duo')
+TOKEN_HEADER = 'x-usertoken'
+# Cheap authenticated call: the session cookies are also set on the first
+# anonymous hit (before the SSO redirect), so they alone prove nothing
+AUTH_PROBE_PATH = '/api/now/table/sys_user?sysparm_limit=1&sysparm_fields=sys_id'
+_AUTH_PROBE_SCRIPT = """
+var xhr = new XMLHttpRequest();
+xhr.open('GET', arguments[0], false);
+xhr.setRequestHeader('Accept', 'application/json');
+try { xhr.send(); } catch (e) { return 0; }
+return xhr.status;
+"""
+MFA_PAGE_MARKERS = ('verify your identity', 'authentication required', 'push notification')
+
+def save_credentials(cookies, x_user_token, path=None):
+    """Save credentials to disk for the skill to use (default: CREDENTIALS_FILE)"""
     from datetime import datetime
 
     credentials = {
@@ -45,41 +119,332 @@ def save_credentials(cookies, x_user_token):
         'timestamp': datetime.now().isoformat()
     }
 
+    path = path or CREDENTIALS_FILE
     try:
-        with open(CREDENTIALS_FILE, 'w') as f:
-            json.dump(credentials, f, indent=2)
-        print(f"\n✅ Credentials saved to {CREDENTIALS_FILE}")
+        atomic_write_json(path, credentials)
+        print(f"\n✅ Credentials saved to {path}")
         return True
     except Exception as e:
         print(f"⚠️  Failed to save credentials: {e}")
         return False
 
-def get_session_from_browser(use_chrome=True, headless=False):
+def resolve_chromedriver(refresh=False):
+    """
+    Path of the chromedriver binary to use.
+
+    SNOW_CHROMEDRIVER wins; otherwise the path webdriver_manager resolved last
+    time is reused until it is DRIVER_CACHE_TTL_SECONDS old or has gone away.
+
+    Args:
+        refresh: Ignore the cached path (e.g. the cached driver no longer
+                 matches the installed Chrome)
+    """
+    pinned = os.environ.get('SNOW_CHROMEDRIVER')
+    if pinned:
+        return pinned
+
+    cached = read_json(DRIVER_CACHE_FILE) or {}
+    path = cached.get('path')
+    if (not refresh and path and os.path.isfile(path)
+            and time.time() - cached.get('resolved_at', 0) < DRIVER_CACHE_TTL_SECONDS):
+        return path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    with timing.span('browser.driver_install'):
+        path = ChromeDriverManager().install()
+    try:
+        atomic_write_json(DRIVER_CACHE_FILE, {'path': path, 'resolved_at': time.time()})
+    except OSError:
+        pass  # Resolved again next time
+    return path
+
+
+def _wait_for(selenium, driver, condition, timeout):
+    """
+    Poll ``condition(driver)`` until it is truthy; returns its value, or None
+    on timeout. Script errors while a page is mid-navigation count as "not yet".
+    """
+    try:
+        wait = selenium.WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_SECONDS,
+                                      ignored_exceptions=(selenium.JavascriptException,))
+        return wait.until(condition)
+    except selenium.TimeoutException:
+        return None
+
+
+class TokenCapture:
+    """
+    X-UserToken seen in the browser's own network traffic.
+
+    The instance UI sends the token as a header on its API calls while the
+    page loads, so it can be read from Chrome's DevTools performance log
+    (Network.requestWillBeSent*) in the same page load as the login - also
+    on pages that never define window.g_ck. Browsers without the log
+    (Safari) simply never capture anything.
+    """
+
+    def __init__(self, driver, instance_url=INSTANCE_URL):
+        self.driver = driver
+        self.instance_url = instance_url
+        self.token = None
+        self.available = True  # False once the browser turns out to have no performance log
+
+    def _entries(self):
+        if not self.available:
+            return []
+        try:
+            return self.driver.get_log('performance')
+        except Exception:
+            self.available = False
+            return []
+
+    def reset(self):
+        """Drop traffic logged so far (e.g. a warm browser's previous session)"""
+        self._entries()
+        self.token = None
+
+    def poll(self):
+        """Scan traffic logged since the last call; returns the latest token seen"""
+        for entry in self._entries():
+            raw = entry.get('message', '')
+            if TOKEN_HEADER not in raw.lower():
+                continue  # Cheap filter - most entries are other events
+            try:
+                event = json.loads(raw)['message']
+            except (ValueError, KeyError, TypeError):
+                continue
+            params = event.get('params') or {}
+            if event.get('method') == 'Network.requestWillBeSent':
+                request = params.get('request') or {}
+                if not request.get('url', '').startswith(self.instance_url):
+                    continue
+                headers = request.get('headers') or {}
+            elif event.get('method') == 'Network.requestWillBeSentExtraInfo':
+                headers = params.get('headers') or {}
+            else:
+                continue
+            for name, value in headers.items():
+                if name.lower() == TOKEN_HEADER and value:
+                    self.token = value
+        return self.token
+
+
+def _login_state(driver, capture=None, instance_url=INSTANCE_URL):
+    """
+    'done' once a logged-in instance page has defined g_ck, sent an
+    X-UserToken header (see TokenCapture) or - for landing pages without
+    g_ck and browsers without a performance log - finished loading with a
+    session the instance accepts (see _authenticated); 'mfa' on an MFA
+    challenge, else None (still redirecting or waiting for the user).
+    """
+    url = driver.current_url.lower()
+    if url.startswith(instance_url.lower()) and not any(path in url for path in LOGIN_PATHS):
+        if driver.execute_script("return !!window.g_ck;") or (capture and capture.poll()):
+            return 'done'
+        if (driver.execute_script("return document.readyState;") == 'complete' and _session_cookies(driver)
+                and _authenticated(driver, instance_url)):
+            return 'done'
+        return None
+
+    if any(marker in url for marker in MFA_URL_MARKERS):
+        return 'mfa'
+    if driver.execute_script("return document.readyState;") != 'complete':
+        return None
+    page_source = (driver.page_source or '').lower()
+    if any(marker in page_source for marker in MFA_PAGE_MARKERS):
+        return 'mfa'
+    return None
+
+
+def _authenticated(driver, instance_url=INSTANCE_URL):
+    """True if the page's session gets a 200 from a cheap authenticated API call (AUTH_PROBE_PATH)"""
+    return driver.execute_script(_AUTH_PROBE_SCRIPT, f'{instance_url}{AUTH_PROBE_PATH}') == 200
+
+
+def _session_cookies(driver):
+    """The browser's cookies as a dict once the session cookies are set, else None"""
+    cookies = {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
+    return cookies if any(cookies.get(name) for name in SESSION_COOKIES) else None
+
+
+def browser_profile_dir():
+    """Persistent Chrome profile directory from SNOW_BROWSER_PROFILE, or None if not enabled"""
+    value = os.environ.get('SNOW_BROWSER_PROFILE', '').strip()
+    if value.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value.lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_BROWSER_PROFILE_DIR
+    return os.path.expanduser(value)
+
+
+def browser_reuse_enabled():
+    """True if a headless refresh can ride on an earlier login (a persistent profile is set)"""
+    return browser_profile_dir() is not None
+
+
+def _prepare_profile(path):
+    """
+    Create the profile directory owner-only, tightening an existing one.
+
+    Raises:
+        PermissionError: If the directory belongs to another user
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat = os.stat(path)
+    if hasattr(os, 'getuid') and stat.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    if stat.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+def keep_browser_alive(enabled=True):
+    """
+    Keep the headless browser open between refreshes instead of quitting it.
+
+    For long-lived processes (the --serve worker): the next refresh skips the
+    browser start and reuses the IdP session already in memory.
+    """
+    global KEEP_BROWSER_ALIVE
+    KEEP_BROWSER_ALIVE = enabled
+    if enabled:
+        atexit.register(close_warm_browser)
+    else:
+        close_warm_browser()
+
+
+def close_warm_browser():
+    """Quit the browser kept open by keep_browser_alive (if any)"""
+    global _warm_browser
+    with _warm_lock:
+        browser, _warm_browser = _warm_browser, None
+    if browser is not None:
+        _quit_browser(browser)
+
+
+def _take_warm_browser():
+    """The kept-open browser if it is still responsive, else None"""
+    global _warm_browser
+    with _warm_lock:
+        browser, _warm_browser = _warm_browser, None
+    if browser is None:
+        return None
+    try:
+        browser.driver.current_url
+    except Exception:
+        _quit_browser(browser)
+        return None
+    return browser
+
+
+def _park_warm_browser(browser):
+    global _warm_browser
+    with _warm_lock:
+        browser, _warm_browser = _warm_browser, browser
+    if browser is not None:
+        _quit_browser(browser)
+
+
+def _quit_browser(browser):
+    print("Closing browser...")
+    try:
+        with timing.span('browser.quit'):
+            browser.driver.quit()
+    except Exception:
+        pass
+    finally:
+        browser.resources.close()  # Releases the profile lock
+
+
+def get_session_from_browser(use_chrome=True, headless=False, profile=None, keep_alive=None,
+                             instance_url=None):
     """
     Use Selenium to automate login and extract session credentials
 
     Args:
         use_chrome: Use Chrome browser (else Safari)
         headless: Run browser in headless mode (invisible)
+        profile: Persistent Chrome profile directory (default: SNOW_BROWSER_PROFILE,
+                 see browser_profile_dir); the IdP session kept there lets a
+                 later headless refresh log in without a human step
+        keep_alive: Leave a headless browser open for the next refresh
+                    (default: keep_browser_alive setting)
+        instance_url: Instance to log in to (default: INSTANCE_URL)
 
     Returns:
         (cookies_dict, x_user_token) tuple or (None, None) if MFA blocks automation
     """
+    if keep_alive is None:
+        keep_alive = KEEP_BROWSER_ALIVE
+    keep_alive = keep_alive and headless and use_chrome
+    instance_url = (instance_url or INSTANCE_URL).rstrip('/')
+
+    timing.count('browser_login', headless=headless)
+    with timing.span('get_session_from_browser', headless=headless, warm=keep_alive) as span:
+        cookies_dict, x_user_token = _login_in_browser(use_chrome, headless, profile, keep_alive, instance_url)
+        span.set(ok=bool(cookies_dict and x_user_token))
+    return cookies_dict, x_user_token
+
+
+def _login_in_browser(use_chrome, headless, profile, keep_alive, instance_url):
+    """Browser login behind get_session_from_browser (phases are timed separately)"""
+    try:
+        selenium = _import_selenium()
+    except ImportError:
+        return None, None
+
     print("ServiceNow Automated Login")
     print("="*80)
 
-    # Choose browser
+    browser = _take_warm_browser() if keep_alive else None
+    if browser is not None:
+        print("Reusing the open headless browser...\n")
+    else:
+        if not headless:
+            close_warm_browser()  # A visible login needs the profile it holds
+        browser = _open_browser(selenium, use_chrome, headless, profile)
+        if browser is None:
+            return None, None
+
+    if not headless:
+        print("Please log in through Okta when prompted.")
+        print("The browser will close automatically after successful login.\n")
+
+    cookies_dict = x_user_token = None
+    try:
+        cookies_dict, x_user_token = _authenticate(selenium, browser.driver, headless, instance_url)
+        return cookies_dict, x_user_token
+    finally:
+        if keep_alive and cookies_dict and x_user_token:
+            _park_warm_browser(browser)
+        else:
+            _quit_browser(browser)
+
+
+def _open_browser(selenium, use_chrome, headless, profile):
+    """
+    Start Chrome (falling back to Safari when visible).
+
+    Returns:
+        SimpleNamespace(driver, resources) or None if no browser could be started
+    """
+    resources = ExitStack()
     driver = None
-    if use_chrome and HAS_WEBDRIVER_MANAGER:
+    pinned_driver = os.environ.get('SNOW_CHROMEDRIVER')
+    # A pinned chromedriver needs no webdriver_manager
+    if use_chrome and (HAS_WEBDRIVER_MANAGER or pinned_driver):
         if headless:
             print("Opening Chrome in headless mode (invisible)...")
         else:
             print("Opening Chrome browser...")
-        print("(Installing/updating Chrome driver if needed...)\n")
-        options = ChromeOptions()
+        if not pinned_driver:
+            print("(Installing/updating Chrome driver if needed...)\n")
+        options = selenium.ChromeOptions()
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
+        # DevTools network events, for TokenCapture
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
 
         # Add headless mode arguments
         if headless:
@@ -89,16 +454,40 @@ def get_session_from_browser(use_chrome=True, headless=False):
             options.add_argument('--disable-dev-shm-usage')
             options.add_argument('--window-size=1920,1080')
 
+        # Persistent profile: owner-only, one browser at a time, and nothing
+        # in it but the login (no sync, extensions or first-run state)
+        profile = profile or browser_profile_dir()
+        if profile:
+            try:
+                _prepare_profile(profile)
+                resources.enter_context(file_lock(profile, timeout=PROFILE_LOCK_TIMEOUT_SECONDS))
+            except OSError as e:  # Including TimeoutError: another browser has it
+                print(f"⚠️  Not using browser profile {profile}: {e}")
+            else:
+                options.add_argument(f'--user-data-dir={profile}')
+                options.add_argument('--no-first-run')
+                options.add_argument('--no-default-browser-check')
+                options.add_argument('--disable-sync')
+                options.add_argument('--disable-extensions')
+
         try:
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
+            with timing.span('browser.start', browser='chrome', headless=headless, profile=bool(profile)):
+                try:
+                    service = selenium.ChromeService(resolve_chromedriver())
+                    driver = selenium.webdriver.Chrome(service=service, options=options)
+                except Exception:
+                    if pinned_driver:
+                        raise
+                    # The cached driver may predate a Chrome update - resolve it again
+                    service = selenium.ChromeService(resolve_chromedriver(refresh=True))
+                    driver = selenium.webdriver.Chrome(service=service, options=options)
         except Exception as e:
+            resources.close()
             print(f"❌ Failed to open Chrome: {e}")
             if headless:
                 print("\n❌ Headless Chrome failed - cannot fall back to Safari in headless mode")
-                return None, None
+                return None
             print("\nFalling back to Safari...")
-            use_chrome = False
 
     if not driver:
         print("Opening Safari browser...")
@@ -106,21 +495,27 @@ def get_session_from_browser(use_chrome=True, headless=False):
         print("   Run: sudo safaridriver --enable")
         print("   OR go to Safari > Develop > Allow Remote Automation\n")
         try:
-            options = SafariOptions()
-            driver = webdriver.Safari(options=options)
+            with timing.span('browser.start', browser='safari', headless=headless):
+                options = selenium.SafariOptions()
+                driver = selenium.webdriver.Safari(options=options)
         except Exception as e:
             print(f"❌ Failed to open Safari: {e}")
             print("\nMake sure Safari allows remote automation.")
             print("Run: sudo safaridriver --enable")
-            return None, None
+            return None
+
+    return SimpleNamespace(driver=driver, resources=resources)
 
-    if not headless:
-        print("Please log in through Okta when prompted.")
-        print("The browser will close automatically after successful login.\n")
 
+def _authenticate(selenium, driver, headless, instance_url):
+    """Load the instance, wait for the login to finish and read the credentials"""
+    capture = TokenCapture(driver, instance_url)
     try:
+        capture.reset()
+
         # Navigate to ServiceNow
-        driver.get(INSTANCE_URL)
+        with timing.span('browser.navigate'):
+            driver.get(instance_url)
 
         if headless:
             print("Attempting headless authentication...")
@@ -129,68 +524,66 @@ def get_session_from_browser(use_chrome=True, headless=False):
             print("Waiting for you to complete Okta authentication...")
             print("(Timeout: 5 minutes)\n")
 
-        # Wait for authentication to complete
-        wait = WebDriverWait(driver, 300 if not headless else 30)  # 30 sec for headless
-
-        # Check if we hit an MFA page
-        time.sleep(2)  # Give page time to load
-
-        current_url = driver.current_url.lower()
-        page_source = driver.page_source.lower() if driver.page_source else ""
-
-        # Detect MFA challenge pages
-        mfa_indicators = [
-            'okta-verify' in current_url,
-            'mfa' in current_url,
-            'multifactor' in current_url,
-            'duo' in current_url,
-            'verify your identity' in page_source,
-            'authentication required' in page_source,
-            'push notification' in page_source,
-        ]
+        # Wait for authentication to complete: a logged-in instance page
+        # (g_ck defined), or - headless only - an MFA challenge to give up on
+        phase_started = time.perf_counter()
+        mfa_seen = False
+
+        def logged_in(d):
+            nonlocal mfa_seen
+            state = _login_state(d, capture, instance_url)
+            mfa_seen = mfa_seen or state == 'mfa'
+            return state == 'done' or (headless and state == 'mfa')
+
+        timeout = HEADLESS_LOGIN_TIMEOUT_SECONDS if headless else LOGIN_TIMEOUT_SECONDS
+        if not _wait_for(selenium, driver, logged_in, timeout):
+            print(f"❌ Login did not complete within {timeout} seconds")
+            timing.record('browser.login_wait', time.perf_counter() - phase_started, timed_out=True)
+            return None, None
 
-        if any(mfa_indicators) and headless:
+        if headless and mfa_seen:
             print("🔒 MFA detected - cannot complete authentication in headless mode")
+            timing.record('browser.login_wait', time.perf_counter() - phase_started, mfa_blocked=True)
             return None, None
 
-        # Wait until we're back on the ServiceNow domain
-        wait.until(lambda d: INSTANCE_URL in d.current_url)
+        timing.record('browser.login_wait', time.perf_counter() - phase_started, mfa=mfa_seen)
+        phase_started = time.perf_counter()
 
         print("✅ Authentication detected! Extracting credentials...")
-        time.sleep(3)  # Give it a moment to fully load
 
-        # Get all cookies
-        cookies = driver.get_cookies()
+        # Session cookies are normally set by the time g_ck is; wait briefly if not
+        cookies_dict = _wait_for(selenium, driver, _session_cookies, SETTLE_TIMEOUT_SECONDS)
+        if cookies_dict is None:
+            cookies_dict = {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
 
-        # Convert to dictionary format
-        cookies_dict = {}
-        for cookie in cookies:
-            cookies_dict[cookie['name']] = cookie['value']
+        # X-UserToken from window.g_ck, else from the page's own API calls
+        # (no extra page load either way)
+        def user_token(d):
+            g_ck = d.execute_script("return window.g_ck;")
+            if g_ck:
+                return 'g_ck', g_ck
+            return ('network', capture.token) if capture.poll() else None
 
-        # Try to get X-UserToken from window.g_ck
-        x_user_token = None
-
-        try:
-            x_user_token = driver.execute_script("return window.g_ck;")
-            if x_user_token:
-                print(f"✅ Found X-UserToken: {x_user_token[:20]}...")
-        except:
-            pass
+        source, x_user_token = _wait_for(selenium, driver, user_token, SETTLE_TIMEOUT_SECONDS) or (None, None)
 
-        # If we didn't get the token, try making an API call
+        # Neither (e.g. Safari on a landing page without g_ck): one classic UI
+        # page that defines g_ck
         if not x_user_token:
-            print("Attempting to capture X-UserToken from API request...")
+            print("Loading a classic UI page to read the X-UserToken...")
             try:
-                test_url = f"{INSTANCE_URL}/api/now/table/sys_user?sysparm_limit=1"
-                driver.get(test_url)
-                time.sleep(2)
-
-                x_user_token = driver.execute_script("return window.g_ck;")
-                if x_user_token:
-                    print(f"✅ Captured X-UserToken: {x_user_token[:20]}...")
-            except:
+                driver.get(f"{instance_url}/sys_user_list.do?sysparm_query=sys_idISEMPTY")
+                found = _wait_for(selenium, driver, user_token, SETTLE_TIMEOUT_SECONDS)
+                if found:
+                    source, x_user_token = 'fallback', found[1]
+            except Exception:
                 pass
 
+        if x_user_token:
+            print(f"✅ Found X-UserToken ({source}): {x_user_token[:20]}...")
+
+        timing.record('browser.extract', time.perf_counter() - phase_started, token_found=bool(x_user_token),
+                      token_source=source)
+
         print("\n" + "="*80)
         print("Session Credentials Extracted")
         print("="*80)
@@ -203,9 +596,6 @@ def get_session_from_browser(use_chrome=True, headless=False):
     except Exception as e:
         print(f"\n❌ Error during authentication: {e}")
         return None, None
-    finally:
-        print("Closing browser...")
-        driver.quit()
 
 def print_env_vars(cookies_dict, x_user_token):
     """Print environment variables to set"""
@@ -234,8 +624,25 @@ def main():
                        help='Run browser in headless mode (invisible)')
     parser.add_argument('--browser', choices=['chrome', 'safari'], default='chrome',
                        help='Browser to use (default: chrome)')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_BROWSER_PROFILE_DIR,
+                       help='Keep the login in a persistent Chrome profile so later headless '
+                            f'refreshes can reuse it (default dir: {DEFAULT_BROWSER_PROFILE_DIR}; '
+                            'also SNOW_BROWSER_PROFILE)')
+    parser.add_argument('--instance', metavar='NAME',
+                       help='Configured instance to log in to (default: the default instance)')
     args = parser.parse_args()
 
+    try:
+        instance = get_instance(args.instance)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    try:
+        _import_selenium()
+    except ImportError:
+        return 1
+
     print("\n")
     print("="*80)
     print("SERVICENOW CREDENTIAL EXTRACTOR")
@@ -260,7 +667,9 @@ def main():
     # Get session credentials
     cookies_dict, x_user_token = get_session_from_browser(
         use_chrome=use_chrome,
-        headless=args.headless
+        headless=args.headless,
+        profile=args.profile,
+        instance_url=instance.url
     )
 
     if not cookies_dict:
@@ -274,15 +683,16 @@ def main():
         return 1
 
     # Save credentials
-    if save_credentials(cookies_dict, x_user_token):
+    if save_credentials(cookies_dict, x_user_token, path=str(instance.credentials_file)):
         print()
         print("✅ Credentials saved successfully!")
         print()
         print("These credentials will be automatically loaded by the skill.")
         print()
 
-    # Print env vars
-    print_env_vars(cookies_dict, x_user_token)
+    # Print env vars (they only ever apply to the default instance)
+    if instance.is_default:
+        print_env_vars(cookies_dict, x_user_token)
 
     # Test the credentials
     print("\nTest your credentials:")
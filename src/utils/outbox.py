@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Durable Local Outbox for Feedback Submissions
+
+Feedback is written to a local SQLite outbox before (or instead of) being sent
+to ServiceNow, so nothing is lost when the instance is unreachable or the
+session needs an interactive MFA login. A flusher drains the outbox later with
+retry, exponential backoff and per-record idempotency keys.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+
+OUTBOX_FILE = Path.home() / '.servicenow_surf_outbox.db'
+
+# Retry policy for the flusher
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+CLAIM_LEASE_SECONDS = 120  # How long a flusher owns a claimed record
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    number TEXT,
+    sys_id TEXT,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class Outbox:
+    """
+    Append-only SQLite outbox of feedback records awaiting submission.
+
+    Each record gets an idempotency key when it is enqueued. Flushers claim due
+    records with a short lease, so several processes can drain the same outbox
+    without sending a record twice.
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = Path(path)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+        try:
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+
+    def _connect(self):
+        """Open a connection (one per operation, so any thread can use the outbox)"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')  # fsync on every commit
+        return conn
+
+    def enqueue(self, record, key=None):
+        """
+        Durably store a feedback record.
+
+        Returns:
+            The record's idempotency key
+        """
+        key = key or uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO outbox (key, record, created_at, next_attempt_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, json.dumps(record), now, now)
+            )
+        return key
+
+    def claim_due(self, limit=10, lease=CLAIM_LEASE_SECONDS):
+        """
+        Claim up to ``limit`` records that are due for a send attempt.
+
+        Returns:
+            List of (key, record, attempts) tuples
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                "SELECT key, record, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? AND lease_until <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (now, now, limit)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE outbox SET lease_until = ? WHERE key = ?',
+                [(now + lease, row[0]) for row in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        return [(key, json.loads(record), attempts) for key, record, attempts in rows]
+
+    def mark_sent(self, key, number, sys_id):
+        """Record a successful submission"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'sent', number = ?, sys_id = ?, sent_at = ?, "
+                "lease_until = 0, last_error = NULL WHERE key = ?",
+                (number, sys_id, time.time(), key)
+            )
+
+    def mark_failed(self, key, error, max_attempts=MAX_ATTEMPTS):
+        """
+        Record a failed attempt and schedule the next one with jittered
+        exponential backoff. Records that exhaust ``max_attempts`` are parked
+        as 'dead' and no longer retried.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT attempts FROM outbox WHERE key = ?', (key,)).fetchone()
+            if not row:
+                return
+
+            attempts = row[0] + 1
+            delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+            delay = random.uniform(delay / 2, delay)
+            status = 'dead' if attempts >= max_attempts else 'pending'
+
+            conn.execute(
+                'UPDATE outbox SET attempts = ?, status = ?, next_attempt_at = ?, '
+                'lease_until = 0, last_error = ? WHERE key = ?',
+                (attempts, status, time.time() + delay, str(error)[:1000], key)
+            )
+
+    def release(self, key):
+        """Give a claimed record back without counting an attempt"""
+        with closing(self._connect()) as conn:
+            conn.execute('UPDATE outbox SET lease_until = 0 WHERE key = ?', (key,))
+
+    def next_due_in(self):
+        """Seconds until the next pending record is due (None if nothing is pending)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MIN(MAX(next_attempt_at, lease_until)) FROM outbox WHERE status = 'pending'"
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def counts(self):
+        """Return {status: count} for the outbox"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall()
+        return dict(rows)
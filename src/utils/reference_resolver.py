@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Cached Resolution of Reference and Choice Field Values
+
+The feedback payload names its assignee, request type and work activity by
+display value. ServiceNow then has to look each one up by name on every
+insert, and a renamed user or relabelled choice silently stops matching.
+ReferenceResolver turns those display values into sys_ids (reference fields)
+or stored values (choice fields) once and caches them per instance in
+~/.servicenow_surf_references.json.
+
+Cold resolution is a handful of bulk queries: one sys_dictionary lookup to
+learn what kind of field each one is, one query per referenced table for
+all of its values, and one sys_choice query for all choice values. Entries
+expire after REFERENCE_CACHE_TTL_SECONDS. When any is stale, every stale
+entry is refreshed in the same pass.
+
+A display value that matches more than one record (two users with the same
+name) is left as the display value rather than guessed. An empty
+sys_dictionary answer usually means the user may not read the dictionary, so
+it is not cached; the fields are sent as display values and the dictionary
+is asked again after EMPTY_DICTIONARY_RETRY_SECONDS.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+try:
+    from .credential_store import atomic_write_json, read_json
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, read_json
+
+
+REFERENCE_CACHE_FILE = Path.home() / '.servicenow_surf_references.json'
+REFERENCE_CACHE_TTL_SECONDS = 24 * 3600
+EMPTY_DICTIONARY_RETRY_SECONDS = 5 * 60
+
+REFERENCE = 'reference'
+CHOICE = 'choice'
+LITERAL = 'literal'   # Sent as-is (plain string field, or unknown to the dictionary)
+DEFAULT_DISPLAY_FIELD = 'name'
+
+
+class ReferenceResolutionError(Exception):
+    """Raised when a lookup request fails"""
+    pass
+
+
+def _escape(value):
+    """Escape a value for an encoded query ('^' is the term separator)"""
+    return str(value).replace('^', '^^')
+
+
+class ReferenceResolver:
+    """
+    Display value -> stored value mapping for some fields of one table.
+
+    Args:
+        instance_url: Instance base URL (the cache is kept per instance)
+        table: Table the payload is inserted into
+        fields: Field names to resolve
+        known_references: {field: (table, display field)} for fields whose
+                          target is known up front (skips the dictionary lookup)
+    """
+
+    def __init__(self, instance_url, table, fields, known_references=None,
+                 path=REFERENCE_CACHE_FILE, ttl=REFERENCE_CACHE_TTL_SECONDS):
+        self.instance_url = instance_url.rstrip('/')
+        self.table = table
+        self.fields = tuple(fields)
+        self.known_references = dict(known_references or {})
+        self.path = Path(path)
+        self.ttl = ttl
+        self._key = f"{self.instance_url}|{table}"
+        self._lock = threading.Lock()
+        self._cache = (read_json(self.path) or {}).get(self._key) or {'fields': {}, 'values': {}}
+        self._dictionary_retry_at = 0  # Set (in memory only) after an empty dictionary answer
+
+    def _fresh(self, entry, now):
+        return entry is not None and now - entry.get('checked_at', 0) < self.ttl
+
+    def _stale(self, payload, now):
+        """True if any field kind or value needed for ``payload`` is missing or expired"""
+        for field in self.fields:
+            if not payload.get(field):
+                continue
+            info = self._cache['fields'].get(field)
+            if info is None and field not in self.known_references and now < self._dictionary_retry_at:
+                continue  # The dictionary came back empty a moment ago
+            if not self._fresh(info, now):
+                return True
+            if info['kind'] != LITERAL and \
+                    not self._fresh(self._cache['values'].get(field, {}).get(payload[field]), now):
+                return True
+        return False
+
+    def cached(self, payload):
+        """
+        ``payload`` with every field that has a cached resolution replaced
+        (no requests; expired entries are still used).
+        """
+        resolved = dict(payload)
+        for field in self.fields:
+            label = payload.get(field)
+            entry = self._cache['values'].get(field, {}).get(label) if label else None
+            if entry and entry.get('value'):
+                resolved[field] = entry['value']
+        return resolved
+
+    def resolve(self, payload, session):
+        """
+        Return ``payload`` with display values replaced by sys_ids / choice values.
+
+        Values that cannot be resolved (e.g. no user by that name) are left
+        as display values and reported in the returned list.
+
+        Returns:
+            (resolved payload, [unresolved field names])
+
+        Raises:
+            ReferenceResolutionError: If a refresh was needed and a lookup failed
+        """
+        now = time.time()
+        if self._stale(payload, now):
+            with self._lock:
+                # Another thread may have refreshed while this one waited
+                if self._stale(payload, time.time()):
+                    self._refresh(payload, session, time.time())
+
+        resolved = self.cached(payload)
+        unresolved = [
+            field for field in self.fields
+            if payload.get(field) and resolved[field] == payload[field]
+            and self._cache['fields'].get(field, {}).get('kind', LITERAL) != LITERAL
+        ]
+        return resolved, unresolved
+
+    def _get(self, session, table, query, fields, limit):
+        response = session.get(
+            f"{self.instance_url}/api/now/table/{table}",
+            params={
+                'sysparm_query': query,
+                'sysparm_fields': ','.join(fields),
+                'sysparm_exclude_reference_link': 'true',
+                'sysparm_limit': limit,
+            }
+        )
+        if response.status_code != 200:
+            raise ReferenceResolutionError(f"Lookup in {table} failed (status {response.status_code})")
+        return response.json().get('result', [])
+
+    def _refresh(self, payload, session, now):
+        """Re-resolve every stale field kind and value (plus the ones ``payload`` needs)"""
+        fields_info = self._cache['fields']
+        values = self._cache['values']
+
+        # Which labels to (re)resolve, per field
+        wanted = {}
+        for field in self.fields:
+            field_values = values.get(field, {})
+            labels = {label for label, entry in field_values.items() if not self._fresh(entry, now)}
+            if payload.get(field) and (not self._fresh(fields_info.get(field), now)
+                                       or not self._fresh(field_values.get(payload[field]), now)):
+                labels.add(payload[field])
+            if labels:
+                wanted[field] = labels
+
+        # 1. Field kinds
+        unknown = [f for f in wanted if not self._fresh(fields_info.get(f), now)]
+        for field in [f for f in unknown if f in self.known_references]:
+            table, display = self.known_references[field]
+            fields_info[field] = {'kind': REFERENCE, 'table': table, 'display': display, 'checked_at': now}
+        unknown = [f for f in unknown if f not in self.known_references]
+        rows = None
+        if unknown and now >= self._dictionary_retry_at:
+            rows = self._get(session, 'sys_dictionary',
+                             f"name={self.table}^elementIN{','.join(unknown)}",
+                             ['element', 'internal_type', 'reference', 'choice'], len(unknown) * 4)
+            if not rows:
+                # Most likely filtered by ACLs rather than really empty - don't
+                # pin every field as literal for a whole TTL
+                self._dictionary_retry_at = now + EMPTY_DICTIONARY_RETRY_SECONDS
+        if rows:
+            found = {row.get('element'): row for row in rows}
+            targets = {row.get('reference') for row in found.values()
+                       if row.get('internal_type') == 'reference' and row.get('reference')}
+            displays = {}
+            if targets:
+                for row in self._get(session, 'sys_dictionary',
+                                     f"nameIN{','.join(sorted(targets))}^display=true",
+                                     ['name', 'element'], len(targets) * 4):
+                    displays.setdefault(row.get('name'), row.get('element'))
+
+            for field in unknown:
+                row = found.get(field) or {}
+                if row.get('internal_type') == 'reference' and row.get('reference'):
+                    info = {'kind': REFERENCE, 'table': row['reference'],
+                            'display': displays.get(row['reference'], DEFAULT_DISPLAY_FIELD)}
+                elif str(row.get('choice') or '0') not in ('', '0'):
+                    info = {'kind': CHOICE}
+                else:
+                    info = {'kind': LITERAL}
+                fields_info[field] = dict(info, checked_at=now)
+
+        # 2. Values - one query per referenced table, one for all choices
+        by_table = {}
+        choices = {}
+        for field, labels in wanted.items():
+            info = fields_info.get(field)
+            if info is None:
+                continue  # Kind unknown (see EMPTY_DICTIONARY_RETRY_SECONDS) - sent as-is
+            if info['kind'] == REFERENCE:
+                by_table.setdefault((info['table'], info['display']), {})[field] = labels
+            elif info['kind'] == CHOICE:
+                choices[field] = labels
+
+        for (table, display), field_labels in by_table.items():
+            labels = sorted(set().union(*field_labels.values()))
+            query = '^OR'.join(f"{display}={_escape(label)}" for label in labels)
+            matches = {}
+            for row in self._get(session, table, query, ['sys_id', display], len(labels) * 2):
+                label = row.get(display)
+                # Ambiguous (e.g. two users with the same name): send the
+                # display value instead of guessing
+                matches[label] = None if label in matches else row.get('sys_id')
+            for field, field_labels_set in field_labels.items():
+                for label in field_labels_set:
+                    values.setdefault(field, {})[label] = {'value': matches.get(label), 'checked_at': now}
+
+        if choices:
+            labels = sorted(set().union(*choices.values()))
+            query = (f"name={self.table}^elementIN{','.join(sorted(choices))}^inactive=false^"
+                     + '^OR'.join(f"label={_escape(label)}" for label in labels))
+            matches = {}
+            for row in self._get(session, 'sys_choice', query, ['element', 'label', 'value'], len(labels) * 10):
+                matches.setdefault((row.get('element'), row.get('label')), row.get('value'))
+            for field, field_labels_set in choices.items():
+                for label in field_labels_set:
+                    values.setdefault(field, {})[label] = {'value': matches.get((field, label)), 'checked_at': now}
+
+        self._save()
+
+    def _save(self):
+        try:
+            data = read_json(self.path) or {}
+            data[self._key] = self._cache
+            atomic_write_json(self.path, data)
+        except OSError:
+            pass  # A cache - the resolved values are still used in memory
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Retry Policy and Client-Side Rate Limiting
+
+RetryPolicy decides whether a throttled (429) or unavailable (502/503/504)
+response is retried and how long to wait first: the instance's Retry-After
+when it sends one, otherwise jittered exponential backoff.
+
+TokenBucket paces every request made through one session. A 429 pauses the
+whole bucket for the Retry-After period, so concurrent workers back off
+together instead of hammering a throttled instance in lockstep.
+"""
+
+import random
+import threading
+import time
+
+
+# Retry defaults
+MAX_ATTEMPTS = 4                  # Including the first attempt
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+MAX_RETRY_AFTER_SECONDS = 60      # Longer Retry-After values are not waited out
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+# The instance rejected these before doing any work, so even a POST is safe
+# to resend; a 502/504 create may already have gone through
+SAFE_TO_RESEND_STATUSES = frozenset((429, 503))
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+# Rate limiter defaults (requests per second, shared by one session)
+RATE_LIMIT_PER_SECOND = 10
+RATE_LIMIT_BURST = 20
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before resending a request.
+
+    Args:
+        max_attempts: Total attempts including the first (1 disables retries)
+        backoff_base: First backoff in seconds (doubles per attempt)
+        backoff_max: Cap for the computed backoff
+        max_retry_after: Give up instead of waiting out a longer Retry-After
+        statuses: Status codes worth retrying
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS, max_retry_after=MAX_RETRY_AFTER_SECONDS,
+                 statuses=RETRY_STATUSES):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+
+    def backoff(self, attempt):
+        """Jittered exponential backoff after failed attempt number ``attempt`` (1-based)"""
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return random.uniform(delay / 2, delay)
+
+    def retry_delay(self, method, status, headers, attempt):
+        """
+        Seconds to wait before resending, or None to give up.
+
+        Args:
+            method: HTTP method of the request
+            status: Status code of the response to attempt number ``attempt``
+            headers: Response headers (for Retry-After)
+            attempt: 1-based number of the attempt that just failed
+        """
+        if status not in self.statuses or attempt >= self.max_attempts:
+            return None
+        if method.upper() not in IDEMPOTENT_METHODS and status not in SAFE_TO_RESEND_STATUSES:
+            return None
+
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            # Spread retries so waiting workers do not all return at once
+            return retry_after + random.uniform(0, self.backoff_base)
+        return self.backoff(attempt)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` requests per second, bursts up to ``burst``.
+
+    Callers reserve a token and are told how long to wait for it, so the lock
+    is never held while sleeping and the async session can await the wait.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST):
+        self.rate = float(rate)
+        self.burst = float(max(1, burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()  # In the future while paused
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token; returns the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+            # May go negative: a negative balance is a queue of reservations,
+            # each one 1/rate after the previous
+            self._tokens -= 1
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Hold new reservations for ``seconds`` (the instance said it is
+        throttling us), then release them one at a time at ``rate``.
+        """
+        with self._lock:
+            resume = time.monotonic() + seconds
+            if resume > self._updated:
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = resume
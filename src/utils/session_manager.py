@@ -9,21 +9,90 @@ using headless browser automation with MFA fallback.
 import os
 import sys
 import json
-import requests
-from datetime import datetime
+import time
+import threading
 from pathlib import Path
 
-
-INSTANCE_URL = 'https://surf.service-now.com'
+try:
+    from .credential_store import atomic_write_json, read_json, file_lock
+    from .retry import RetryPolicy, TokenBucket, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST
+    from .circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, PROBE
+    from .table_api import TableAPIMixin
+    from .instances import get_instance
+    from . import timing
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, read_json, file_lock
+    from retry import RetryPolicy, TokenBucket, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST
+    from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, PROBE
+    from table_api import TableAPIMixin
+    from instances import get_instance
+    import timing
+
+# SNOW_INSTANCE points the tools at another instance (e.g. the benchmark stub).
+# These are the default instance's settings without an instances file; each
+# session uses its own Instance (see utils.instances)
+INSTANCE_URL = os.getenv('SNOW_INSTANCE', 'https://surf.service-now.com').rstrip('/')
 CREDENTIALS_FILE = Path.home() / '.servicenow_surf_session.json'
 
+# Connection pool defaults for the shared keep-alive transport
+POOL_CONNECTIONS = 4      # Number of distinct hosts to keep pools for
+POOL_MAXSIZE = 10         # Max idle keep-alive connections kept per host
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds applied to every request
+
+# Session expiry tracking. ServiceNow sessions expire after a period of
+# inactivity, so every confirmed-valid request pushes the estimate forward.
+VALIDATION_CACHE_FILE = Path.home() / '.servicenow_surf_validation.json'
+SESSION_IDLE_TIMEOUT_SECONDS = 30 * 60
+REFRESH_AHEAD_SECONDS = 5 * 60       # Ping/refresh when this close to expiry
+VALIDATION_TTL_SECONDS = 120         # Trust a recent test_credentials() result this long
+VALIDATION_WRITE_INTERVAL_SECONDS = 60  # Min gap between validation cache writes
+
+# Overrides RATE_LIMIT_PER_SECOND (requests/second per session, 0 = no limit)
+RATE_LIMIT_ENV = 'SNOW_RATE_LIMIT'
+
+# SNOW_INTERACTIVE_LOGIN=0 keeps automatic refreshes from opening a visible
+# login browser (headless or broker refresh only) - for processes nobody is
+# watching, such as the detached outbox flush
+INTERACTIVE_LOGIN_ENV = 'SNOW_INTERACTIVE_LOGIN'
+
+# How long a refresh delegated to the credential broker may take (a full
+# interactive login) - see utils.credential_broker
+BROKER_REFRESH_TIMEOUT_SECONDS = 330
+
 
 class AuthenticationError(Exception):
     """Raised when authentication fails and cannot be recovered"""
     pass
 
 
-class ServiceNowSession:
+def _broker_module():
+    """utils.credential_broker, imported on first use"""
+    try:
+        from . import credential_broker
+    except ImportError:  # Run as a script
+        import credential_broker
+    return credential_broker
+
+
+def discover_broker(instance=None):
+    """Client for the instance's local credential broker, or None if none is running"""
+    return _broker_module().BrokerClient.discover(instance)
+
+
+def interactive_login_from_env():
+    """Whether automatic refreshes may fall back to a visible login browser"""
+    return os.getenv(INTERACTIVE_LOGIN_ENV, '1') != '0'
+
+
+def rate_limit_from_env():
+    """Requests per second for new sessions (SNOW_RATE_LIMIT or the default)"""
+    try:
+        return float(os.getenv(RATE_LIMIT_ENV, RATE_LIMIT_PER_SECOND))
+    except ValueError:
+        return RATE_LIMIT_PER_SECOND
+
+
+class ServiceNowSession(TableAPIMixin):
     """
     Manages ServiceNow authentication with automatic refresh on session expiration.
 
@@ -32,59 +101,278 @@ class ServiceNowSession:
     2. Attempting headless browser refresh
     3. Falling back to visible browser if MFA is required
     4. Retrying the original request with fresh credentials
+
+    All requests share one pooled keep-alive transport, so repeated calls
+    (including the retry after a 401) reuse the same TCP+TLS connection.
+    Refreshing credentials only swaps the cookies and X-UserToken on that
+    transport - the pool itself is kept.
+
+    Requests are paced by a token bucket shared by every thread using the
+    session (``rate_limit`` requests/second, 0 to disable), and 429/502/503/504
+    responses are retried according to ``retry_policy``. Repeated connection
+    failures or 5xx responses open ``circuit_breaker`` (shared with other
+    processes), after which requests fail fast with CircuitOpenError.
+
+    When a credential broker is running (utils.credential_broker) and
+    ``use_broker`` is set, credentials, validity reports and refreshes go
+    through it instead of the session file; if it stops answering, the
+    session carries on with the file.
+
+    Each session talks to one ``instance`` (utils.instances.Instance, default:
+    the configured default) with that instance's own credential files; use
+    utils.instances.get_session for one pooled session per instance.
     """
 
-    def __init__(self):
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 timeout=DEFAULT_TIMEOUT, retry_policy=None, rate_limit=None,
+                 rate_burst=RATE_LIMIT_BURST, circuit_breaker=None, use_broker=True, instance=None):
+        self._init_instance(instance, use_broker)
         self.cookies = None
         self.x_user_token = None
         self.mfa_refresh_attempted = False  # Track MFA attempts this session
-        self.instance_url = INSTANCE_URL
+        self.timeout = timeout
+        self.http = self._build_transport(pool_connections, pool_maxsize)
+        self._init_request_policies(retry_policy, rate_limit, rate_burst, circuit_breaker)
+        self._refresh_lock = threading.Lock()
+        self.validated_at = None    # Epoch seconds the session was last confirmed valid
+        self._validation_written_at = 0
         self.load_credentials()
 
+    def _init_instance(self, instance, use_broker):
+        """Bind the session to an instance and its credential files"""
+        self.instance = instance or get_instance()
+        self.instance_url = self.instance.url
+        self.credentials_file = self.instance.credentials_file
+        self.validation_cache_file = self.instance.validation_cache_file
+        self.broker = discover_broker(self.instance) if use_broker else None
+
+    @staticmethod
+    def _build_transport(pool_connections, pool_maxsize):
+        """Create the pooled keep-alive requests.Session used for all calls"""
+        # Imported here so importing this module stays cheap (CLI startup)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=False,
+        )
+        http.mount('https://', adapter)
+        http.mount('http://', adapter)
+        http.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+        return http
+
+    def _init_request_policies(self, retry_policy, rate_limit, rate_burst, circuit_breaker):
+        """Set up the retry policy, the session-wide rate limiter, the circuit breaker and the login mode"""
+        self.retry_policy = retry_policy or RetryPolicy()
+        if rate_limit is None:
+            rate_limit = rate_limit_from_env()
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.circuit = circuit_breaker or CircuitBreaker(self.instance_url)
+        self.interactive = interactive_login_from_env()
+
+    def _refresh_options(self):
+        """refresh_credentials arguments for automatic refreshes (see INTERACTIVE_LOGIN_ENV)"""
+        return {'headless': not self.interactive, 'interactive_fallback': self.interactive}
+
+    def _apply_credentials(self):
+        """Swap current cookies and X-UserToken onto the pooled transport"""
+        self.http.cookies.clear()
+        if self.cookies:
+            self.http.cookies.update(self.cookies)
+
+        if self.x_user_token:
+            self.http.headers['X-UserToken'] = self.x_user_token
+        else:
+            self.http.headers.pop('X-UserToken', None)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def load_credentials(self):
         """Load credentials from cache file or environment variables"""
-        # Priority 1: Try environment variables
+        with timing.span('load_credentials') as span:
+            span.set(source=self._load_credentials())
+
+    def _load_credentials(self):
+        """Load credentials (see load_credentials); returns 'env', 'file' or None"""
+        # Priority 1: Try environment variables (they belong to the default instance)
         x_user_token = os.getenv('SNOW_X_USER_TOKEN')
         glide_cookie = os.getenv('SNOW_COOKIE_GLIDE')
         session_cookie = os.getenv('SNOW_COOKIE_SESSION')
 
-        if x_user_token and glide_cookie and session_cookie:
+        if self.instance.is_default and x_user_token and glide_cookie and session_cookie:
             self.x_user_token = x_user_token
             self.cookies = {
                 'glide_user_route': glide_cookie,
                 'JSESSIONID': session_cookie
             }
-            return
-
-        # Priority 2: Try cached credentials file
-        if CREDENTIALS_FILE.exists():
+            self.validated_at = self._cached_validation()
+            self._apply_credentials()
+            return 'env'
+
+        # Priority 2: The credential broker's in-memory copy
+        if self.broker is not None:
+            creds = self._broker_request('get')
+            if creds and creds.get('x_user_token') and creds.get('cookies'):
+                self._adopt_credentials(creds)
+                return 'broker'
+
+        # Priority 3: Try cached credentials file
+        if self.credentials_file.exists():
             try:
-                with open(CREDENTIALS_FILE, 'r') as f:
+                with open(self.credentials_file, 'r') as f:
                     creds = json.load(f)
 
                 self.x_user_token = creds.get('x_user_token')
                 self.cookies = creds.get('cookies', {})
 
-                # Check age
+                # Start the expiry estimate from the later of when these
+                # credentials were saved and when any process last saw
+                # them work
+                from datetime import datetime
                 timestamp = creds.get('timestamp')
-                if timestamp:
-                    saved_time = datetime.fromisoformat(timestamp)
-                    age_hours = (datetime.now() - saved_time).total_seconds() / 3600
-                    age_minutes = age_hours * 60
-
-                    # Warn if credentials are getting old
-                    if age_minutes > 25:
-                        pass  # Will be checked automatically on first request
-                return
+                saved_at = datetime.fromisoformat(timestamp).timestamp() if timestamp else None
+                cached_at = self._cached_validation()
+                known = [t for t in (saved_at, cached_at) if t is not None]
+                self.validated_at = max(known) if known else None
+                self._apply_credentials()
+                return 'file'
             except Exception as e:
                 print(f"⚠️  Failed to load cached credentials: {e}")
 
         # No credentials found
         self.x_user_token = None
         self.cookies = {}
+        self.validated_at = None
+        self._apply_credentials()
+        return None
+
+    def _broker_request(self, op, **fields):
+        """
+        Ask the credential broker; None if it has gone away (the session then
+        keeps using the session file).
+        """
+        try:
+            return self.broker.request(op, **fields)
+        except _broker_module().BrokerUnavailable as e:
+            print(f"⚠️  {e} - using {self.credentials_file} instead")
+            self.broker = None
+            return None
+
+    def _adopt_credentials(self, creds):
+        """Take over credentials handed out by the broker"""
+        self.cookies = creds.get('cookies') or {}
+        self.x_user_token = creds.get('x_user_token')
+        self.validated_at = creds.get('validated_at')
+        self._apply_credentials()
+
+    def follow_broker(self):
+        """
+        Keep this session's credentials in step with the broker: refreshes
+        done for other processes are pushed here as they happen (for
+        long-lived sessions such as worker mode). No-op without a broker.
+        """
+        if self.broker is None:
+            return
+
+        def update(creds):
+            if creds.get('x_user_token') and creds['x_user_token'] != self.x_user_token:
+                self._adopt_credentials(creds)
+
+        self.broker.subscribe(update)
+
+    def _token_key(self):
+        """Short hash identifying the current X-UserToken in the validation cache"""
+        import hashlib
+        return hashlib.sha256(self.x_user_token.encode('utf-8')).hexdigest()[:16]
+
+    def _cached_validation(self):
+        """When the current token was last confirmed valid by any process (epoch seconds)"""
+        if not self.x_user_token:
+            return None
+        if self.broker is not None:
+            creds = self._broker_request('get')
+            if creds is not None:
+                return creds.get('validated_at') if creds.get('x_user_token') == self.x_user_token else None
+        cache = read_json(self.validation_cache_file) or {}
+        return cache.get(self._token_key())
+
+    def _mark_valid(self, persist=False):
+        """
+        Record that the session was just accepted by the instance.
+
+        The in-memory estimate is always updated; the shared validation cache
+        is written at most every VALIDATION_WRITE_INTERVAL_SECONDS unless
+        ``persist`` is set.
+        """
+        now = time.time()
+        self.validated_at = now
+
+        if not self.x_user_token:
+            return
+        if not persist and now - self._validation_written_at < VALIDATION_WRITE_INTERVAL_SECONDS:
+            return
+
+        if self.broker is not None:
+            if self._broker_request('valid', token_key=self._token_key()) is not None:
+                self._validation_written_at = now
+                return
+
+        try:
+            # Keep only the current token - older ones are no use
+            atomic_write_json(self.validation_cache_file, {self._token_key(): now})
+            self._validation_written_at = now
+        except OSError:
+            pass
+
+    def seconds_until_expiry(self):
+        """Estimated seconds until the session expires (None if unknown)"""
+        if self.validated_at is None:
+            return None
+        return self.validated_at + SESSION_IDLE_TIMEOUT_SECONDS - time.time()
+
+    def ensure_fresh(self):
+        """
+        Refresh ahead of time if the session is close to expiring.
+
+        A near-expiry session is first pinged with a cheap request over the
+        pooled connection; if the ping succeeds the idle timer is reset, and
+        if it is rejected with a 401 credentials are refreshed before the real
+        request is sent, so a large payload never has to be resent after a
+        401. Any other outcome (network error, 429, 5xx) says nothing about
+        the credentials - the request goes ahead and retries and the circuit
+        breaker deal with it, rather than opening a login browser.
+        """
+        remaining = self.seconds_until_expiry()
+        if remaining is None or remaining > REFRESH_AHEAD_SECONDS:
+            return
+
+        response = self._ping()
+        if response is None or response.status_code != 401:
+            if response is not None and response.status_code == 200:
+                self._mark_valid(persist=True)
+            return
+
+        print("⚠️  Session expired - refreshing before sending the request")
+        self.refresh_credentials(stale_token=self.x_user_token, **self._refresh_options())
 
     def save_credentials(self):
         """Save credentials to cache file"""
+        from datetime import datetime
+
         credentials = {
             'cookies': self.cookies,
             'x_user_token': self.x_user_token,
@@ -94,40 +382,131 @@ class ServiceNowSession:
         }
 
         try:
-            with open(CREDENTIALS_FILE, 'w') as f:
-                json.dump(credentials, f, indent=2)
+            atomic_write_json(self.credentials_file, credentials)
             return True
         except Exception as e:
             print(f"⚠️  Failed to save credentials: {e}")
             return False
 
-    def refresh_credentials(self, headless=False, interactive_fallback=True):
+    def refresh_credentials(self, headless=False, interactive_fallback=True, stale_token=None):
         """
         Trigger browser automation to get fresh cookies.
 
+        Refreshes are single-flight: callers in this process serialize on a
+        thread lock and callers in other processes on a file lock next to
+        the instance's credentials file. Whoever gets the lock first does the browser login;
+        everyone else finds the new token (in memory or on disk) once the lock
+        is released and reuses it instead of opening another browser.
+
         Args:
             headless: Try headless mode first (invisible browser) - disabled by default since MFA is required
             interactive_fallback: If headless fails due to MFA, retry with visible browser
+            stale_token: X-UserToken that was rejected (defaults to the current one)
 
         Returns:
             True if successful, False if cannot refresh
         """
+        if stale_token is None:
+            stale_token = self.x_user_token
+
+        timing.count('refresh')
+        with timing.span('refresh_credentials') as span:
+            refreshed = self._refresh_single_flight(headless, interactive_fallback, stale_token)
+            span.set(refreshed=refreshed)
+        if refreshed:
+            self._mark_valid(persist=True)
+        return refreshed
+
+    def _refresh_single_flight(self, headless, interactive_fallback, stale_token):
+        """Refresh under the thread and file locks (see refresh_credentials)"""
+        with self._refresh_lock:
+            # Another thread refreshed while we were waiting
+            if self.x_user_token and self.x_user_token != stale_token:
+                timing.count('refresh_reused', source='thread')
+                return True
+
+            if self.broker is not None:
+                refreshed = self._refresh_through_broker(headless, interactive_fallback, stale_token)
+                if refreshed is not None:
+                    return refreshed
+
+            try:
+                with file_lock(self.credentials_file):
+                    # Another process refreshed while we were waiting
+                    if self._reload_if_refreshed(stale_token):
+                        print("✅ Reusing credentials refreshed by another session")
+                        timing.count('refresh_reused', source='file')
+                        return True
+
+                    return self._refresh_from_browser(headless, interactive_fallback)
+            except TimeoutError as e:
+                print(f"❌ {e}")
+                return False
+
+    def _refresh_through_broker(self, headless, interactive_fallback, stale_token):
+        """
+        Let the broker refresh (once for all its clients).
+
+        Returns:
+            True/False, or None if the broker is gone and the caller should refresh itself
+        """
+        token_key = _broker_module().token_key
+
+        creds = self._broker_request(
+            'refresh', timeout=BROKER_REFRESH_TIMEOUT_SECONDS, stale_token_key=token_key(stale_token),
+            headless=headless, interactive_fallback=interactive_fallback
+        )
+        if creds is None:
+            return None
+        if not creds.get('ok') or not creds.get('x_user_token'):
+            print(f"❌ {creds.get('error') or 'The credential broker has no credentials'}")
+            return False
+
+        if creds['x_user_token'] != stale_token:
+            timing.count('refresh_reused', source='broker')
+        self._adopt_credentials(creds)
+        return True
+
+    def _reload_if_refreshed(self, stale_token):
+        """Adopt credentials from the credentials file if they differ from ``stale_token``"""
+        creds = read_json(self.credentials_file)
+        if not creds:
+            return False
+
+        token = creds.get('x_user_token')
+        cookies = creds.get('cookies')
+        if not token or not cookies or token == stale_token:
+            return False
+
+        self.cookies = cookies
+        self.x_user_token = token
+        self._apply_credentials()
+        return True
+
+    def _refresh_from_browser(self, headless, interactive_fallback):
+        """Run the browser login and save the new credentials (caller holds the locks)"""
         try:
-            from .login_and_extract import get_session_from_browser
+            try:
+                from .login_and_extract import browser_reuse_enabled, get_session_from_browser
+            except ImportError:  # Run as a script
+                from login_and_extract import browser_reuse_enabled, get_session_from_browser
         except ImportError:
             print("❌ Cannot import login_and_extract module")
             return False
 
         print("🔄 Attempting automatic credential refresh...")
 
-        # Skip headless mode by default since Okta MFA is required
-        # Try headless first only if explicitly requested
-        if headless:
-            cookies, token = get_session_from_browser(use_chrome=True, headless=True)
+        # Skip headless mode by default since Okta MFA is required. Try it
+        # first if requested, or if a persistent browser profile holds an
+        # Okta session that usually makes MFA unnecessary
+        if headless or browser_reuse_enabled():
+            cookies, token = get_session_from_browser(use_chrome=True, headless=True,
+                                                      instance_url=self.instance_url)
 
             if cookies and token:
                 self.cookies = cookies
                 self.x_user_token = token
+                self._apply_credentials()
                 self.save_credentials()
                 return True
 
@@ -138,39 +517,102 @@ class ServiceNowSession:
             print("Please complete login and MFA when prompted.")
             self.mfa_refresh_attempted = True
 
-            cookies, token = get_session_from_browser(use_chrome=True, headless=False)
+            cookies, token = get_session_from_browser(use_chrome=True, headless=False,
+                                                      instance_url=self.instance_url)
 
             if cookies and token:
                 self.cookies = cookies
                 self.x_user_token = token
+                self._apply_credentials()
                 self.save_credentials()
+                # Allow a later MFA prompt once these credentials expire
+                # (long-lived sessions such as worker mode)
+                self.mfa_refresh_attempted = False
                 return True
 
         return False
 
-    def test_credentials(self):
+    def test_credentials(self, use_cache=True):
         """
         Quick API call to validate if current session is valid.
 
+        A successful result is shared with other processes through the
+        instance's validation cache file; within VALIDATION_TTL_SECONDS of it the check
+        is answered without a network call unless ``use_cache`` is False.
+
         Returns:
             True if credentials are valid, False otherwise
         """
         if not self.cookies or not self.x_user_token:
             return False
 
+        if use_cache:
+            validated_at = self._cached_validation()
+            if validated_at and time.time() - validated_at < VALIDATION_TTL_SECONDS:
+                return True
+
+        response = self._ping()
+        if response is not None and response.status_code == 200:
+            self._mark_valid(persist=True)
+            return True
+        return False
+
+    def _ping(self):
+        """
+        Cheapest authenticated call (one sys_user sys_id).
+
+        The outcome is recorded on the circuit breaker: any answer below 500 -
+        even a 401 - means the instance is up.
+
+        Returns:
+            The response, or None if the instance could not be reached
+        """
         try:
             url = f'{self.instance_url}/api/now/table/sys_user'
-            headers = {'X-UserToken': self.x_user_token}
-            response = requests.get(
+            response = self.http.get(
                 url,
-                headers=headers,
-                cookies=self.cookies,
-                params={'sysparm_limit': 1},
+                params={'sysparm_limit': 1, 'sysparm_fields': 'sys_id'},
                 timeout=10
             )
-            return response.status_code == 200
-        except:
-            return False
+        except Exception:
+            self.circuit.record_failure()
+            return None
+
+        if response.status_code >= 500:
+            self.circuit.record_failure()
+        else:
+            self.circuit.record_success()
+        return response
+
+    def _check_circuit(self):
+        """
+        Fail fast while the instance is known to be down.
+
+        Once the cooldown is over, one caller (in any process) probes the
+        instance through test_credentials; everyone else keeps failing fast
+        until the probe closes the circuit.
+
+        Raises:
+            CircuitOpenError: If the circuit is (still) open
+        """
+        decision = self.circuit.before_request()
+        if decision == CLOSED:
+            return
+
+        if decision == PROBE:
+            print("🔌 Checking whether ServiceNow is reachable again...")
+            if self.cookies and self.x_user_token:
+                self.test_credentials(use_cache=False)
+            else:
+                self._ping()
+            if not self.circuit.is_open():
+                print("✅ ServiceNow is reachable again")
+                return
+
+        timing.count('circuit_rejected')
+        raise CircuitOpenError(
+            f"ServiceNow is unreachable - not retrying for {self.circuit.remaining_cooldown():.0f}s"
+        )
 
     def _get_headers(self):
         """Build headers dict for requests"""
@@ -184,13 +626,17 @@ class ServiceNowSession:
 
     def request(self, method, url, **kwargs):
         """
-        Wrapper around requests with automatic retry on 401.
+        Wrapper around the pooled transport with automatic retry on 401.
 
         This method transparently handles session expiration by:
         1. Making the original request
         2. If 401 Unauthorized → refresh credentials and retry
         3. If still 401 after refresh → raise AuthenticationError
 
+        Every attempt waits for the session's rate limiter, and throttled or
+        unavailable responses (429/502/503/504) are retried with backoff per
+        ``retry_policy``; the last response is returned if retries run out.
+
         Args:
             method: HTTP method (GET, POST, PUT, DELETE, etc.)
             url: Full URL to request
@@ -201,38 +647,45 @@ class ServiceNowSession:
 
         Raises:
             AuthenticationError: If credential refresh fails or credentials are invalid
+            CircuitOpenError: If the instance is known to be down (see CircuitBreaker)
         """
+        # Don't wait out timeouts (or open a login browser) during an outage
+        self._check_circuit()
+
         # Ensure we have credentials
         if not self.cookies or not self.x_user_token:
             print("⚠️  No credentials found - triggering authentication...")
-            if not self.refresh_credentials(headless=False, interactive_fallback=True):
+            if not self.refresh_credentials(**self._refresh_options()):
                 raise AuthenticationError("No credentials available and refresh failed")
+        else:
+            self.ensure_fresh()
 
-        # Add headers and cookies to kwargs
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-        kwargs['headers'].update(self._get_headers())
-
-        if 'cookies' not in kwargs:
-            kwargs['cookies'] = self.cookies
+        # Cookies and X-UserToken live on the pooled transport; only
+        # per-call headers and the default timeout are added here
+        # Caller-supplied headers (e.g. an upload's Content-Type) take precedence
+        kwargs['headers'] = {**self._get_headers(), **(kwargs.get('headers') or {})}
+        kwargs.setdefault('timeout', self.timeout)
 
         # Make the request
-        response = requests.request(method, url, **kwargs)
+        token_used = self.x_user_token
+        response, attempt = self._send_with_retry(method, url, kwargs)
 
         # Handle 401 Unauthorized (expired session)
         if response.status_code == 401:
             print("⚠️  Session expired (401 Unauthorized)")
+            timing.count('http_401')
 
-            if self.refresh_credentials(headless=False, interactive_fallback=True):
+            if self.refresh_credentials(stale_token=token_used, **self._refresh_options()):
                 print("✅ Credentials refreshed successfully")
                 print("🔄 Retrying original request...")
 
-                # Update headers and cookies with fresh credentials
-                kwargs['headers'].update(self._get_headers())
-                kwargs['cookies'] = self.cookies
+                # Update headers with fresh credentials (cookies were
+                # already swapped onto the transport by the refresh)
+                kwargs['headers']['X-UserToken'] = self.x_user_token
 
-                # Retry the original request
-                response = requests.request(method, url, **kwargs)
+                # Retry the original request over the same pooled connection
+                timing.count('retry', reason='401')
+                response, _ = self._send_with_retry(method, url, kwargs, attempt + 1)
 
                 if response.status_code == 401:
                     print("❌ Still getting 401 after refresh - credentials may be invalid")
@@ -245,6 +698,76 @@ class ServiceNowSession:
                 print("  3. Re-run your original command")
                 raise AuthenticationError("Unable to refresh credentials automatically")
 
+        # Any non-401 answer means the session was accepted
+        self._mark_valid()
+        return response
+
+    def _send_with_retry(self, method, url, kwargs, attempt=1):
+        """
+        Send under the rate limiter, retrying throttled or unavailable responses.
+
+        A 429 also pauses the shared rate limiter for the wait, so the other
+        threads on this session back off too. Connection failures and 5xx
+        responses are counted by the circuit breaker; retries stop once it
+        opens.
+
+        Returns:
+            (response, number of the last attempt)
+        """
+        import requests
+
+        tries = 0
+        while True:
+            tries += 1
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire()
+                if waited > 0:
+                    timing.record('rate_limit_wait', waited)
+
+            try:
+                response = self._send(method, url, attempt, kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.circuit.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                if self.circuit.record_failure():
+                    # Tripped - stop hammering the instance
+                    return response, attempt
+            else:
+                self.circuit.record_success()
+
+            delay = self.retry_policy.retry_delay(method, response.status_code, response.headers, tries)
+            if delay is None:
+                return response, attempt
+
+            if response.status_code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            print(f"⚠️  HTTP {response.status_code} from ServiceNow - retrying in {delay:.1f}s")
+            timing.count('retry', reason=str(response.status_code))
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method, url, attempt, kwargs):
+        """Send one attempt over the pooled transport (timed when SNOW_TIMING is set)"""
+        if not timing.enabled():
+            return self.http.request(method, url, **kwargs)
+
+        from urllib.parse import urlsplit
+
+        with timing.span('request', method=method, path=urlsplit(url).path, attempt=attempt) as span:
+            response = self.http.request(method, url, **kwargs)
+            body = response.request.body
+            span.set(
+                status=response.status_code,
+                bytes_out=len(body) if isinstance(body, (bytes, str)) else None,
+                bytes_in=None if kwargs.get('stream') else len(response.content),
+                # Send to response headers: network plus ServiceNow server time
+                elapsed_ms=round(response.elapsed.total_seconds() * 1000, 3),
+                # TCP+TLS connects (the pool is only known once the response is in)
+                new_connections=timing.connections_opened(getattr(response.raw, '_pool', None)),
+            )
         return response
 
     def get(self, url, **kwargs):
@@ -267,6 +790,43 @@ class ServiceNowSession:
         """Convenience method for PATCH requests"""
         return self.request('PATCH', url, **kwargs)
 
+    def iter_table(self, table, query=None, page_size=1000, **options):
+        """
+        Yield every record matching ``query``, page by page (synchronous
+        sessions only).
+
+        Each page is streamed and parsed one record at a time (see
+        utils.json_stream), so memory stays at about one record however
+        large the page. Order the query (ORDERBY...) for stable paging.
+
+        Args:
+            options: table_params options (fields, display_value, ...)
+
+        Raises:
+            RuntimeError: If a page request fails
+        """
+        try:
+            from .json_stream import iter_results
+        except ImportError:  # Run as a script
+            from json_stream import iter_results
+
+        offset = 0
+        while True:
+            response = self.table_list(table, query=query, limit=page_size, offset=offset,
+                                       stream=True, **options)
+            if response.status_code != 200:
+                response.close()
+                raise RuntimeError(f"Failed to read {table} (status {response.status_code})")
+
+            count = 0
+            for record in iter_results(response):
+                count += 1
+                yield record
+
+            offset += count
+            if count < page_size:
+                return
+
 
 def main():
     """Test the session manager"""
@@ -287,8 +847,7 @@ def main():
 
     print("Making a test API request...")
     try:
-        url = f'{INSTANCE_URL}/api/now/table/sys_user'
-        response = session.get(url, params={'sysparm_limit': 1})
+        response = session.table_list('sys_user', limit=1, fields=['sys_id'])
 
         if response.status_code == 200:
             data = response.json()
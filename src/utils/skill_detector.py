@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Skill-Name Auto-Detection
+
+Finds which installed skill a piece of feedback is about when the caller did
+not name one. The registry of skill names comes from:
+
+- MCP servers configured for Claude Desktop and Claude Code
+  (claude_desktop_config.json, ~/.claude.json, ./.mcp.json)
+- Claude Code skills (~/.claude/skills/<name>/SKILL.md)
+- Optional aliases in ~/.servicenow_surf_skills.json:
+      {"create-sbo-request": ["sbo request", "create_sbo"]}
+
+The merged registry is cached in ~/.servicenow_surf_skill_registry.json and
+only rebuilt when one of its sources changes (compared by stat), so the large
+Claude Code config is not re-parsed on every submission.
+
+All names and aliases are compiled into one trie-shaped regular expression
+(common prefixes factored out), so message and context are each scanned in a
+single pass inside the regex engine, however many skills are installed.
+Separators are interchangeable: "create-sbo-request", "create_sbo_request"
+and "create sbo request" all match the same name.
+
+Single-word names ("time", "memory", "fetch", "git") are ordinary words in
+most feedback, so they only match through an explicit alias (list the name
+itself to opt in: {"github": ["github"]}). A skill is only picked when the
+user's message names it or the context mentions it repeatedly
+(MIN_DETECT_SCORE).
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+
+try:
+    from .credential_store import atomic_write_json, read_json
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, read_json
+
+
+SKILL_ALIASES_FILE = Path.home() / '.servicenow_surf_skills.json'
+REGISTRY_CACHE_FILE = Path.home() / '.servicenow_surf_skill_registry.json'
+REGISTRY_CACHE_VERSION = 2
+CLAUDE_SKILLS_DIR = Path.home() / '.claude' / 'skills'
+MCP_CONFIG_FILES = (
+    Path.home() / 'Library' / 'Application Support' / 'Claude' / 'claude_desktop_config.json',
+    Path.home() / '.config' / 'Claude' / 'claude_desktop_config.json',
+    Path.home() / '.claude.json',
+    Path('.mcp.json'),
+)
+
+# This server - mentions of the feedback tool itself say nothing about the skill
+IGNORED_SKILLS = frozenset(('saai-skill-feedback', 'skill-feedback', 'submit-skill-feedback'))
+MIN_ALIAS_LENGTH = 3
+
+# Ranking: a mention in the user's message outweighs one in the context, and
+# later (more recent) context mentions outweigh earlier ones
+MESSAGE_WEIGHT = 3.0
+CONTEXT_WEIGHT = 1.0
+RECENCY_WEIGHT = 1.0
+# One mention in the message, or about three in the context
+MIN_DETECT_SCORE = MESSAGE_WEIGHT
+
+_SEPARATORS = re.compile(r'[-_\s]+')
+_SEPARATOR_PATTERN = r'[-_\s]+'
+_WORD_CHARS = 'a-z0-9'
+_WORD_CHAR_SET = frozenset('abcdefghijklmnopqrstuvwxyz0123456789')
+
+
+def normalize_name(name):
+    """Lowercase with runs of '-', '_' and whitespace folded to '-'"""
+    return _SEPARATORS.sub('-', (name or '').strip().lower()).strip('-')
+
+
+def _read_mcp_servers(path):
+    """MCP server names from a Claude Desktop / Claude Code config file"""
+    data = read_json(path) or {}
+    if not isinstance(data, dict):
+        return []
+    names = list(data.get('mcpServers') or {})
+    for project in (data.get('projects') or {}).values():
+        if isinstance(project, dict):
+            names.extend(project.get('mcpServers') or {})
+    return names
+
+
+def _read_skill_dirs(path):
+    """Skill names (SKILL.md 'name:' or the directory name) under a skills directory"""
+    names = []
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return names
+
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        name = entry.name
+        try:
+            with open(os.path.join(entry.path, 'SKILL.md'), 'r', encoding='utf-8') as f:
+                for _, line in zip(range(20), f):
+                    if line.startswith('name:'):
+                        name = line[len('name:'):].strip().strip('\'"') or name
+                        break
+        except OSError:
+            pass
+        names.append(name)
+    return names
+
+
+def _sources(aliases_file, config_files, skills_dir):
+    return [(Path(aliases_file), 'aliases'), (Path(skills_dir), 'skills')] + \
+           [(Path(path), 'mcp') for path in config_files]
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_registry(aliases_file=SKILL_ALIASES_FILE, config_files=MCP_CONFIG_FILES,
+                  skills_dir=CLAUDE_SKILLS_DIR, cache_file=REGISTRY_CACHE_FILE):
+    """
+    Installed skills and their aliases.
+
+    Returns:
+        {skill name: [normalized aliases]} (without IGNORED_SKILLS). A
+        single-word name keeps itself as an alias only if the aliases file
+        lists it.
+    """
+    sources = _sources(aliases_file, config_files, skills_dir)
+    signatures = {str(path.resolve()): _signature(path) for path, _ in sources}
+
+    if cache_file is not None:
+        cached = read_json(cache_file) or {}
+        if (cached.get('version') == REGISTRY_CACHE_VERSION and cached.get('sources') == signatures
+                and isinstance(cached.get('skills'), dict)):
+            return cached['skills']
+
+    skills = {}
+    for path, kind in sources:
+        if signatures[str(path.resolve())] is None:
+            continue
+        if kind == 'aliases':
+            data = read_json(path) or {}
+            if isinstance(data, dict):
+                for name, aliases in data.items():
+                    if isinstance(aliases, str):
+                        aliases = [aliases]
+                    skills.setdefault(name, set()).update(aliases or [])
+        elif kind == 'skills':
+            for name in _read_skill_dirs(path):
+                skills.setdefault(name, set())
+        else:
+            for name in _read_mcp_servers(path):
+                skills.setdefault(name, set())
+
+    # Names keep the spelling they were installed under; spellings that
+    # normalize the same are merged into the first one seen
+    registry = {}
+    spelling = {}
+    for name, aliases in skills.items():
+        key = normalize_name(name)
+        if not key or key in IGNORED_SKILLS:
+            continue
+        entry = registry.setdefault(spelling.setdefault(key, name.strip()), set())
+        entry.update(normalize_name(alias) for alias in aliases)
+        if '-' in key:
+            entry.discard(key)  # Matched as the name anyway
+        entry.discard('')
+    registry = {name: sorted(aliases) for name, aliases in sorted(registry.items())}
+
+    if cache_file is not None:
+        try:
+            atomic_write_json(cache_file, {'version': REGISTRY_CACHE_VERSION, 'sources': signatures,
+                                          'skills': registry})
+        except OSError:
+            pass
+    return registry
+
+
+def _trie_pattern(phrases):
+    """Regex source matching any of ``phrases`` (normalized), prefixes factored into a trie"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = None  # A phrase ends here
+
+    def build(node):
+        branches = [
+            (_SEPARATOR_PATTERN if char == '-' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        ends_here = '' in node
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if ends_here else '')
+
+    return build(trie)
+
+
+class SkillDetector:
+    """
+    Precompiled matcher over a skill registry ({name: [aliases]}).
+
+        detector = SkillDetector(load_registry())
+        detector.detect(message, conversation_context)   # -> 'create-sbo-request' or None
+    """
+
+    def __init__(self, registry):
+        self.canonical = {}
+        for name, aliases in registry.items():
+            # A single-word name only matches through an explicit alias
+            phrases = list(aliases) + ([name] if '-' in normalize_name(name) else [])
+            for phrase in phrases:
+                phrase = normalize_name(phrase)
+                if len(phrase) >= MIN_ALIAS_LENGTH:
+                    self.canonical.setdefault(phrase, name)
+
+        # The left word boundary is checked per match in _scan: a leading
+        # lookbehind is evaluated at every position and triples the scan time
+        self.pattern = None
+        if self.canonical:
+            self.pattern = re.compile(f'(?:{_trie_pattern(self.canonical)})(?![{_WORD_CHARS}])')
+
+    def _scan(self, text, scores, last_seen, weight, recency, offset):
+        if not text:
+            return
+        text = text.lower()
+        length = len(text)
+        for match in self.pattern.finditer(text):
+            position = match.start()
+            if position and text[position - 1] in _WORD_CHAR_SET:
+                continue  # Inside a longer word ('xgithub')
+            phrase = match.group()
+            name = self.canonical.get(phrase) or self.canonical.get(normalize_name(phrase))
+            if name is None:
+                continue
+            scores[name] = scores.get(name, 0.0) + weight + recency * position / length
+            last_seen[name] = offset + position
+
+    def rank(self, message, conversation_context=None):
+        """
+        Candidate skills, best first.
+
+        Returns:
+            List of (name, score) tuples
+        """
+        if self.pattern is None:
+            return []
+
+        scores = {}
+        last_seen = {}
+        context_length = len(conversation_context or '')
+        # Context first so a tie goes to the skill the user's message names
+        self._scan(conversation_context, scores, last_seen, CONTEXT_WEIGHT, RECENCY_WEIGHT, 0)
+        self._scan(message, scores, last_seen, MESSAGE_WEIGHT, 0.0, context_length)
+        return sorted(scores.items(), key=lambda item: (item[1], last_seen[item[0]]), reverse=True)
+
+    def detect(self, message, conversation_context=None):
+        """The most likely skill, or None if none is mentioned often enough to be sure"""
+        ranked = self.rank(message, conversation_context)
+        if ranked and ranked[0][1] >= MIN_DETECT_SCORE:
+            return ranked[0][0]
+        return None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the skill registry or test detection")
+    parser.add_argument('text', nargs='?', help="Text to detect a skill in (default: list the registry)")
+    args = parser.parse_args()
+
+    registry = load_registry()
+    if args.text is None:
+        for name, aliases in registry.items():
+            print(f"{name}" + (f"  ({', '.join(aliases)})" if aliases else ''))
+        return 0
+
+    for name, score in SkillDetector(registry).rank(args.text):
+        print(f"{score:6.2f}  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Local Cache of Feedback SBO Status
+
+Keeps the last known state of each looked-up SBO, plus the server time it was
+last confirmed (``checked_at``, from the response Date header). A poll only
+asks ServiceNow for records with ``sys_updated_on`` at or after the oldest
+``checked_at`` of the records being polled, so unchanged records are not
+transferred again.
+"""
+
+import time
+from pathlib import Path
+
+try:
+    from .credential_store import atomic_write_json, read_json
+except ImportError:  # Run as a script
+    from credential_store import atomic_write_json, read_json
+
+
+STATUS_CACHE_FILE = Path.home() / '.servicenow_surf_status.json'
+
+# ServiceNow's internal (UTC) date-time format, as used in sysparm_query
+GLIDE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def glide_time(epoch_seconds):
+    """Format epoch seconds as a ServiceNow UTC date-time"""
+    return time.strftime(GLIDE_DATETIME_FORMAT, time.gmtime(epoch_seconds))
+
+
+def server_time(response):
+    """
+    The instance's clock from a response's Date header, as a ServiceNow
+    date-time (falls back to the local clock)
+    """
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return glide_time(parsedate_to_datetime(response.headers['Date']).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return glide_time(time.time())
+
+
+class StatusCache:
+    """
+    JSON-file cache of SBO status records keyed by number.
+
+    Entries look like:
+        {"number": ..., "sys_id": ..., "state": ..., "sys_updated_on": ...,
+         "checked_at": "<server time>", "fetched_at": <local epoch seconds>}
+    """
+
+    def __init__(self, path=STATUS_CACHE_FILE):
+        self.path = Path(path)
+        self.records = (read_json(self.path) or {}).get('records', {})
+
+    def get(self, number):
+        return self.records.get(number)
+
+    def numbers(self):
+        return sorted(self.records)
+
+    def put(self, record, checked_at):
+        """Store a fresh record confirmed at ``checked_at`` (server time)"""
+        self.records[record['number']] = dict(record, checked_at=checked_at, fetched_at=time.time())
+
+    def confirm(self, number, checked_at):
+        """Mark a cached record as unchanged as of ``checked_at``"""
+        record = self.records.get(number)
+        if record is not None:
+            record['checked_at'] = checked_at
+            record['fetched_at'] = time.time()
+
+    def oldest_check(self, numbers):
+        """Earliest ``checked_at`` among ``numbers`` (the incremental poll watermark)"""
+        checks = [self.records[n]['checked_at'] for n in numbers if n in self.records]
+        return min(checks) if checks else None
+
+    def save(self):
+        try:
+            atomic_write_json(self.path, {'records': self.records})
+        except OSError:
+            pass  # A cache - the lookup result is still returned
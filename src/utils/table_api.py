@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Lean Table API Calls
+
+By default the Table API answers every call with the complete record: every
+column, reference fields expanded to {"link", "value"} objects and all of it
+serialized for a caller that usually reads two fields. TableAPIMixin gives
+ServiceNowSession and AsyncServiceNowSession explicit per-call control over
+the response shape:
+
+- ``fields``: only these columns (sysparm_fields)
+- ``exclude_reference_link``: reference fields as bare sys_ids (default on)
+- ``display_value``: False (stored values, the default), True (display
+  values) or 'all' (both, as {"value", "display_value"} objects)
+
+List responses can be consumed with utils.json_stream.iter_results so large
+pages are parsed record by record instead of through response.json().
+"""
+
+TABLE_API_PATH = '/api/now/table'
+
+DISPLAY_VALUES = (False, True, 'all')
+
+# Fields every insert needs back (the result shown to the user)
+CREATE_RESPONSE_FIELDS = ('number', 'sys_id')
+
+
+def table_path(table, sys_id=None):
+    """Table API path for a table or one of its records"""
+    return f"{TABLE_API_PATH}/{table}/{sys_id}" if sys_id else f"{TABLE_API_PATH}/{table}"
+
+
+def table_params(fields=None, display_value=False, exclude_reference_link=True,
+                 query=None, limit=None, offset=None):
+    """
+    Build sysparm_* query parameters.
+
+    Args:
+        fields: Column names (iterable or comma-separated string); None for all
+        display_value: False, True or 'all'
+        exclude_reference_link: Return reference fields as bare sys_ids
+        query: Encoded query (sysparm_query)
+        limit / offset: Paging (sysparm_limit / sysparm_offset)
+
+    Raises:
+        ValueError: If display_value is not one of DISPLAY_VALUES
+    """
+    if display_value not in DISPLAY_VALUES:
+        raise ValueError(f"display_value must be one of {DISPLAY_VALUES}, not {display_value!r}")
+
+    params = {}
+    if query:
+        params['sysparm_query'] = query
+    if fields:
+        params['sysparm_fields'] = fields if isinstance(fields, str) else ','.join(fields)
+    if display_value:
+        params['sysparm_display_value'] = 'all' if display_value == 'all' else 'true'
+    if exclude_reference_link:
+        params['sysparm_exclude_reference_link'] = 'true'
+    if limit is not None:
+        params['sysparm_limit'] = limit
+    if offset:
+        params['sysparm_offset'] = offset
+    return params
+
+
+def table_url(path, **options):
+    """Relative URL with the query string (for Batch API sub-requests)"""
+    from urllib.parse import urlencode
+
+    params = table_params(**options)
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+class TableAPIMixin:
+    """
+    Table API helpers for a session class with ``instance_url`` and
+    ``request(method, url, **kwargs)``.
+
+    Each helper returns whatever ``request`` returns - a response for
+    ServiceNowSession, an awaitable for AsyncServiceNowSession - so status
+    handling stays with the caller. Extra keyword arguments (json, stream,
+    timeout, ...) are passed through to ``request``.
+    """
+
+    def table_request(self, method, table, sys_id=None, fields=None, display_value=False,
+                      exclude_reference_link=True, query=None, limit=None, offset=None, **kwargs):
+        params = table_params(fields, display_value, exclude_reference_link, query, limit, offset)
+        params.update(kwargs.pop('params', None) or {})
+        return self.request(method, f"{self.instance_url}{table_path(table, sys_id)}", params=params, **kwargs)
+
+    def table_get(self, table, sys_id, **options):
+        """GET one record"""
+        return self.table_request('GET', table, sys_id, **options)
+
+    def table_list(self, table, query=None, limit=None, offset=None, **options):
+        """GET a page of records (pass stream=True to parse it with iter_results)"""
+        return self.table_request('GET', table, query=query, limit=limit, offset=offset, **options)
+
+    def table_create(self, table, record, fields=CREATE_RESPONSE_FIELDS, **options):
+        """POST a new record; only ``fields`` come back"""
+        return self.table_request('POST', table, fields=fields, json=record, **options)
+
+    def table_update(self, table, sys_id, changes, fields=('sys_id',), **options):
+        """PATCH a record; only ``fields`` come back"""
+        return self.table_request('PATCH', table, sys_id, fields=fields, json=changes, **options)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Opt-in Timing Spans
+
+Structured timing for the submission and authentication hot paths. Set
+SNOW_TIMING to a file path (appended to, so runs accumulate) or to 'stderr'
+and every span and counter is written as one JSON line:
+
+    {"type": "span", "name": "request", "ms": 41.2, "ts": ..., "pid": ..., "status": 201, ...}
+    {"type": "counter", "name": "http_401", "value": 1, "ts": ..., "pid": ...}
+
+When SNOW_TIMING is unset, span() returns a shared no-op object and count()
+returns immediately, so instrumentation costs next to nothing.
+
+Summarize one or more timing files (counters are summed across runs):
+    python3 src/utils/timing.py report timing.jsonl [more.jsonl ...] [--json]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+
+TIMING_ENV = 'SNOW_TIMING'
+
+_sink = None
+_sink_lock = threading.Lock()
+_sink_failed = False  # SNOW_TIMING could not be opened - timing is off for the process
+
+_pool_connections = weakref.WeakKeyDictionary()  # urllib3 pool -> connections seen
+_pools_lock = threading.Lock()
+
+
+def enabled():
+    """True if SNOW_TIMING is set (and its file could be opened)"""
+    return not _sink_failed and bool(os.environ.get(TIMING_ENV))
+
+
+def _write(event):
+    """
+    Write one JSON line to the sink (opened on first use).
+
+    Never raises - if the sink cannot be opened, a warning is printed once
+    and timing is switched off.
+    """
+    global _sink, _sink_failed
+
+    line = json.dumps(event, default=str) + '\n'
+    with _sink_lock:
+        if _sink_failed:
+            return
+        if _sink is None:
+            target = os.environ.get(TIMING_ENV)
+            if target == 'stderr':
+                _sink = sys.stderr
+            else:
+                # Line-buffered append: each event is a single write, so lines
+                # from concurrent processes do not interleave
+                try:
+                    _sink = open(os.path.expanduser(target), 'a', buffering=1, encoding='utf-8')
+                except OSError as e:
+                    _sink_failed = True
+                    print(f"⚠️  Timing disabled - cannot open {target}: {e}", file=sys.stderr)
+                    return
+        try:
+            _sink.write(line)
+        except (OSError, ValueError):
+            pass
+
+
+class Span:
+    """A timed section; extra fields can be attached with set() before it ends"""
+
+    __slots__ = ('name', 'fields', '_started')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self._started = None
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event = {
+            'type': 'span',
+            'name': self.name,
+            'ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'ts': round(time.time(), 3),
+            'pid': os.getpid(),
+            'thread': threading.current_thread().name,
+        }
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        event.update(self.fields)
+        _write(event)
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned when timing is disabled"""
+
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **fields):
+    """
+    Time a ``with`` block as span ``name``.
+
+        with timing.span('request', method='POST') as s:
+            response = ...
+            s.set(status=response.status_code)
+    """
+    if not enabled():
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def record(name, seconds, **fields):
+    """Emit a span that was timed elsewhere (e.g. interpreter startup)"""
+    if not enabled():
+        return
+    _write({
+        'type': 'span',
+        'name': name,
+        'ms': round(seconds * 1000, 3),
+        'ts': round(time.time(), 3),
+        'pid': os.getpid(),
+        'thread': threading.current_thread().name,
+        **fields,
+    })
+
+
+def count(name, value=1, **fields):
+    """Emit a counter event (summed by ``report``)"""
+    if not enabled():
+        return
+    _write({
+        'type': 'counter',
+        'name': name,
+        'value': value,
+        'ts': round(time.time(), 3),
+        'pid': os.getpid(),
+        **fields,
+    })
+
+
+def connections_opened(pool):
+    """
+    New connections a urllib3 pool opened since the last call for that pool.
+
+    Per call the attribution is approximate when requests run concurrently,
+    but the totals across spans are exact.
+    """
+    total = getattr(pool, 'num_connections', None)
+    if total is None:
+        return None
+    with _pools_lock:
+        previous = _pool_connections.get(pool, 0)
+        _pool_connections[pool] = total
+    return max(0, total - previous)
+
+
+def process_uptime():
+    """Seconds since this process started (Linux only, ~10 ms resolution), else None"""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # Field 22 (starttime, in clock ticks since boot) - counted after
+            # the parenthesised command name, which may contain spaces
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _percentile(ordered, fraction):
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(paths):
+    """
+    Aggregate timing files.
+
+    Returns:
+        {'spans': {name: {count, errors, p50_ms, p95_ms, p99_ms, total_ms}},
+         'counters': {name: total}, 'processes': n}
+    """
+    durations = {}
+    errors = {}
+    counters = {}
+    pids = set()
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from a killed process
+                if not isinstance(event, dict):
+                    continue  # Valid JSON, but not an event
+                pids.add((event.get('pid'), path))
+                name = event.get('name')
+                if event.get('type') == 'span':
+                    durations.setdefault(name, []).append(event.get('ms', 0))
+                    if event.get('error'):
+                        errors[name] = errors.get(name, 0) + 1
+                elif event.get('type') == 'counter':
+                    counters[name] = counters.get(name, 0) + event.get('value', 0)
+
+    spans = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        spans[name] = {
+            'count': len(values),
+            'errors': errors.get(name, 0),
+            'p50_ms': _percentile(values, 0.50),
+            'p95_ms': _percentile(values, 0.95),
+            'p99_ms': _percentile(values, 0.99),
+            'total_ms': round(sum(values), 3),
+        }
+
+    return {'spans': spans, 'counters': dict(sorted(counters.items())), 'processes': len(pids)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize SNOW_TIMING files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report = subparsers.add_parser('report', help="Per-span percentiles and counter totals")
+    report.add_argument('paths', nargs='+', help="Timing JSONL files")
+    report.add_argument('--json', action='store_true', help="Print the machine-readable summary")
+    args = parser.parse_args()
+
+    summary = summarize(args.paths)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"{'span':<32} {'count':>7} {'err':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, stats in summary['spans'].items():
+        print(f"{name:<32} {stats['count']:>7} {stats['errors']:>5} "
+              f"{stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} {stats['p99_ms']:>10.1f}")
+    if summary['counters']:
+        print()
+        for name, total in summary['counters'].items():
+            print(f"{name:<32} {total:>7}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
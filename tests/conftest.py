@@ -0,0 +1,28 @@
+"""Shared pytest setup: import the tools the way submit_feedback.py does (src/ on sys.path)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+
+class FakeClock:
+    """Stand-in for time.time / time.monotonic that only moves when told to"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
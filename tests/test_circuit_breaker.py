@@ -0,0 +1,103 @@
+"""Tripping, half-open probes and the probe lease (utils/circuit_breaker.py)."""
+
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, OPEN, PROBE, PROBE_LEASE_SECONDS, CircuitBreaker
+
+INSTANCE = 'https://example.service-now.com'
+
+
+@pytest.fixture
+def state_file(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker.time, 'time', clock)
+    return tmp_path / 'circuit.json'
+
+
+def make_breaker(state_file):
+    return CircuitBreaker(INSTANCE, path=state_file, failure_threshold=3, cooldown=60)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(state_file):
+    breaker = make_breaker(state_file)
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.before_request() == CLOSED
+    assert breaker.record_failure() is True
+    assert breaker.before_request() == OPEN
+    assert breaker.remaining_cooldown() == 60
+
+
+def test_success_resets_the_failure_count(state_file):
+    breaker = make_breaker(state_file)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.before_request() == CLOSED
+
+
+def test_other_processes_see_the_open_circuit(state_file):
+    trip(make_breaker(state_file))
+
+    assert make_breaker(state_file).before_request() == OPEN
+    assert CircuitBreaker('https://other.service-now.com', path=state_file).before_request() == CLOSED
+
+
+def test_exactly_one_probe_after_the_cooldown(state_file, clock):
+    first, second = make_breaker(state_file), make_breaker(state_file)
+    trip(first)
+
+    clock.advance(59)
+    assert first.before_request() == OPEN
+
+    clock.advance(1)
+    assert first.before_request() == PROBE
+    assert second.before_request() == OPEN
+    assert first.before_request() == OPEN
+
+
+def test_probe_lease_expires_if_the_prober_never_reports(state_file, clock):
+    first, second = make_breaker(state_file), make_breaker(state_file)
+    trip(first)
+    clock.advance(60)
+    assert first.before_request() == PROBE  # ... and the process dies
+
+    clock.advance(PROBE_LEASE_SECONDS - 1)
+    assert second.before_request() == OPEN
+
+    clock.advance(1)
+    assert second.before_request() == PROBE
+
+
+def test_successful_probe_closes_the_circuit(state_file, clock):
+    breaker = make_breaker(state_file)
+    trip(breaker)
+    clock.advance(60)
+    assert breaker.before_request() == PROBE
+
+    breaker.record_success()
+    assert breaker.before_request() == CLOSED
+    assert not breaker.is_open()
+
+
+def test_failed_probe_restarts_the_cooldown(state_file, clock):
+    breaker = make_breaker(state_file)
+    trip(breaker)
+    clock.advance(60)
+    assert breaker.before_request() == PROBE
+
+    assert breaker.record_failure() is True
+    assert breaker.before_request() == OPEN
+    assert breaker.remaining_cooldown() == 60
+
+    clock.advance(60)
+    assert breaker.before_request() == PROBE
@@ -0,0 +1,94 @@
+"""Near-duplicate lookups and record state in the SimHash index (utils/dedup_index.py)."""
+
+import sqlite3
+
+import pytest
+
+from utils.dedup_index import DuplicateIndex, hamming, is_closed, simhash
+
+MESSAGE = 'Skill fails to resolve the assignment group when the caller has no department set'
+REWORDED = 'The skill failed to resolve the assignment group when a caller has no department set'
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DuplicateIndex(tmp_path / 'dedup.db')
+    yield index
+    index.close()
+
+
+def test_rewording_stays_within_the_match_distance():
+    assert hamming(simhash(MESSAGE), simhash(REWORDED)) <= 6
+
+
+def test_short_messages_are_not_fingerprinted(index):
+    assert simhash('It broke') is None
+    assert index.add('DSRT0000001', 'a', 'Triage', 'It broke') is False
+    assert index.find('Triage', 'It broke') is None
+
+
+def test_finds_a_near_duplicate_for_the_same_skill(index):
+    index.add('DSRT0000001', 'sys-1', 'Incident Triage', MESSAGE, state='opened')
+
+    match = index.find('incident triage', REWORDED)
+    assert match['number'] == 'DSRT0000001'
+    assert match['sys_id'] == 'sys-1'
+
+
+def test_other_skills_are_not_matched(index):
+    index.add('DSRT0000001', 'sys-1', 'Incident Triage', MESSAGE)
+
+    assert index.find('Knowledge Search', MESSAGE) is None
+
+
+@pytest.mark.parametrize('state', ['closed', 'Closed Complete', 'RESOLVED', 'cancelled'])
+def test_closed_records_are_never_matched(index, state):
+    index.add('DSRT0000001', 'sys-1', 'Triage', MESSAGE, state=state)
+
+    assert is_closed(state)
+    assert index.find('Triage', MESSAGE) is None
+
+
+def test_falls_back_to_an_open_record_when_the_closest_is_closed(index):
+    index.add_many([
+        ('DSRT0000001', 'sys-1', 'Triage', MESSAGE, 'closed'),
+        ('DSRT0000002', 'sys-2', 'Triage', REWORDED, 'opened'),
+    ])
+
+    assert index.find('Triage', MESSAGE)['number'] == 'DSRT0000002'
+
+
+def test_set_states_closes_and_reopens_records(index):
+    index.add('DSRT0000001', 'sys-1', 'Triage', MESSAGE, state='opened')
+
+    index.set_states([('DSRT0000001', 'resolved'), ('DSRT9999999', 'closed')])
+    assert index.find('Triage', MESSAGE) is None
+
+    index.set_states([('DSRT0000001', 'in_progress')])
+    assert index.find('Triage', MESSAGE)['number'] == 'DSRT0000001'
+
+
+def test_index_without_state_column_is_migrated_and_reseeded(tmp_path):
+    path = tmp_path / 'dedup.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE fingerprints (
+            number TEXT PRIMARY KEY, sys_id TEXT, skill TEXT NOT NULL,
+            fingerprint INTEGER NOT NULL,
+            b0 INTEGER NOT NULL, b1 INTEGER NOT NULL, b2 INTEGER NOT NULL, b3 INTEGER NOT NULL,
+            b4 INTEGER NOT NULL, b5 INTEGER NOT NULL, b6 INTEGER NOT NULL, b7 INTEGER NOT NULL,
+            added_at REAL NOT NULL
+        );
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO meta VALUES ('sys_updated_on', '2024-01-01 00:00:00');
+    """)
+    conn.commit()
+    conn.close()
+
+    index = DuplicateIndex(path)
+    try:
+        assert index.get_meta('sys_updated_on') is None
+        index.add('DSRT0000001', 'sys-1', 'Triage', MESSAGE, state='closed')
+        assert index.find('Triage', MESSAGE) is None
+    finally:
+        index.close()
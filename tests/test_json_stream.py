@@ -0,0 +1,68 @@
+"""Streamed decoding of Table API result arrays (utils/json_stream.py)."""
+
+import json
+
+import pytest
+
+from utils.json_stream import StreamParseError, iter_json_array
+
+DOCUMENTS = [
+    '{"result": []}',
+    '{"result": [1.5]}',
+    '{"result": [1.5, -2e10, 3E-2, 0, 12345678901234567890]}',
+    '{"result": [true, false, null, 7]}',
+    '{"result": ["a, b]", "esc\\"aped\\\\", "caf\\u00e9"]}',
+    '{ "result" : [ {"number": "DSRT0000001", "nested": {"list": [1, 2, {"x": null}]}} ,\n'
+    '  {"number": "DSRT0000002", "short_description": "Café 日本 — done"} ] }',
+]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+def test_every_chunk_boundary_decodes_the_same(document):
+    expected = json.loads(document)['result']
+    data = document.encode('utf-8')
+
+    # Splits inside numbers, literals, escapes and multi-byte characters
+    for size in range(1, len(data) + 1):
+        assert list(iter_json_array(split(data, size))) == expected, size
+
+
+def test_accepts_str_chunks():
+    document = '{"result": [{"a": 1}, 2.25]}'
+
+    assert list(iter_json_array(split(document, 3))) == [{'a': 1}, 2.25]
+
+
+def test_custom_key():
+    assert list(iter_json_array([b'{"records": [1, 2]}'], key='records')) == [1, 2]
+
+
+@pytest.mark.parametrize('document', [
+    '{"result": [1, 2',
+    '{"result": [1.5',
+    '{"result": [{"a": 1}, {"b"',
+    '{"result": [1 2]}',
+    '{"result": ',
+    '',
+])
+def test_truncated_or_malformed_input_raises(document):
+    with pytest.raises(StreamParseError):
+        list(iter_json_array(split(document.encode('utf-8'), 4)))
+
+
+@pytest.mark.parametrize('document', ['{"error": {"message": "No access"}}', '[1, 2]'])
+def test_other_documents_are_rejected(document):
+    with pytest.raises(StreamParseError):
+        list(iter_json_array([document.encode('utf-8')]))
+
+
+def test_items_are_yielded_before_the_body_ends():
+    def chunks():
+        yield b'{"result": [{"n": 1},'
+        raise AssertionError('read past the first record')
+
+    assert next(iter_json_array(chunks())) == {'n': 1}
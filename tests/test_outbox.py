@@ -0,0 +1,83 @@
+"""Outbox claim leases, backoff and dead-lettering (utils/outbox.py)."""
+
+import pytest
+
+from utils import outbox as outbox_module
+from utils.outbox import Outbox, CLAIM_LEASE_SECONDS, BACKOFF_BASE_SECONDS
+
+
+@pytest.fixture
+def outbox(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(outbox_module.time, 'time', clock)
+    return Outbox(tmp_path / 'outbox.db')
+
+
+def test_enqueue_keeps_the_given_key_and_ignores_a_repeat(outbox):
+    assert outbox.enqueue({'message': 'a'}, key='ref-1') == 'ref-1'
+    assert outbox.enqueue({'message': 'changed'}, key='ref-1') == 'ref-1'
+
+    claimed = outbox.claim_due()
+    assert [(key, record) for key, record, _ in claimed] == [('ref-1', {'message': 'a'})]
+
+
+def test_claimed_record_is_leased_to_one_flusher(outbox, tmp_path):
+    outbox.enqueue({'message': 'a'})
+    other = Outbox(tmp_path / 'outbox.db')
+
+    assert len(outbox.claim_due()) == 1
+    assert other.claim_due() == []
+
+
+def test_lease_is_reclaimed_after_it_expires(outbox, clock):
+    key = outbox.enqueue({'message': 'a'})
+    outbox.claim_due()  # A flusher that then crashed
+
+    clock.advance(CLAIM_LEASE_SECONDS - 1)
+    assert outbox.claim_due() == []
+
+    clock.advance(1)
+    assert [k for k, _, _ in outbox.claim_due()] == [key]
+
+
+def test_release_returns_the_record_without_counting_an_attempt(outbox):
+    key = outbox.enqueue({'message': 'a'})
+    outbox.claim_due()
+    outbox.release(key)
+
+    assert outbox.claim_due() == [(key, {'message': 'a'}, 0)]
+
+
+def test_failed_record_backs_off_before_the_next_attempt(outbox, clock):
+    key = outbox.enqueue({'message': 'a'})
+    outbox.claim_due()
+    outbox.mark_failed(key, 'HTTP 503')
+
+    # Jittered between half and all of the first backoff
+    assert outbox.claim_due() == []
+    assert BACKOFF_BASE_SECONDS / 2 <= outbox.next_due_in() <= BACKOFF_BASE_SECONDS
+
+    clock.advance(BACKOFF_BASE_SECONDS)
+    assert outbox.claim_due() == [(key, {'message': 'a'}, 1)]
+
+
+def test_record_is_dead_lettered_after_max_attempts(outbox, clock):
+    key = outbox.enqueue({'message': 'a'})
+    for _ in range(3):
+        clock.advance(10_000)
+        assert outbox.claim_due()
+        outbox.mark_failed(key, 'HTTP 500', max_attempts=3)
+
+    clock.advance(10_000)
+    assert outbox.claim_due() == []
+    assert outbox.next_due_in() is None
+    assert outbox.counts() == {'dead': 1}
+
+
+def test_sent_record_is_not_claimed_again(outbox, clock):
+    key = outbox.enqueue({'message': 'a'})
+    outbox.claim_due()
+    outbox.mark_sent(key, 'DSRT0000001', 'abc')
+
+    clock.advance(CLAIM_LEASE_SECONDS)
+    assert outbox.claim_due() == []
+    assert outbox.counts() == {'sent': 1}
@@ -0,0 +1,94 @@
+"""Retry-After handling, resend safety and the token bucket (utils/retry.py)."""
+
+from email.utils import formatdate
+
+import pytest
+
+from utils import retry
+from utils.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after('12') == 12.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after('') is None
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+
+def test_parse_retry_after_http_date(clock, monkeypatch):
+    monkeypatch.setattr(retry.time, 'time', clock)
+
+    assert parse_retry_after(formatdate(clock.now + 30, usegmt=True)) == pytest.approx(30)
+    assert parse_retry_after(formatdate(clock.now - 30, usegmt=True)) == 0.0
+
+
+def test_retry_after_is_honoured_with_a_little_spread():
+    policy = RetryPolicy(backoff_base=0.5)
+
+    for _ in range(50):
+        delay = policy.retry_delay('GET', 429, {'Retry-After': '7'}, attempt=1)
+        assert 7 <= delay <= 7.5
+
+
+def test_retry_after_beyond_the_limit_gives_up():
+    policy = RetryPolicy(max_retry_after=60)
+
+    assert policy.retry_delay('GET', 503, {'Retry-After': '61'}, attempt=1) is None
+    assert policy.retry_delay('GET', 503, {'Retry-After': '60'}, attempt=1) is not None
+
+
+def test_backoff_without_retry_after_is_jittered_and_capped():
+    policy = RetryPolicy(max_attempts=10, backoff_base=1, backoff_max=4)
+
+    for _ in range(50):
+        assert 0.5 <= policy.retry_delay('GET', 502, {}, attempt=1) <= 1
+        assert 2 <= policy.retry_delay('GET', 502, {}, attempt=6) <= 4
+
+
+@pytest.mark.parametrize('status, retried', [(429, True), (503, True), (502, False), (504, False)])
+def test_post_is_only_resent_when_the_instance_did_no_work(status, retried):
+    delay = RetryPolicy().retry_delay('POST', status, {}, attempt=1)
+
+    assert (delay is not None) is retried
+
+
+def test_gives_up_after_max_attempts_and_on_other_statuses():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert policy.retry_delay('GET', 503, {}, attempt=2) is not None
+    assert policy.retry_delay('GET', 503, {}, attempt=3) is None
+    assert policy.retry_delay('GET', 500, {}, attempt=1) is None
+    assert retry.NO_RETRY.retry_delay('GET', 429, {}, attempt=1) is None
+
+
+@pytest.fixture
+def bucket_clock(clock, monkeypatch):
+    monkeypatch.setattr(retry.time, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_paces(bucket_clock):
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+
+    bucket_clock.advance(1)
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_pause_holds_every_caller(bucket_clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(2)
+
+    assert bucket.reserve() == pytest.approx(2.1)
+    assert bucket.reserve() == pytest.approx(2.2)
+
+    # A shorter pause never cuts an existing one short
+    bucket.pause(1)
+    assert bucket.reserve() == pytest.approx(2.3)
+
+    bucket_clock.advance(5)
+    assert bucket.reserve() == 0